@@ -1 +1,15 @@
-from dsp_tools.commands import excel2xml
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from dsp_tools.commands import excel2xml as excel2xml
+
+
+def __getattr__(name: str) -> Any:
+    # excel2xml is imported on first access only, because it loads pandas,
+    # which would slow down the start of every CLI command
+    if name == "excel2xml":
+        return importlib.import_module("dsp_tools.commands.excel2xml")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,27 +1,10 @@
 import argparse
 from pathlib import Path
 
-from dsp_tools.commands.excel2json.lists import excel2lists, validate_lists_section_with_schema
-from dsp_tools.commands.excel2json.project import excel2json
-from dsp_tools.commands.excel2json.properties import excel2properties
-from dsp_tools.commands.excel2json.resources import excel2resources
-from dsp_tools.commands.excel2xml.excel2xml_cli import excel2xml
-from dsp_tools.commands.fast_xmlupload.process_files import process_files
-from dsp_tools.commands.fast_xmlupload.upload_files import upload_files
-from dsp_tools.commands.fast_xmlupload.upload_xml import fast_xmlupload
-from dsp_tools.commands.id2iri import id2iri
-from dsp_tools.commands.ingest_xmlupload.upload_xml import ingest_xmlupload
-from dsp_tools.commands.project.create.project_create import create_project
-from dsp_tools.commands.project.create.project_create_lists import create_lists
-from dsp_tools.commands.project.create.project_validate import validate_project
-from dsp_tools.commands.project.get import get_project
-from dsp_tools.commands.rosetta import upload_rosetta
-from dsp_tools.commands.start_stack import StackConfiguration, StackHandler
-from dsp_tools.commands.template import generate_template_repo
-from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig, UploadConfig
-from dsp_tools.commands.xmlupload.xmlupload import xmlupload
 from dsp_tools.utils.create_logger import get_logger
-from dsp_tools.utils.shared import validate_xml_against_schema
+
+# The commands are imported inside the functions that call them,
+# so that the CLI only loads the libraries (pandas, docker, networkx, ...) that the requested action needs.
 
 logger = get_logger(__name__)
 
@@ -70,12 +53,18 @@ def call_requested_action(args: argparse.Namespace) -> bool:
             result = _call_upload_files(args)
         case "fast-xmlupload":
             result = _call_fast_xmlupload(args)
+        case "fast-xmlupload-pipeline":
+            result = _call_fast_xmlupload_pipeline(args)
         case "ingest-xmlupload":
             result = _call_ingest_xmlupload(args)
         case "template":
-            result = generate_template_repo()
+            result = _call_template()
         case "rosetta":
-            result = upload_rosetta()
+            result = _call_rosetta()
+        case "serve":
+            result = _call_serve(args)
+        case "submit":
+            result = _call_submit(args)
         case _:
             print(f"ERROR: Unknown action '{args.action}'")
             logger.error(f"Unknown action '{args.action}'")
@@ -83,12 +72,49 @@ def call_requested_action(args: argparse.Namespace) -> bool:
     return result
 
 
+def _call_serve(args: argparse.Namespace) -> bool:
+    from dsp_tools.cli.entry_point import parse_job_arguments
+    from dsp_tools.commands.serve import default_socket_path, serve
+
+    return serve(
+        socket_path=Path(args.socket) if args.socket else default_socket_path,
+        max_jobs=args.max_jobs,
+        parse=parse_job_arguments,
+        execute=call_requested_action,
+    )
+
+
+def _call_submit(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.serve import default_socket_path, submit
+
+    return submit(
+        args=args.job,
+        socket_path=Path(args.socket) if args.socket else default_socket_path,
+    )
+
+
+def _call_template() -> bool:
+    from dsp_tools.commands.template import generate_template_repo
+
+    return generate_template_repo()
+
+
+def _call_rosetta() -> bool:
+    from dsp_tools.commands.rosetta import upload_rosetta
+
+    return upload_rosetta()
+
+
 def _call_stop_stack() -> bool:
+    from dsp_tools.commands.start_stack import StackConfiguration, StackHandler
+
     stack_handler = StackHandler(StackConfiguration())
     return stack_handler.stop_stack()
 
 
 def _call_start_stack(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.start_stack import StackConfiguration, StackHandler
+
     stack_handler = StackHandler(
         StackConfiguration(
             max_file_size=args.max_file_size,
@@ -101,6 +127,8 @@ def _call_start_stack(args: argparse.Namespace) -> bool:
 
 
 def _call_excel2xml(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.excel2xml.excel2xml_cli import excel2xml
+
     success, _ = excel2xml(
         datafile=args.data_source,
         shortcode=args.project_shortcode,
@@ -110,6 +138,8 @@ def _call_excel2xml(args: argparse.Namespace) -> bool:
 
 
 def _call_id2iri(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.id2iri import id2iri
+
     return id2iri(
         xml_file=args.xmlfile,
         json_file=args.mapping,
@@ -118,6 +148,8 @@ def _call_id2iri(args: argparse.Namespace) -> bool:
 
 
 def _call_excel2properties(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.excel2json.properties import excel2properties
+
     _, success = excel2properties(
         excelfile=args.excelfile,
         path_to_output_file=args.properties_section,
@@ -126,6 +158,8 @@ def _call_excel2properties(args: argparse.Namespace) -> bool:
 
 
 def _call_excel2resources(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.excel2json.resources import excel2resources
+
     _, success = excel2resources(
         excelfile=args.excelfile,
         path_to_output_file=args.resources_section,
@@ -134,6 +168,8 @@ def _call_excel2resources(args: argparse.Namespace) -> bool:
 
 
 def _call_excel2lists(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.excel2json.lists import excel2lists
+
     _, success = excel2lists(
         excelfolder=args.excelfolder,
         path_to_output_file=args.lists_section,
@@ -143,6 +179,8 @@ def _call_excel2lists(args: argparse.Namespace) -> bool:
 
 
 def _call_excel2json(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.excel2json.project import excel2json
+
     return excel2json(
         data_model_files=args.excelfolder,
         path_to_output_file=args.project_definition,
@@ -150,6 +188,8 @@ def _call_excel2json(args: argparse.Namespace) -> bool:
 
 
 def _call_ingest_xmlupload(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.ingest_xmlupload.upload_xml import ingest_xmlupload
+
     ingest_xmlupload(
         xml_file=Path(args.xml_file),
         user=args.user,
@@ -161,6 +201,8 @@ def _call_ingest_xmlupload(args: argparse.Namespace) -> bool:
 
 
 def _call_fast_xmlupload(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.fast_xmlupload.upload_xml import fast_xmlupload
+
     return fast_xmlupload(
         xml_file=args.xml_file,
         user=args.user,
@@ -170,7 +212,28 @@ def _call_fast_xmlupload(args: argparse.Namespace) -> bool:
     )
 
 
+def _call_fast_xmlupload_pipeline(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.fast_xmlupload.pipeline import fast_xmlupload_pipeline
+
+    return fast_xmlupload_pipeline(
+        xml_file=args.xml_file,
+        input_dir=args.input_dir,
+        output_dir=args.output_dir,
+        user=args.user,
+        password=args.password,
+        dsp_url=args.server,
+        sipi_url=args.sipi_url,
+        nthreads=args.nthreads,
+        upload_threads=args.upload_threads,
+        max_threads=args.max_threads,
+        sipi_containers=args.sipi_containers,
+        window=args.window,
+    )
+
+
 def _call_upload_files(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.fast_xmlupload.upload_files import upload_files
+
     return upload_files(
         dir_with_processed_files=args.processed_dir,
         nthreads=args.nthreads,
@@ -178,22 +241,32 @@ def _call_upload_files(args: argparse.Namespace) -> bool:
         password=args.password,
         dsp_url=args.server,
         sipi_url=args.sipi_url,
+        max_threads=args.max_threads,
     )
 
 
 def _call_process_files(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.fast_xmlupload.process_files import process_files
+
     return process_files(
         input_dir=args.input_dir,
         output_dir=args.output_dir,
         xml_file=args.xml_file,
         nthreads=args.nthreads,
+        sipi_containers=args.sipi_containers,
+        max_threads=args.max_threads,
     )
 
 
 def _call_xmlupload(args: argparse.Namespace) -> bool:
     if args.validate_only:
+        from dsp_tools.utils.shared import validate_xml_against_schema
+
         return validate_xml_against_schema(args.xmlfile)
     else:
+        from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig, UploadConfig
+        from dsp_tools.commands.xmlupload.xmlupload import xmlupload
+
         return xmlupload(
             input_file=args.xmlfile,
             server=args.server,
@@ -201,11 +274,23 @@ def _call_xmlupload(args: argparse.Namespace) -> bool:
             password=args.password,
             imgdir=args.imgdir,
             sipi=args.sipi_url,
-            config=UploadConfig(diagnostics=DiagnosticsConfig(verbose=args.verbose)),
+            config=UploadConfig(
+                list_snapshot=args.list_snapshot,
+                cache_get_requests=args.cache_get_requests,
+                diagnostics=DiagnosticsConfig(
+                    verbose=args.verbose,
+                    quiet=args.quiet,
+                    memory_diagnostics=args.memory_diagnostics,
+                    request_timeline=args.request_timeline,
+                    record_connection=args.record_connection,
+                ),
+            ),
         )
 
 
 def _call_get(args: argparse.Namespace) -> bool:
+    from dsp_tools.commands.project.get import get_project
+
     return get_project(
         project_identifier=args.project,
         outfile_path=args.project_definition,
@@ -220,9 +305,13 @@ def _call_create(args: argparse.Namespace) -> bool:
     success = False
     match args.lists_only, args.validate_only:
         case True, True:
+            from dsp_tools.commands.excel2json.lists import validate_lists_section_with_schema
+
             success = validate_lists_section_with_schema(args.project_definition)
             print("'Lists' section of the JSON project file is syntactically correct and passed validation.")
         case True, False:
+            from dsp_tools.commands.project.create.project_create_lists import create_lists
+
             _, success = create_lists(
                 project_file_as_path_or_parsed=args.project_definition,
                 server=args.server,
@@ -230,9 +319,13 @@ def _call_create(args: argparse.Namespace) -> bool:
                 password=args.password,
             )
         case False, True:
+            from dsp_tools.commands.project.create.project_validate import validate_project
+
             success = validate_project(args.project_definition)
             print("JSON project file is syntactically correct and passed validation.")
         case False, False:
+            from dsp_tools.commands.project.create.project_create import create_project
+
             success = create_project(
                 project_file_as_path_or_parsed=args.project_definition,
                 server=args.server,
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import datetime
-from argparse import ArgumentParser, _SubParsersAction
+from argparse import REMAINDER, ArgumentParser, _SubParsersAction
 from importlib.metadata import version
 
 # help texts
 username_text = "username (e-mail) used for authentication with the DSP-API"
 password_text = "password used for authentication with the DSP-API"
 dsp_server_text = "URL of the DSP server"
+max_threads_text = "adapt the number of threads to the load, up to this number (--nthreads is the initial number)"
+socket_text = "path of the Unix socket of the worker (default: ~/.dsp-tools/dsp-tools.sock)"
 verbose_text = "print more information about the progress to the console"
 
 
@@ -53,6 +55,8 @@ def make_parser(
 
     _add_upload_files(subparsers, default_dsp_api_url, root_user_email, root_user_pw)
 
+    _add_fast_xmlupload_pipeline(subparsers, default_dsp_api_url, root_user_email, root_user_pw)
+
     _add_excel2json(subparsers)
 
     _add_excel2lists(subparsers)
@@ -69,9 +73,33 @@ def make_parser(
 
     _add_rosetta(subparsers)
 
+    _add_serve(subparsers)
+
+    _add_submit(subparsers)
+
     return parser
 
 
+def _add_serve(subparsers: _SubParsersAction[ArgumentParser]) -> None:
+    subparser = subparsers.add_parser(
+        name="serve",
+        help="Run a local worker that executes the xmlupload, validation and id2iri jobs submitted with 'submit'",
+    )
+    subparser.set_defaults(action="serve")
+    subparser.add_argument("--socket", help=socket_text)
+    subparser.add_argument("--max-jobs", type=int, default=4, help="maximum number of jobs that run at the same time")
+
+
+def _add_submit(subparsers: _SubParsersAction[ArgumentParser]) -> None:
+    subparser = subparsers.add_parser(
+        name="submit",
+        help="Submit a job to the worker started with 'serve', e.g. 'dsp-tools submit xmlupload data.xml'",
+    )
+    subparser.set_defaults(action="submit")
+    subparser.add_argument("--socket", help=socket_text)
+    subparser.add_argument("job", nargs=REMAINDER, help="the command to execute, as it would be called")
+
+
 def _add_rosetta(subparsers: _SubParsersAction[ArgumentParser]) -> None:
     subparser = subparsers.add_parser(
         name="rosetta", help="Clone the most up to data rosetta repository, create the data model and upload the data"
@@ -227,11 +255,48 @@ def _add_upload_files(
     subparser.set_defaults(action="upload-files")
     subparser.add_argument("-d", "--processed-dir", help="path to the directory with the processed files")
     subparser.add_argument("-n", "--nthreads", type=int, default=4, help="number of threads to use")
+    subparser.add_argument("--max-threads", type=int, default=None, help=max_threads_text)
     subparser.add_argument("-s", "--server", default=default_dsp_api_url, help=dsp_server_text)
     subparser.add_argument("-u", "--user", default=root_user_email, help=username_text)
     subparser.add_argument("-p", "--password", default=root_user_pw, help=password_text)
 
 
+def _add_fast_xmlupload_pipeline(
+    subparsers: _SubParsersAction[ArgumentParser],
+    default_dsp_api_url: str,
+    root_user_email: str,
+    root_user_pw: str,
+) -> None:
+    subparser = subparsers.add_parser(
+        name="fast-xmlupload-pipeline",
+        help="For internal use only: process and upload the files, and create the resources, in one pipeline",
+    )
+    subparser.set_defaults(action="fast-xmlupload-pipeline")
+    subparser.add_argument("--input-dir", help="path to the input directory where the files should be read from")
+    subparser.add_argument(
+        "--output-dir", help="path to the output directory where the processed/transformed files should be written to"
+    )
+    subparser.add_argument("--nthreads", type=int, default=None, help="number of threads to use for processing")
+    subparser.add_argument("--upload-threads", type=int, default=4, help="number of threads to use for uploading")
+    subparser.add_argument("--max-threads", type=int, default=None, help=max_threads_text)
+    subparser.add_argument(
+        "--sipi-containers",
+        type=int,
+        default=None,
+        help="number of SIPI containers that convert the images (default: one per 4 CPUs, at most 8)",
+    )
+    subparser.add_argument(
+        "--window",
+        type=int,
+        default=1000,
+        help="maximum number of files that are processed or uploaded ahead of the resource creation",
+    )
+    subparser.add_argument("-s", "--server", default=default_dsp_api_url, help=dsp_server_text)
+    subparser.add_argument("-u", "--user", default=root_user_email, help=username_text)
+    subparser.add_argument("-p", "--password", default=root_user_pw, help=password_text)
+    subparser.add_argument("xml_file", help="path to XML file containing the data")
+
+
 def _add_process_files(subparsers: _SubParsersAction[ArgumentParser]) -> None:
     subparser = subparsers.add_parser(
         name="process-files",
@@ -243,6 +308,13 @@ def _add_process_files(subparsers: _SubParsersAction[ArgumentParser]) -> None:
         "--output-dir", help="path to the output directory where the processed/transformed files should be written to"
     )
     subparser.add_argument("--nthreads", type=int, default=None, help="number of threads to use")
+    subparser.add_argument("--max-threads", type=int, default=None, help=max_threads_text)
+    subparser.add_argument(
+        "--sipi-containers",
+        type=int,
+        default=None,
+        help="number of SIPI containers that convert the images (default: one per 4 CPUs, at most 8)",
+    )
     subparser.add_argument("xml_file", help="path to XML file containing the data")
 
 
@@ -266,6 +338,34 @@ def _add_xmlupload(
         "-V", "--validate-only", action="store_true", help="validate the XML file without uploading it"
     )
     subparser.add_argument("-v", "--verbose", action="store_true", help=verbose_text)
+    subparser.add_argument(
+        "-q", "--quiet", action="store_true", help="don't print the progress of the upload (useful for batch jobs)"
+    )
+    subparser.add_argument(
+        "--list-snapshot",
+        action="store_true",
+        help="reuse the lists retrieved in an earlier upload, as long as the lists of the project haven't changed",
+    )
+    subparser.add_argument(
+        "--cache-get-requests",
+        action="store_true",
+        help="don't send the same GET request to the DSP server twice within a few minutes",
+    )
+    subparser.add_argument(
+        "--memory-diagnostics",
+        action="store_true",
+        help="trace the memory usage at each phase of the upload and write a report into the diagnostics folder",
+    )
+    subparser.add_argument(
+        "--request-timeline",
+        choices=["chrome", "jsonl"],
+        help="record a span for each HTTP request and write the timeline into the diagnostics folder",
+    )
+    subparser.add_argument(
+        "--record-connection",
+        action="store_true",
+        help="record all requests and responses into the diagnostics folder, so that they can be replayed offline",
+    )
     subparser.add_argument("xmlfile", help="path to the XML file containing the data")
 
 
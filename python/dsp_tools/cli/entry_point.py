@@ -2,13 +2,18 @@
 The code in this file handles the arguments passed by the user from the command line and calls the requested actions.
 """
 import argparse
+import functools
+import json
+import os
 import subprocess
 import sys
+import threading
+import time
 from importlib.metadata import version
+from pathlib import Path
 
 import regex
-import requests
-from packaging.version import parse
+from packaging.version import InvalidVersion, parse
 from termcolor import colored
 
 from dsp_tools.cli.call_action import call_requested_action
@@ -18,6 +23,15 @@ from dsp_tools.utils.create_logger import get_logger
 
 logger = get_logger(__name__)
 
+_default_dsp_api_url = "http://0.0.0.0:3333"
+_default_sipi_url = "http://0.0.0.0:1024"
+_root_user_email = "root@example.com"
+_root_user_pw = "test"
+
+# the latest version on PyPI is looked up at most once a day
+_version_cache_file = Path.home() / ".dsp-tools" / "latest_version.json"
+_version_cache_ttl = 24 * 60 * 60
+
 
 def main() -> None:
     """
@@ -40,28 +54,32 @@ def run(args: list[str]) -> None:
         InternalError: if the user cannot fix it
         RetryError: if the problem may disappear when trying again later
     """
-    _check_version()
-    default_dsp_api_url = "http://0.0.0.0:3333"
-    default_sipi_url = "http://0.0.0.0:1024"
-    root_user_email = "root@example.com"
-    root_user_pw = "test"
+    version_check = _check_version()
+    try:
+        _run(args)
+    finally:
+        _print_version_check_result(version_check)
 
+
+def _run(args: list[str]) -> None:
     parser = make_parser(
-        default_dsp_api_url=default_dsp_api_url,
-        root_user_email=root_user_email,
-        root_user_pw=root_user_pw,
+        default_dsp_api_url=_default_dsp_api_url,
+        root_user_email=_root_user_email,
+        root_user_pw=_root_user_pw,
     )
     parsed_arguments = _parse_arguments(
         user_args=args,
         parser=parser,
     )
-    _log_cli_arguments(parsed_arguments)
+    if parsed_arguments.action != "submit":
+        # the worker logs the arguments of a submitted job, so that the client stays fast and logs no password
+        _log_cli_arguments(parsed_arguments)
 
     try:
         parsed_arguments = _derive_sipi_url(
             parsed_arguments=parsed_arguments,
-            default_dsp_api_url=default_dsp_api_url,
-            default_sipi_url=default_sipi_url,
+            default_dsp_api_url=_default_dsp_api_url,
+            default_sipi_url=_default_sipi_url,
         )
         success = call_requested_action(parsed_arguments)
     except BaseError as err:
@@ -79,12 +97,100 @@ def run(args: list[str]) -> None:
         sys.exit(1)
 
 
-def _check_version() -> None:
-    """Check if the installed version of dsp-tools is up-to-date. If not, print a warning message."""
-    response = requests.get("https://pypi.org/pypi/dsp-tools/json", timeout=15)
-    if not response.ok:
+def parse_job_arguments(args: list[str]) -> argparse.Namespace:
+    """
+    Parse the arguments of a job that was submitted to "dsp-tools serve",
+    with the same parser and the same defaults as on the command line.
+
+    Args:
+        args: the arguments of the job, excluding the leading "dsp-tools" command
+
+    Raises:
+        UserError: if the arguments are invalid
+
+    Returns:
+        the parsed arguments
+    """
+    parser = make_parser(
+        default_dsp_api_url=_default_dsp_api_url,
+        root_user_email=_root_user_email,
+        root_user_pw=_root_user_pw,
+    )
+    try:
+        parsed_arguments = parser.parse_args(args)
+    except SystemExit:
+        # argparse has already printed the reason, and the arguments may contain a password
+        raise UserError("The arguments of the job are invalid") from None
+    if not hasattr(parsed_arguments, "action"):
+        raise UserError("The job doesn't contain an action")
+    _log_cli_arguments(parsed_arguments)
+    return _derive_sipi_url(
+        parsed_arguments=parsed_arguments,
+        default_dsp_api_url=_default_dsp_api_url,
+        default_sipi_url=_default_sipi_url,
+    )
+
+
+def _check_version() -> threading.Thread | None:
+    """
+    Check if the installed version of dsp-tools is up-to-date. If not, print a warning message.
+    The latest version is cached for a day.
+    If the cache is outdated, it is renewed by a background thread,
+    so that the CLI never waits for PyPI.
+    The check is skipped if the environment variable DSP_TOOLS_SKIP_VERSION_CHECK is set.
+
+    Returns:
+        the thread that retrieves the latest version from PyPI, if the cache had to be renewed
+    """
+    if os.getenv("DSP_TOOLS_SKIP_VERSION_CHECK"):
+        return None
+    if latest := _read_latest_version_from_cache():
+        _print_upgrade_hint(latest)
+        return None
+    thread = threading.Thread(target=_get_latest_version_from_pypi, name="version-check", daemon=True)
+    thread.start()
+    return thread
+
+
+def _print_version_check_result(thread: threading.Thread | None) -> None:
+    """Print the result of the background check, but only if it has already finished."""
+    if thread is None or thread.is_alive():
+        return
+    if latest := _read_latest_version_from_cache():
+        _print_upgrade_hint(latest)
+
+
+def _read_latest_version_from_cache() -> str | None:
+    try:
+        content = json.loads(_version_cache_file.read_text(encoding="utf-8"))
+        if time.time() - content["checked_at"] > _version_cache_ttl:
+            return None
+        latest: str = content["latest"]
+        return latest
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _get_latest_version_from_pypi() -> None:
+    # requests is only imported here, on the background thread, because it takes a while to import
+    import requests
+
+    try:
+        response = requests.get("https://pypi.org/pypi/dsp-tools/json", timeout=15)
+        if not response.ok:
+            return
+        content = {"latest": response.json()["info"]["version"], "checked_at": time.time()}
+        _version_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        _version_cache_file.write_text(json.dumps(content), encoding="utf-8")
+    except (requests.RequestException, OSError, ValueError, KeyError):
+        logger.info("Unable to retrieve the latest version of DSP-TOOLS from PyPI", exc_info=True)
+
+
+def _print_upgrade_hint(latest_version: str) -> None:
+    try:
+        latest = parse(latest_version)
+    except InvalidVersion:
         return
-    latest = parse(response.json()["info"]["version"])
     installed = parse(version("dsp-tools"))
     if latest > installed:
         msg = colored(
@@ -118,6 +224,7 @@ def _parse_arguments(
     return args
 
 
+@functools.cache
 def _get_version() -> str:
     pip_freeze_output = subprocess.run("pip freeze".split(), check=False, capture_output=True).stdout.decode("utf-8")
     dsp_tools_lines = [x for x in pip_freeze_output.split("\n") if "dsp-tools" in x]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Slot:
+    """
+    A unit of work that is executed while holding a slot of the concurrency limit.
+
+    Attributes:
+        weight: size of the work (e.g. the size of the file in MiB), to make the latencies comparable
+        congested: set to True if the work failed because the server or the machine is overloaded
+            (timeout, 5xx response, ...)
+    """
+
+    weight: float = 1.0
+    congested: bool = False
+
+
+@dataclass
+class AdaptiveConcurrency:
+    """
+    Limits the number of concurrent work items (uploads, conversions) with an AIMD algorithm,
+    as TCP does with its congestion window:
+    While the work items are healthy, the limit is increased by 1 per window (i.e. after "limit" work items).
+    If a work item of the window was congested,
+    or if the latency rose above a multiple of the lowest latency seen so far,
+    the limit is halved at the end of the window
+    (not earlier, because the work items that are still running were started with the old limit).
+
+    The threads that execute the work items must be at least as many as max_limit,
+    and every work item must be executed inside slot().
+
+    Attributes:
+        name: name that is used in the log messages, e.g. "upload-files"
+        max_limit: upper bound of the limit (e.g. the number of threads)
+        limit: current limit
+        adaptive: if False, the limit never changes
+        min_limit: lower bound of the limit
+        latency_tolerance: factor by which the latency may exceed the lowest latency before the limit is halved
+        clock: source of the time (can be replaced in tests)
+        history: the changes of the limit over time (time, new limit)
+    """
+
+    name: str
+    max_limit: int
+    limit: int
+    adaptive: bool = True
+    min_limit: int = 1
+    latency_tolerance: float = 2.0
+    clock: Callable[[], float] = time.monotonic
+    history: list[tuple[datetime, int]] = field(default_factory=list)
+    _in_flight: int = field(init=False, default=0)
+    _completed_in_window: int = field(init=False, default=0)
+    _congested_in_window: bool = field(init=False, default=False)
+    _latency: Optional[float] = field(init=False, default=None)
+    _baseline: Optional[float] = field(init=False, default=None)
+    _condition: threading.Condition = field(init=False, default_factory=threading.Condition)
+
+    @staticmethod
+    def create(name: str, nthreads: Optional[int], max_threads: Optional[int]) -> AdaptiveConcurrency:
+        """
+        Create the concurrency limit from the CLI options.
+
+        Args:
+            name: name that is used in the log messages
+            nthreads: fixed number of threads (without max_threads), or the initial limit (with max_threads)
+            max_threads: if given, the limit is adapted up to this number
+
+        Returns:
+            the concurrency limit
+        """
+        if not max_threads:
+            fixed = nthreads or 1
+            return AdaptiveConcurrency(name, max_limit=fixed, limit=fixed, adaptive=False)
+        initial = min(nthreads or 4, max_threads)
+        concurrency = AdaptiveConcurrency(name, max_limit=max_threads, limit=initial)
+        concurrency.history.append((datetime.now(), initial))
+        logger.info(f"{name}: adaptive concurrency, starting with {initial}, at most {max_threads}")
+        return concurrency
+
+    @contextmanager
+    def slot(self, weight: float = 1.0) -> Iterator[Slot]:
+        """
+        Wait until the limit allows another work item, and execute it.
+        An exception that escapes is regarded as congestion.
+
+        Args:
+            weight: size of the work (e.g. the size of the file in MiB)
+
+        Yields:
+            the slot, in which the work item can report a congestion
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        slot = Slot(weight)
+        start = self.clock()
+        try:
+            yield slot
+        except BaseException:
+            slot.congested = True
+            raise
+        finally:
+            self._complete(slot, self.clock() - start)
+
+    def _complete(self, slot: Slot, duration: float) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if self.adaptive:
+                self._adapt(slot, duration / max(slot.weight, 1.0))
+            self._condition.notify_all()
+
+    def _adapt(self, slot: Slot, latency: float) -> None:
+        self._completed_in_window += 1
+        if slot.congested:
+            self._congested_in_window = True
+        else:
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            self._baseline = self._latency if self._baseline is None else min(self._baseline, self._latency)
+        if self._completed_in_window < self.limit:
+            return
+        if self._congested_in_window:
+            self._set_limit(max(self.min_limit, self.limit // 2), "congestion")
+        elif self._latency and self._baseline and self._latency > self.latency_tolerance * self._baseline:
+            self._set_limit(max(self.min_limit, self.limit // 2), "rising latency")
+            # the latency is measured anew with the new limit,
+            # and the lowest latency ages, so that a machine or server that became slower permanently isn't starved
+            self._latency = None
+            self._baseline *= 1.1
+        else:
+            self._set_limit(min(self.max_limit, self.limit + 1), "healthy")
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        self._completed_in_window = 0
+        self._congested_in_window = False
+        if limit == self.limit:
+            return
+        logger.info(f"{self.name}: concurrency {self.limit} -> {limit} ({reason})")
+        self.limit = limit
+        self.history.append((datetime.now(), limit))
+
+    def log_summary(self) -> None:
+        """Print and log how the limit changed over time."""
+        if not self.adaptive or not self.history:
+            return
+        limits = [limit for _, limit in self.history]
+        msg = (
+            f"{self.name}: the concurrency was between {min(limits)} and {max(limits)}, "
+            f"changed {len(self.history) - 1} times, and ended at {self.limit}"
+        )
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
@@ -0,0 +1,122 @@
+"""
+This module copies the files processed by process-files,
+and computes their SHA-256 checksums without reading them more often than necessary.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+# large chunks keep the number of system calls low on multi-GB files
+_buffer_size = 1024 * 1024
+# Linux ioctl that clones a file (copy-on-write, e.g. on Btrfs, XFS or ZFS), without copying the data
+_ficlone = 0x40049409
+
+
+def copy_with_checksum(src: Path, dst: Path) -> str:
+    """
+    Copy a file and compute the SHA-256 checksum of its content, reading it only once.
+    If the filesystem supports it, the copy is a copy-on-write clone,
+    so that only the checksum needs to read the file.
+    Otherwise, each chunk is hashed and written right after it was read.
+
+    Args:
+        src: file to be copied
+        dst: path of the copy
+
+    Raises:
+        OSError: if the file could not be copied
+
+    Returns:
+        the checksum (hex digest)
+    """
+    if _clone(src, dst):
+        return compute_sha256(src)
+    hash_sha256 = hashlib.sha256()
+    buffer = bytearray(_buffer_size)
+    view = memoryview(buffer)
+    with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+        while size := f_in.readinto(buffer):
+            hash_sha256.update(view[:size])
+            f_out.write(view[:size])
+    return hash_sha256.hexdigest()
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """
+    Copy a file whose checksum is already known, without passing its content through Python:
+    as copy-on-write clone, or as copy inside the kernel (shutil uses sendfile on Linux).
+
+    Args:
+        src: file to be copied
+        dst: path of the copy
+
+    Raises:
+        OSError: if the file could not be copied
+    """
+    if not _clone(src, dst):
+        shutil.copyfile(src, dst)
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """
+    Create a file with the same content as another file, without reading it if possible:
+    as hard link, as copy-on-write clone, or as copy inside the kernel (shutil uses sendfile on Linux).
+    The checksum of the source file is also valid for the new file.
+
+    Args:
+        src: existing file
+        dst: path of the new file
+
+    Raises:
+        OSError: if the file could not be created
+    """
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        logger.debug(f"Unable to create a hard link from {dst} to {src}, trying a copy")
+    copy_file(src, dst)
+
+
+def compute_sha256(file: Path) -> str:
+    """
+    Compute the SHA-256 checksum of a file.
+
+    Args:
+        file: path of the file
+
+    Raises:
+        OSError: if the file could not be read
+
+    Returns:
+        the checksum (hex digest)
+    """
+    hash_sha256 = hashlib.sha256()
+    buffer = bytearray(_buffer_size)
+    view = memoryview(buffer)
+    with open(file, "rb") as f:
+        while size := f.readinto(buffer):
+            hash_sha256.update(view[:size])
+    return hash_sha256.hexdigest()
+
+
+def _clone(src: Path, dst: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    try:
+        with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+            fcntl.ioctl(f_out.fileno(), _ficlone, f_in.fileno())
+        return True
+    except OSError:
+        # the filesystem doesn't support clones, or the files are on different filesystems
+        dst.unlink(missing_ok=True)
+        return False
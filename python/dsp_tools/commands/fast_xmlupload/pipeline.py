@@ -0,0 +1,427 @@
+"""
+This module executes the three steps of the fast upload (process-files, upload-files, fast-xmlupload) as a pipeline:
+every file is uploaded as soon as it is processed,
+and every resource is created as soon as its file is uploaded.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.process_files import (
+    check_input_params,
+    file_extensions,
+    get_category_limits,
+    get_export_moving_image_frames_script,
+    get_file_paths_from_xml,
+    get_files_processed_earlier,
+    get_processed_file_names,
+    process_file_with_limit,
+    start_sipi_workers,
+    stop_sipi_workers,
+)
+from dsp_tools.commands.fast_xmlupload.processing_cache import ProcessingCache
+from dsp_tools.commands.fast_xmlupload.processing_journal import ProcessingJournal
+from dsp_tools.commands.fast_xmlupload.upload_files import SessionPool, upload_file
+from dsp_tools.commands.fast_xmlupload.upload_ledger import UploadLedger
+from dsp_tools.commands.xmlupload.upload_config import UploadConfig
+from dsp_tools.commands.xmlupload.xmlupload import xmlupload
+from dsp_tools.utils.connection import Connection
+from dsp_tools.utils.connection_live import ConnectionLive
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+_checkpoint_interval = 1000
+
+
+class FilePipeline:
+    """
+    Processes and uploads the files in background threads,
+    while the resources are created in the order of the XML file.
+    The stages are connected by bounded queues:
+
+    - The files are admitted in the order of the XML file.
+      A queue per file category (IMAGE, VIDEO, OTHER) feeds the processing threads of this category.
+    - The processed files are put into a queue that feeds the upload threads.
+    - The resource creation asks for the internal filename of a file with wait_for(),
+      which blocks until the file is uploaded.
+
+    At most "window" files are admitted but not yet taken by the resource creation,
+    so that the memory stays bounded, and the processing doesn't run far ahead of the slowest stage.
+    If the resource creation asks for a file that is not admitted yet (e.g. because the order of the resources differs
+    from the order of the XML file), the file is admitted right away, without waiting for the window.
+    """
+
+    def __init__(
+        self,
+        files: list[Path],
+        input_dir: Path,
+        output_dir: Path,
+        processing_limits: dict[str, AdaptiveConcurrency],
+        upload_concurrency: AdaptiveConcurrency,
+        sipi_url: str,
+        con: Connection,
+        cache: ProcessingCache,
+        journal: ProcessingJournal,
+        ledger: UploadLedger,
+        processed_earlier: Optional[dict[Path, Path]] = None,
+        window: int = 1000,
+    ) -> None:
+        """
+        Prepare the pipeline, without starting the threads.
+
+        Args:
+            files: the original files, in the order in which the resources need them
+            input_dir: the root directory of the original files
+            output_dir: the directory where the processed files are written to
+            processing_limits: concurrency limit of the processing of every file category
+            upload_concurrency: concurrency limit of the uploads
+            sipi_url: URL of the SIPI server
+            con: connection to the DSP server
+            cache: files processed by earlier runs, which are reused instead of being processed again
+            journal: journal to which every file is appended as soon as it is processed
+            ledger: upload state of the files, to which every upload is appended
+            processed_earlier: files that were processed by an earlier run (original file -> processed file),
+                which are only uploaded (if they weren't uploaded yet)
+            window: maximum number of files that are processed or uploaded ahead of the resource creation
+        """
+        self.files = files
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.processing_limits = processing_limits
+        self.upload_concurrency = upload_concurrency
+        self.sipi_url = sipi_url
+        self.con = con
+        self.cache = cache
+        self.journal = journal
+        self.ledger = ledger
+        self.processed_earlier = processed_earlier or {}
+        self.num_processed = 0
+        self.num_uploaded = 0
+        self.failed: list[Path] = []
+        self._known = set(files)
+        self._window = threading.Semaphore(window)
+        self._processing_queues: dict[str, queue.Queue[Optional[Path]]] = {
+            category: queue.Queue(maxsize=window) for category in processing_limits
+        }
+        # original file, processed file, and the names of the files to upload (if they are known already)
+        self._upload_queue: queue.Queue[Optional[tuple[Path, Path, Optional[list[str]]]]] = queue.Queue(maxsize=window)
+        self._sessions = SessionPool(upload_concurrency.max_limit)
+        self._condition = threading.Condition()
+        self._admitted: set[Path] = set()
+        self._holding_window: set[Path] = set()
+        self._results: dict[Path, Optional[str]] = {}
+        self._journal_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._admission_thread = threading.Thread(target=self._admit_all, name="pipeline-admission", daemon=True)
+        self._processing_threads = {
+            category: [
+                threading.Thread(
+                    target=self._process, args=(category,), name=f"pipeline-{category.lower()}", daemon=True
+                )
+                for _ in range(limit.max_limit)
+            ]
+            for category, limit in processing_limits.items()
+        }
+        self._upload_threads = [
+            threading.Thread(target=self._upload, name="pipeline-upload", daemon=True)
+            for _ in range(upload_concurrency.max_limit)
+        ]
+
+    def start(self) -> None:
+        """Start the threads of all stages."""
+        self._admission_thread.start()
+        for threads in self._processing_threads.values():
+            for thread in threads:
+                thread.start()
+        for thread in self._upload_threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the threads, and write the cache and the journal to the disk.
+        The files that are processed or uploaded at the moment are finished,
+        the files that are still waiting in a queue are dropped.
+        """
+        self._stopped.set()
+        # wake up the admission thread, if it waits for the window
+        self._window.release()
+        self._admission_thread.join()
+        # the stages are stopped from the first to the last, so that no thread waits for a stopped stage
+        for category, threads in self._processing_threads.items():
+            self._stop_threads(self._processing_queues[category], threads)
+        self._stop_threads(self._upload_queue, self._upload_threads)
+        self._sessions.close()
+        with self._journal_lock:
+            self.cache.save()
+            self.journal.sync()
+
+    def wait_for(self, bitstream: str) -> Optional[str]:
+        """
+        Wait until a file is processed and uploaded.
+
+        Args:
+            bitstream: path of the original file, as it is written in the <bitstream> tag
+
+        Returns:
+            the internal filename of the uploaded file, or None if it could not be processed or uploaded
+        """
+        orig_file = Path(bitstream)
+        if orig_file not in self._known:
+            logger.error(f"The file '{bitstream}' is not part of the pipeline")
+            return None
+        self._admit(orig_file, holds_window=False)
+        with self._condition:
+            self._condition.wait_for(lambda: orig_file in self._results)
+            if orig_file in self._holding_window:
+                self._holding_window.remove(orig_file)
+                self._window.release()
+            return self._results[orig_file]
+
+    def log_summary(self) -> None:
+        """Print and log the number of processed, uploaded and failed files."""
+        msg = (
+            f"Pipeline: {self.num_processed} files processed, {self.num_uploaded} files uploaded, "
+            f"{len(self.failed)} files failed"
+        )
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+        for file in self.failed:
+            print(f" - {file} could not be processed or uploaded.")
+            logger.error(f"{file} could not be processed or uploaded.")
+
+    def _admit_all(self) -> None:
+        for orig_file in self.files:
+            while not self._window.acquire(timeout=1):
+                if self._stopped.is_set():
+                    return
+            if self._stopped.is_set() or not self._admit(orig_file, holds_window=True):
+                self._window.release()
+
+    def _admit(self, orig_file: Path, holds_window: bool) -> bool:
+        with self._condition:
+            if orig_file in self._admitted:
+                return False
+            self._admitted.add(orig_file)
+            if holds_window:
+                self._holding_window.add(orig_file)
+        if processed_file := self.processed_earlier.get(orig_file):
+            self._put(self._upload_queue, (orig_file, processed_file, None))
+        else:
+            category = next((c for c, exts in file_extensions.items() if orig_file.suffix.lower() in exts), "OTHER")
+            self._put(self._processing_queues[category], orig_file)
+        return True
+
+    def _process(self, category: str) -> None:
+        while (orig_file := self._processing_queues[category].get()) is not None:
+            # every file must get a result, otherwise the resource creation would wait for it forever
+            try:
+                _, processed_file = process_file_with_limit(
+                    self.processing_limits[category], orig_file, self.input_dir, self.output_dir, self.cache
+                )
+            except Exception:
+                logger.exception(f"Could not process {orig_file}")
+                processed_file = None
+            # a file that can't be written to the journal is processed nevertheless, and is uploaded
+            files = None
+            try:
+                files = self._record_processing(orig_file, processed_file)
+            except Exception:
+                logger.exception(f"Could not write the processing of {orig_file} to the journal")
+            if processed_file:
+                self._put(self._upload_queue, (orig_file, processed_file, files))
+            else:
+                self._finish(orig_file, None)
+
+    def _record_processing(self, orig_file: Path, processed_file: Optional[Path]) -> Optional[list[str]]:
+        files = get_processed_file_names(orig_file, processed_file) if processed_file else None
+        with self._journal_lock:
+            self.journal.append(orig_file, processed_file, files)
+            self.num_processed += 1
+            if self.num_processed % _checkpoint_interval == 0:
+                self.cache.save()
+                self.journal.sync()
+                print(f"{datetime.now()}: Processed {self.num_processed}/{len(self.files)} files")
+        return files
+
+    def _upload(self) -> None:
+        while (item := self._upload_queue.get()) is not None:
+            orig_file, processed_file, files = item
+            # every file must get a result, otherwise the resource creation would wait for it forever
+            try:
+                if files is None:
+                    files = get_processed_file_names(orig_file, processed_file)
+                upload_candidates = [processed_file.parent / x for x in files]
+                _, success = upload_file(
+                    processed_file,
+                    upload_candidates,
+                    self.sipi_url,
+                    self.con,
+                    self._sessions,
+                    self.upload_concurrency,
+                    self.ledger,
+                )
+            except Exception:
+                logger.exception(f"Could not upload {processed_file}")
+                success = False
+            self._finish(orig_file, processed_file.name if success else None)
+
+    def _finish(self, orig_file: Path, internal_filename: Optional[str]) -> None:
+        with self._condition:
+            self._results[orig_file] = internal_filename
+            if internal_filename:
+                self.num_uploaded += 1
+            else:
+                self.failed.append(orig_file)
+            self._condition.notify_all()
+
+    def _put(self, target: queue.Queue[Any], item: Any) -> None:
+        # a full queue is waited for, unless the pipeline is stopped
+        while not self._stopped.is_set():
+            try:
+                target.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _stop_threads(source: queue.Queue[Any], threads: list[threading.Thread]) -> None:
+        # drop the waiting items, and put an end marker for every thread that reads from the queue
+        try:
+            while True:
+                source.get_nowait()
+        except queue.Empty:
+            pass
+        for _ in threads:
+            source.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def fast_xmlupload_pipeline(
+    xml_file: str,
+    input_dir: str,
+    output_dir: str,
+    user: str,
+    password: str,
+    dsp_url: str,
+    sipi_url: str,
+    nthreads: Optional[int] = None,
+    upload_threads: int = 4,
+    max_threads: Optional[int] = None,
+    sipi_containers: Optional[int] = None,
+    window: int = 1000,
+) -> bool:
+    """
+    Process the files referenced in the given XML file, upload them, and create the resources,
+    as a pipeline instead of three steps after each other:
+    every file is uploaded as soon as it is processed,
+    and every resource is created as soon as its file is uploaded.
+    The journal of the processing and the ledger of the uploads are written as by process-files and upload-files,
+    so that an interrupted run can be continued with the single steps, or with this command.
+
+    Args:
+        xml_file: path to the XML file containing the resources
+        input_dir: path to the directory where the files should be read from
+        output_dir: path to the directory where the processed files should be written to
+        user: the user's e-mail for login into DSP
+        password: the user's password for login into DSP
+        dsp_url: URL to the DSP server
+        sipi_url: URL of the SIPI server
+        nthreads: number of threads to use for processing the images (by default, the number of CPUs + 4, at most 32),
+            or the initial number of threads if max_threads is given
+        upload_threads: number of threads to use for uploading,
+            or the initial number of threads if max_threads is given
+        max_threads: if given, the number of threads is adapted to the load, up to this number
+        sipi_containers: number of SIPI containers that convert the images (by default, one per 4 CPUs, at most 8)
+        window: maximum number of files that are processed or uploaded ahead of the resource creation
+
+    Returns:
+        True if all files were processed and uploaded, and all resources were created, False otherwise
+    """
+    input_dir_path, output_dir_path, xml_file_path = check_input_params(
+        input_dir=input_dir,
+        out_dir=output_dir,
+        xml_file=xml_file,
+    )
+    all_files = get_file_paths_from_xml(xml_file_path)
+    processed_earlier = {
+        orig: processed for orig, processed in get_files_processed_earlier(all_files, output_dir_path) if processed
+    }
+    if processed_earlier:
+        msg = f"{len(processed_earlier)} files had been processed by an earlier run already, and are only uploaded"
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+
+    nthreads = nthreads or min(32, (os.cpu_count() or 1) + 4)
+    processing_concurrency = AdaptiveConcurrency.create("process-files", nthreads, max_threads)
+    upload_concurrency = AdaptiveConcurrency.create("upload-files", upload_threads, max_threads)
+    start_sipi_workers(
+        input_dir=input_dir_path,
+        output_dir=output_dir_path,
+        sipi_containers=sipi_containers,
+        nthreads=processing_concurrency.max_limit,
+    )
+    if any(path.suffix == ".mp4" for path in all_files):
+        get_export_moving_image_frames_script()
+
+    con = ConnectionLive(dsp_url)
+    con.login(user, password)
+    cache = ProcessingCache.load(output_dir_path)
+    journal = ProcessingJournal.create()
+    ledger = UploadLedger.load(sipi_url, user)
+    pipeline = FilePipeline(
+        files=all_files,
+        input_dir=input_dir_path,
+        output_dir=output_dir_path,
+        processing_limits=get_category_limits(processing_concurrency),
+        upload_concurrency=upload_concurrency,
+        sipi_url=sipi_url,
+        con=con,
+        cache=cache,
+        journal=journal,
+        ledger=ledger,
+        processed_earlier=processed_earlier,
+        window=window,
+    )
+
+    start_time = datetime.now()
+    print(f"{start_time}: Start the fast upload pipeline with {len(all_files)} files...")
+    logger.info(f"Start the fast upload pipeline with {len(all_files)} files...")
+    pipeline.start()
+    try:
+        success = xmlupload(
+            input_file=xml_file_path,
+            server=dsp_url,
+            user=user,
+            password=password,
+            imgdir=".",
+            sipi=sipi_url,
+            config=UploadConfig(media_previously_uploaded=True),
+            media_resolver=pipeline.wait_for,
+        )
+    finally:
+        pipeline.stop()
+        journal.close()
+        ledger.close()
+
+    end_time = datetime.now()
+    print(f"{end_time}: Total time of the fast upload pipeline: {end_time - start_time}")
+    logger.info(f"Total time of the fast upload pipeline: {end_time - start_time}")
+    pipeline.log_summary()
+    processing_concurrency.log_summary()
+    upload_concurrency.log_summary()
+
+    if success and not pipeline.failed:
+        # if there were problems, don't remove the sipi containers. they might contain valuable log data.
+        stop_sipi_workers()
+        return True
+    print("Something went wrong. The SIPI containers are still available to be analyzed. Don't forget to remove them.")
+    return False
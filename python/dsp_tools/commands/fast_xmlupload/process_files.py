@@ -1,136 +1,362 @@
 """This module handles processing of files referenced in the bitstream tags of an XML file."""
 
-import hashlib
 import json
-import pickle
-import shutil
+import os
 import subprocess
 import sys
+import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
-from itertools import batched
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path, PurePath
 from typing import Any, Optional, Union
 
-import docker
 import requests
-from docker.models.containers import Container
 from lxml import etree
 
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.file_copy import compute_sha256, copy_file, copy_with_checksum, link_or_copy
+from dsp_tools.commands.fast_xmlupload.processing_cache import ProcessingCache
+from dsp_tools.commands.fast_xmlupload.processing_journal import (
+    ProcessingJournal,
+    get_processing_results,
+    get_result_files,
+)
+from dsp_tools.commands.fast_xmlupload.sipi_workers import SipiWorkerPool
 from dsp_tools.models.exceptions import UserError
 from dsp_tools.utils.create_logger import get_logger
 
 logger = get_logger(__name__)
-sipi_container: Optional[Container] = None
+sipi_pool: Optional[SipiWorkerPool] = None
 export_moving_image_frames_script: Optional[Path] = None
+_export_moving_image_frames_script_url = (
+    "https://github.com/dasch-swiss/dsp-api/raw/main/sipi/scripts/export-moving-image-frames.sh"
+)
+_export_moving_image_frames_script_max_age = timedelta(days=30)
+_checkpoint_interval = 1000
+file_extensions = {
+    "IMAGE": [".jpg", ".jpeg", ".tif", ".tiff", ".jp2", ".png"],
+    "VIDEO": [".mp4"],
+    "OTHER": [
+        *[".7z", ".gz", ".gzip", ".tar", ".tar.gz", ".tgz", ".z", ".zip"],
+        *[".csv", ".txt", ".xml", ".xsd", ".xsl"],
+        *[".doc", ".docx", ".pdf", ".ppt", ".pptx", ".xls", ".xlsx"],
+        *[".mp3", ".wav"],
+    ],
+}
+
+
+@dataclass
+class _CategoryQueue:
+    """
+    The files of one file category that are waiting to be processed,
+    together with the threads and the concurrency limit of this category.
+
+    Attributes:
+        category: IMAGE, VIDEO or OTHER
+        files: the files that are waiting, in the order in which they are processed
+        concurrency: limit of the number of files of this category that are processed at the same time
+        executor: the threads of this category (they are started when the first file is submitted)
+        submitted: number of files that are submitted to the threads, but not finished yet
+    """
+
+    category: str
+    files: deque[Path]
+    concurrency: AdaptiveConcurrency
+    executor: ThreadPoolExecutor
+    submitted: int = 0
 
 
-def _get_export_moving_image_frames_script() -> None:
+def get_export_moving_image_frames_script() -> None:
     """
-    Downloads the shell script that is used to extract the preview image from a video.
+    Provides the shell script that is used to extract the preview image from a video.
+    It is downloaded to the user folder if there is no local copy yet, or if the local copy is older than 30 days.
+    If the download fails, an existing local copy is used.
+
+    Raises:
+        UserError: if the script could not be downloaded, and there is no local copy
     """
     user_folder = Path.home() / Path(".dsp-tools/fast-xmlupload")
     user_folder.mkdir(parents=True, exist_ok=True)
     global export_moving_image_frames_script
     export_moving_image_frames_script = user_folder / "export-moving-image-frames.sh"
-    script_text_response = requests.get(
-        "https://github.com/dasch-swiss/dsp-api/raw/main/sipi/scripts/export-moving-image-frames.sh",
-        timeout=30,
-    )
-    script_text = script_text_response.text
-    with open(export_moving_image_frames_script, "w", encoding="utf-8") as f:
-        f.write(script_text)
+    if export_moving_image_frames_script.is_file():
+        age = time.time() - export_moving_image_frames_script.stat().st_mtime
+        if age < _export_moving_image_frames_script_max_age.total_seconds():
+            logger.info(f"Using the cached copy of {export_moving_image_frames_script}")
+            return
+    try:
+        response = requests.get(_export_moving_image_frames_script_url, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException:
+        if export_moving_image_frames_script.is_file():
+            logger.warning(
+                f"Could not update {export_moving_image_frames_script}, using the cached copy", exc_info=True
+            )
+            return
+        logger.error(f"Could not download {_export_moving_image_frames_script_url}", exc_info=True)
+        raise UserError(
+            f"Could not download the script to extract the preview images from the videos: "
+            f"{_export_moving_image_frames_script_url}"
+        ) from None
+    # write to a temporary file first, so that a concurrent run never executes a half-written script
+    tmp_file = export_moving_image_frames_script.with_name(f"{export_moving_image_frames_script.name}.{os.getpid()}")
+    tmp_file.write_text(response.text, encoding="utf-8")
+    tmp_file.replace(export_moving_image_frames_script)
+    logger.info(f"Downloaded {export_moving_image_frames_script}")
+
+
+def get_category_limits(concurrency: AdaptiveConcurrency) -> dict[str, AdaptiveConcurrency]:
+    """
+    Get the concurrency limits of the file categories.
+    The images are converted by SIPI, and follow the limit given by the user.
+    The videos are copied, and the preview is extracted with ffmpeg, which uses several CPUs,
+    so that only a few of them are processed at the same time.
+    The other files are only copied and checksummed, which is limited by the disk rather than the CPU,
+    so that the same number of threads as for the images is used.
+
+    Args:
+        concurrency: limit given by the user
+
+    Returns:
+        mapping of the file categories to their concurrency limits
+    """
+    cpu_count = os.cpu_count() or 1
+    num_videos = max(1, min(4, cpu_count // 4, concurrency.max_limit))
+    return {
+        "IMAGE": concurrency,
+        "VIDEO": AdaptiveConcurrency("process-files (videos)", max_limit=num_videos, limit=num_videos, adaptive=False),
+        "OTHER": AdaptiveConcurrency(
+            "process-files (other files)",
+            max_limit=concurrency.max_limit,
+            limit=concurrency.max_limit,
+            adaptive=False,
+        ),
+    }
+
+
+def _get_category_queues(
+    files_to_process: list[Path],
+    category_limits: dict[str, AdaptiveConcurrency],
+) -> list[_CategoryQueue]:
+    """
+    Distribute the files to a queue per file category.
+    The images and videos are sorted from the largest to the smallest file,
+    so that the long jobs are not the last ones that are running, while the other threads are idle.
+    The files without a known category are put into the queue of the other files
+    (they are reported as errors when they are processed).
+
+    Args:
+        files_to_process: the files that should be processed
+        category_limits: mapping of the file categories to their concurrency limits
+
+    Returns:
+        the queues
+    """
+    files_per_category: dict[str, list[Path]] = {category: [] for category in category_limits}
+    for file in files_to_process:
+        category = next((c for c, exts in file_extensions.items() if file.suffix.lower() in exts), "OTHER")
+        files_per_category[category].append(file)
+    for category in ("IMAGE", "VIDEO"):
+        files_per_category[category].sort(key=_get_file_size, reverse=True)
+    return [
+        _CategoryQueue(
+            category=category,
+            files=deque(files),
+            concurrency=category_limits[category],
+            executor=ThreadPoolExecutor(
+                max_workers=category_limits[category].max_limit, thread_name_prefix=f"process-{category.lower()}"
+            ),
+        )
+        for category, files in files_per_category.items()
+        if files
+    ]
+
+
+def _get_file_size(file: Path) -> int:
+    try:
+        return file.stat().st_size
+    except OSError:
+        return 0
 
 
 def _process_files_in_parallel(
     files_to_process: list[Path],
     input_dir: Path,
     output_dir: Path,
-    nthreads: Optional[int],
-) -> tuple[list[tuple[Path, Optional[Path]]], list[Path]]:
+    concurrency: AdaptiveConcurrency,
+    orig_filepath_2_uuid: list[tuple[Path, Optional[Path]]],
+    cache: Optional[ProcessingCache] = None,
+    journal: Optional[ProcessingJournal] = None,
+) -> None:
     """
-    Creates a thread pool and executes the file processing in parallel.
-    If a Docker API error occurs, the SIPI container is restarted,
-    and the unprocessed files are returned,
-    so that this function can be called again with the unprocessed files.
+    Executes the file processing in parallel,
+    in a separate thread pool per file category (images, videos, other files),
+    so that the slow videos don't block the images, and the many small files don't wait behind the videos.
+    If a SIPI container fails, the pool of SIPI containers replaces it
+    while the other containers continue to process the files.
+    Every 1000 files, the cache and the journal are written to the disk.
 
     Args:
         files_to_process: a list of all paths to the files that should be processed
         input_dir: the root directory of the input files
         output_dir: the directory where the processed files should be written to
-        nthreads: number of threads to use for processing
+        concurrency: limit of the number of images that are processed at the same time
+        orig_filepath_2_uuid: list to which the tuples with the original file path
+            and the path to the processed file are appended as soon as a file is processed
+            (if a file could not be processed, the second path is None)
+        cache: files processed by earlier runs, which are reused instead of being processed again
+        journal: journal to which every file is appended as soon as it is processed
+    """
+    queues = _get_category_queues(files_to_process, get_category_limits(concurrency))
+    counts = ", ".join(f"{len(q.files)} {q.category.lower()}" for q in queues)
+    msg = f"Processing {len(files_to_process)} files ({counts})..."
+    print(f"{datetime.now()}: {msg}")
+    logger.info(msg)
+    counter = 0
+    for orig_file, internal_file in _iterate_processed_files(queues, input_dir, output_dir, cache):
+        orig_filepath_2_uuid.append((orig_file, internal_file))
+        if journal:
+            files = get_processed_file_names(orig_file, internal_file) if internal_file else None
+            journal.append(orig_file, internal_file, files)
+        counter += 1
+        logger.info(f"Successfully processed file {counter}/{len(files_to_process)}: {orig_file}")
+        if counter % _checkpoint_interval == 0 or counter == len(files_to_process):
+            if cache:
+                cache.save()
+            if journal:
+                journal.sync()
+            print(f"{datetime.now()}: Processed {counter}/{len(files_to_process)} files")
 
-    Returns:
-        - a list of tuples with the original file path and the path to the processed file.
-          (if a file could not be processed, the second path is None)
-        - a list of all paths that could not be processed
-          (this list will only have content if a Docker API error led to a restart of the SIPI container)
-    """
-    batchsize = 1000
-    msg = f"Processing {len(files_to_process)} files, in batches of {batchsize} files each..."
-    print(msg)
-    orig_filepath_2_uuid: list[tuple[Path, Optional[Path]]] = []
-    for batch in batched(files_to_process, batchsize):
-        if unprocessed_paths := _launch_thread_pool(nthreads, input_dir, output_dir, batch, orig_filepath_2_uuid):
-            return orig_filepath_2_uuid, unprocessed_paths
-        print(f"Processed {len(orig_filepath_2_uuid)}/{len(files_to_process)} files")
-    return orig_filepath_2_uuid, []
-
-
-def _launch_thread_pool(
-    nthreads: int | None,
+
+def _iterate_processed_files(
+    queues: list[_CategoryQueue],
     input_dir: Path,
     output_dir: Path,
-    files_to_process: tuple[Path, ...],
-    orig_filepath_2_uuid: list[tuple[Path, Optional[Path]]],
-) -> list[Path]:
-    counter = 0
-    total = len(files_to_process)
-    with ThreadPoolExecutor(max_workers=nthreads) as pool:
-        processing_jobs = [pool.submit(_process_file, f, input_dir, output_dir) for f in files_to_process]
-        for processed in as_completed(processing_jobs):
-            try:
-                orig_file, internal_file = processed.result()
-                orig_filepath_2_uuid.append((orig_file, internal_file))
-                counter += 1
-                msg = f"Successfully processed file {counter}/{total} of this batch: {orig_file}"
-                logger.info(msg)
-            except docker.errors.APIError:
-                print(f"{datetime.now()}: ERROR: A Docker exception occurred. Cancel jobs and restart SIPI...")
-                logger.error("A Docker exception occurred. Cancel jobs and restart SIPI...", exc_info=True)
-                for job in processing_jobs:
-                    job.cancel()
-                _restart_sipi_container(input_dir, output_dir)
-                processed_paths = [x[0] for x in orig_filepath_2_uuid]
-                unprocessed_paths = [x for x in files_to_process if x not in processed_paths]
-                return unprocessed_paths
-    return []
-
-
-def _write_result_to_pkl_file(processed_files: list[tuple[Path, Optional[Path]]]) -> None:
-    """
-    Writes the processing result to a pickle file in the working directory.
+    cache: Optional[ProcessingCache] = None,
+) -> Iterator[tuple[Path, Optional[Path]]]:
+    """
+    Process the files of all queues, every queue in its own thread pool,
+    and yield the files in the order in which they are finished.
+    Only a few files more than the threads of a queue are submitted to its thread pool at the same time,
+    so that the memory stays bounded, no matter how many files there are.
+    If the iteration is stopped (e.g. by an exception), the files that were not started yet are cancelled.
 
     Args:
-        processed_files: the result of the file processing
+        queues: the queues of the file categories
+        input_dir: root directory of the input files
+        output_dir: target location where the created files are written to
+        cache: files processed by earlier runs
 
-    Raises:
-        UserError: if the file could not be written
+    Yields:
+        tuples consisting of the original path and the internal filename (None if there was an error)
     """
-    filename = Path(f"processing_result_{datetime.now().strftime('%Y-%m-%d_%H.%M.%S.%f')}.pkl")
+    pending: dict[Future[tuple[Path, Optional[Path]]], _CategoryQueue] = {}
+
+    def submit(queue: _CategoryQueue) -> None:
+        while queue.files and queue.submitted < 2 * queue.concurrency.max_limit:
+            file = queue.files.popleft()
+            job = queue.executor.submit(process_file_with_limit, queue.concurrency, file, input_dir, output_dir, cache)
+            pending[job] = queue
+            queue.submitted += 1
 
     try:
-        with open(filename, "wb") as pkl_file:
-            pickle.dump(processed_files, pkl_file)
-        print(f"{datetime.now()}: The result was written to: {filename}")
-    except OSError:
-        err_msg = f"An error occurred while writing the result to the pickle file. Content of file: {processed_files}"
-        logger.error(err_msg, exc_info=True)
-        raise UserError(err_msg) from None
+        for queue in queues:
+            submit(queue)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for job in done:
+                queue = pending.pop(job)
+                queue.submitted -= 1
+                yield job.result()
+                submit(queue)
+    finally:
+        for job in pending:
+            job.cancel()
+        for queue in queues:
+            queue.executor.shutdown(wait=True)
+
+
+def process_file_with_limit(
+    concurrency: AdaptiveConcurrency,
+    in_file: Path,
+    input_dir: Path,
+    output_dir: Path,
+    cache: Optional[ProcessingCache] = None,
+) -> tuple[Path, Optional[Path]]:
+    """
+    Process a file (see _process_file), as soon as the concurrency limit allows it.
+    The time needed per MiB is the latency that adapts the limit.
+
+    Args:
+        concurrency: limit of the number of files that are processed at the same time
+        in_file: path to input file that should be processed
+        input_dir: root directory of the input files
+        output_dir: target location where the created files are written to
+        cache: files processed by earlier runs
+
+    Returns:
+        tuple consisting of the original path and the internal filename (None if there was an error)
+    """
+    size_in_mib = in_file.stat().st_size / 2**20 if in_file.is_file() else 1.0
+    with concurrency.slot(weight=size_in_mib):
+        return _process_file(in_file, input_dir, output_dir, cache)
+
 
+def get_processed_file_names(orig_file: Path, processed_file: Path) -> list[str]:
+    """
+    Get the files that were created for an original file, so that the upload doesn't need to search them:
+    derivative, .orig file, sidecar file, and the preview image(s) in case of a video.
+
+    Args:
+        orig_file: the original file
+        processed_file: the derivative, e.g. tmp/0b/22/0b22570d-515f-4c3d-a6af-e42b458e7b2b.jp2
 
-def _check_input_params(
+    Returns:
+        the names of the files, relative to the directory of the derivative
+    """
+    internal_filename = processed_file.stem
+    names = [
+        processed_file.name,
+        _get_orig_file_path(orig_file, internal_filename, Path()).name,
+        f"{internal_filename}.info",
+    ]
+    if (preview_dir := processed_file.parent / internal_filename).is_dir():
+        names.extend(f"{internal_filename}/{x.name}" for x in sorted(preview_dir.iterdir()) if "." in x.name)
+    return names
+
+
+def get_files_processed_earlier(all_files: list[Path], output_dir: Path) -> list[tuple[Path, Optional[Path]]]:
+    """
+    Read the journals of earlier (e.g. interrupted) runs in the current working directory,
+    and get the files that don't need to be processed again,
+    because their processed file still exists in the current output directory.
+    Files that an earlier run processed into another output directory are processed again.
+
+    Args:
+        all_files: list of all paths that should be processed
+        output_dir: the output directory of the current run
+
+    Returns:
+        list of tuples (orig path, processed path) of the files that were processed by earlier runs
+    """
+    result_files = get_result_files(required=False)
+    if not result_files:
+        return []
+    results = get_processing_results(result_files)
+    output_dir = output_dir.resolve()
+    processed_earlier: list[tuple[Path, Optional[Path]]] = []
+    for file in all_files:
+        processed = results.get(file)
+        if processed and processed.is_file() and processed.resolve().is_relative_to(output_dir):
+            processed_earlier.append((file, processed))
+    return processed_earlier
+
+
+def check_input_params(
     input_dir: str,
     out_dir: str,
     xml_file: str,
@@ -167,11 +393,11 @@ def _check_input_params(
     return input_dir_path, out_dir_path, xml_file_path
 
 
-def _get_file_paths_from_xml(xml_file: Path) -> list[Path]:
+def get_file_paths_from_xml(xml_file: Path) -> list[Path]:
     """
     Parse XML file to get all file paths.
     If the same file is referenced several times in the XML,
-    it is only returned once.
+    it is only returned once (at its first occurrence).
 
     Args:
         xml_file: path to the XML file
@@ -183,13 +409,14 @@ def _get_file_paths_from_xml(xml_file: Path) -> list[Path]:
         list of all paths in the <bitstream> tags
     """
     tree: etree._ElementTree[etree._Element] = etree.parse(xml_file)
-    bitstream_paths: set[Path] = set()
+    # a dict instead of a set, so that the order of the XML file is kept
+    bitstream_paths: dict[Path, None] = {}
     errors = []
     for x in tree.iter():
         if x.text and etree.QName(x).localname.endswith("bitstream"):
             path = Path(x.text)
             if path.is_file():
-                bitstream_paths.add(path)
+                bitstream_paths[path] = None
             else:
                 errors.append(f"'{path}' is referenced in the XML file, but it doesn't exist.")
     if errors:
@@ -199,59 +426,37 @@ def _get_file_paths_from_xml(xml_file: Path) -> list[Path]:
     return list(bitstream_paths)
 
 
-def _restart_sipi_container(
+def start_sipi_workers(
     input_dir: Path,
     output_dir: Path,
+    sipi_containers: Optional[int],
+    nthreads: int,
 ) -> None:
     """
-    Stop a possibly existing SIPI container,
-    then create and start a new one.
+    Start a pool of SIPI containers,
+    after removing the containers that are possibly left over from an earlier run.
 
     Args:
-        input_dir: the root directory of the images that should be processed, is mounted into the container
-        output_dir: the output directory where the processed files should be written to, is mounted into the container
-    """
-    _stop_and_remove_sipi_container()
-    global sipi_container
-    docker_client = docker.from_env()
-    sipi_container = docker_client.containers.run(
-        image="daschswiss/sipi:3.8.6",
-        name="sipi",
-        volumes=[
-            f"{input_dir.absolute()}:/sipi/processing-input",
-            f"{output_dir.absolute()}:/sipi/processing-output",
-        ],
-        entrypoint=["tail", "-f", "/dev/null"],
-        detach=True,
-    )
-    print(f"{datetime.now()}: Created and started Sipi container.")
-    logger.info("Created and started Sipi container.")
+        input_dir: the root directory of the images that should be processed, is mounted into the containers
+        output_dir: the output directory where the processed files should be written to, is mounted into the containers
+        sipi_containers: number of SIPI containers (by default, one per 4 CPUs, at most 8)
+        nthreads: number of threads to use for processing
+    """
+    cpu_count = os.cpu_count() or 1
+    num_containers = min(sipi_containers or max(1, min(8, cpu_count // 4)), nthreads)
+    global sipi_pool
+    sipi_pool = SipiWorkerPool(input_dir, output_dir, num_containers=num_containers, nthreads=nthreads)
+    sipi_pool.start()
 
 
-def _stop_and_remove_sipi_container() -> None:
+def stop_sipi_workers() -> None:
     """
-    Stop and remove the SIPI container.
+    Stop and remove the SIPI containers.
     """
-    global sipi_container
-    if not sipi_container:
-        # the Sipi container is not stored in the global variable, but perhaps it exists
-        docker_client = docker.from_env()
-        try:
-            sipi_container = docker_client.containers.get("sipi")
-        except docker.errors.NotFound:
-            # printing is not necessary, the user doesn't need to know that there is no Sipi container
-            logger.warning("There is no Sipi container that could be removed.")
-            return
-
-    # at this point, a Sipi container exists and is stored in the global variable
-    try:
-        sipi_container.stop()
-        sipi_container.remove()
-        print(f"{datetime.now()}: Stopped and removed Sipi container.")
-        logger.info("Stopped and removed Sipi container.")
-    except docker.errors.APIError:
-        print(f"{datetime.now()}: WARNING: It was not possible to stop and remove the Sipi container.")
-        logger.warning("It was not possible to stop and remove the Sipi container.")
+    global sipi_pool
+    if sipi_pool:
+        sipi_pool.stop()
+        sipi_pool = None
 
 
 def _compute_sha256(file: Path) -> Optional[str]:
@@ -268,11 +473,7 @@ def _compute_sha256(file: Path) -> Optional[str]:
         print(f"{datetime.now()}: ERROR: Couldn't calculate checksum for {file}, because such a file doesn't exist.")
         logger.error(f"Couldn't calculate checksum for {file}, because such a file doesn't exist.")
         return None
-    hash_sha256 = hashlib.sha256()
-    with open(file, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
-    return hash_sha256.hexdigest()
+    return compute_sha256(file)
 
 
 def _convert_file_with_sipi(
@@ -282,7 +483,7 @@ def _convert_file_with_sipi(
     output_dir: Path,
 ) -> bool:
     """
-    Converts a file by calling a locally running Sipi container.
+    Converts a file in the next free container of the pool of locally running Sipi containers.
 
     Args:
         in_file_local_path: path to input file
@@ -299,44 +500,54 @@ def _convert_file_with_sipi(
     in_file_sipi_path = Path("processing-input") / in_file_local_path.relative_to(input_dir)
     out_file_sipi_path = Path("processing-output") / out_file_local_path.relative_to(original_output_dir)
 
-    if not sipi_container:
+    if not sipi_pool:
         print(f"{datetime.now()}: ERROR: Cannot convert file {in_file_local_path} with Sipi: Sipi container not found.")
         logger.error(f"Cannot convert file {in_file_local_path} with Sipi: Sipi container not found.")
         return False
-    result = sipi_container.exec_run(f"/sipi/sipi '{in_file_sipi_path}' {out_file_sipi_path}")
-    if result.exit_code != 0:
-        logger.error(f"Sipi conversion of {in_file_local_path} failed: {result}")
-        return False
-    return True
+    return sipi_pool.convert(in_file_sipi_path, out_file_sipi_path)
+
+
+def _get_orig_file_path(
+    in_file: Path,
+    internal_file_name: str,
+    out_dir: Path,
+) -> Path:
+    orig_ext = PurePath(in_file).suffix
+    return Path(out_dir, f"{internal_file_name}{orig_ext}.orig")
 
 
 def _create_orig_file(
     in_file: Path,
     internal_file_name: str,
     out_dir: Path,
-) -> bool:
+    checksum: Optional[str] = None,
+) -> Optional[str]:
     """
-    Creates the .orig file expected by the API.
+    Creates the .orig file expected by the API,
+    and computes the checksum of the original file while copying it (unless it is already known).
 
     Args:
         in_file: the input file from which the .orig should be created
         internal_file_name: the internal filename which should be used for the .orig file
         out_dir: the directory where the .orig file should be written to,
             e.g. tmp/in/te/ if the internal filename is "internal_file_name"
+        checksum: checksum of the input file, if it is already known
 
     Returns:
-        success status
+        the checksum of the original file, or None if the .orig file couldn't be created
     """
-    orig_ext = PurePath(in_file).suffix
-    orig_file_full_path = Path(out_dir, f"{internal_file_name}{orig_ext}.orig")
+    orig_file_full_path = _get_orig_file_path(in_file, internal_file_name, out_dir)
     try:
-        shutil.copyfile(in_file, orig_file_full_path)
+        if checksum:
+            copy_file(in_file, orig_file_full_path)
+        else:
+            checksum = copy_with_checksum(in_file, orig_file_full_path)
         logger.info(f"Created .orig file {orig_file_full_path}")
-        return True
+        return checksum
     except Exception:
         print(f"{datetime.now()}: ERROR: Couldn't create .orig file {orig_file_full_path}")
         logger.error(f"Couldn't create .orig file {orig_file_full_path}", exc_info=True)
-        return False
+        return None
 
 
 def _get_video_metadata_with_ffprobe(file_path: Path) -> Optional[dict[str, Any]]:
@@ -388,6 +599,8 @@ def _create_sidecar_file(
     orig_file: Path,
     converted_file: Path,
     file_category: str,
+    checksum_original: Optional[str] = None,
+    checksum_derivative: Optional[str] = None,
 ) -> bool:
     """
     Creates the sidecar file for a given file. Depending on the file category, it adds category specific metadata.
@@ -396,6 +609,8 @@ def _create_sidecar_file(
         orig_file: path to the original file
         converted_file: path to the converted file, e.g. out_dir/in/te/internal_filename.ext
         file_category: the file category, either IMAGE, VIDEO or OTHER
+        checksum_original: checksum of the original file, if it is already known
+        checksum_derivative: checksum of the converted file, if it is already known
 
     Returns:
         true if successful, false otherwise
@@ -405,11 +620,11 @@ def _create_sidecar_file(
         logger.error(f"Unexpected file category {file_category}")
         return False
 
-    checksum_original = _compute_sha256(orig_file)
+    checksum_original = checksum_original or _compute_sha256(orig_file)
     if not checksum_original:
         return False
 
-    checksum_derivative = _compute_sha256(converted_file)
+    checksum_derivative = checksum_derivative or _compute_sha256(converted_file)
     if not checksum_derivative:
         return False
 
@@ -460,27 +675,12 @@ def _get_file_category_from_extension(file: Path) -> Optional[str]:
     Returns:
         the file category, either IMAGE, VIDEO or OTHER (or None)
     """
-    extensions = {
-        "image": [".jpg", ".jpeg", ".tif", ".tiff", ".jp2", ".png"],
-        "video": [".mp4"],
-        "archive": [".7z", ".gz", ".gzip", ".tar", ".tar.gz", ".tgz", ".z", ".zip"],
-        "text": [".csv", ".txt", ".xml", ".xsd", ".xsl"],
-        "document": [".doc", ".docx", ".pdf", ".ppt", ".pptx", ".xls", ".xlsx"],
-        "audio": [".mp3", ".wav"],
-    }
-    if file.suffix.lower() in extensions["video"]:
-        category = "VIDEO"
-    elif file.suffix.lower() in extensions["image"]:
-        category = "IMAGE"
-    elif file.suffix.lower() in (
-        extensions["archive"] + extensions["text"] + extensions["document"] + extensions["audio"]
-    ):
-        category = "OTHER"
-    else:
-        category = None
-        print(f"{datetime.now()}: ERROR: Couldn't get category for {file}")
-        logger.error(f"Couldn't get category for {file}")
-    return category
+    for category, extensions in file_extensions.items():
+        if file.suffix.lower() in extensions:
+            return category
+    print(f"{datetime.now()}: ERROR: Couldn't get category for {file}")
+    logger.error(f"Couldn't get category for {file}")
+    return None
 
 
 def _extract_preview_from_video(file: Path) -> bool:
@@ -502,6 +702,7 @@ def _process_file(
     in_file: Path,
     input_dir: Path,
     output_dir: Path,
+    cache: Optional[ProcessingCache] = None,
 ) -> tuple[Path, Optional[Path]]:
     """
     Creates all expected derivative files and writes the output into the provided output directory.
@@ -510,11 +711,17 @@ def _process_file(
     In case of video: .orig file, identical derivate file, sidecar file, folder with 1 preview image
     other files: .orig file, identical derivate file, sidecar file
 
+    If a file with the same content was already processed into the output directory,
+    the existing files are linked under a new internal filename instead.
+    The checksum of an unknown or modified file is computed while creating the .orig file,
+    so that the file is read only once.
+
     Args:
         in_file: path to input file that should be processed
         input_dir: root directory of the input files
         output_dir: target location where the created files are written to.
             If the directory doesn't exist, it is created
+        cache: files processed by earlier runs
 
     Returns:
         tuple consisting of the original path and the internal filename.
@@ -526,19 +733,39 @@ def _process_file(
         logger.error(f"'{in_file}' does not exist. Skipping...")
         return in_file, None
 
+    # reuse the result of an earlier run, if this file is known and was processed already
+    checksum = _get_checksum_from_cache(in_file, cache) if cache else None
+    if cache and checksum and (cached_files := cache.get(checksum)):
+        if reused_file := _reuse_processed_file(in_file, *cached_files, output_dir=output_dir):
+            cache.record_reuse()
+            return in_file, reused_file
+
     # get random UUID for internal file handling, and create directory structure
     internal_filename = str(uuid.uuid4())
     out_dir_full = Path(output_dir, internal_filename[:2], internal_filename[2:4])
     out_dir_full.mkdir(parents=True, exist_ok=True)
 
     # create .orig file
-    if not _create_orig_file(
+    checksum_original = _create_orig_file(
         in_file=in_file,
         internal_file_name=internal_filename,
         out_dir=out_dir_full,
-    ):
+        checksum=checksum,
+    )
+    if not checksum_original:
         return in_file, None
 
+    # reuse the result of an earlier run, if the same content was processed already
+    if cache and not checksum:
+        _put_checksum_into_cache(in_file, checksum_original, cache)
+        if (cached_files := cache.get(checksum_original)) and (
+            reused_file := _reuse_processed_file(
+                in_file, *cached_files, output_dir=output_dir, internal_filename=internal_filename
+            )
+        ):
+            cache.record_reuse()
+            return in_file, reused_file
+
     # convert file (create derivative) and create sidecar file based on category (image, video or other)
     file_category = _get_file_category_from_extension(in_file)
     if not file_category:
@@ -549,6 +776,7 @@ def _process_file(
             in_file=in_file,
             internal_filename=internal_filename,
             out_dir=out_dir_full,
+            checksum_original=checksum_original,
         )
     elif file_category == "IMAGE":
         result = _process_image_file(
@@ -556,30 +784,113 @@ def _process_file(
             internal_filename=internal_filename,
             out_dir=out_dir_full,
             input_dir=input_dir,
+            checksum_original=checksum_original,
         )
     elif file_category == "VIDEO":
         result = _process_video_file(
             in_file=in_file,
             internal_filename=internal_filename,
             out_dir=out_dir_full,
+            checksum_original=checksum_original,
         )
     else:
         print(f"{datetime.now()}: ERROR: Unexpected file category for {in_file}: {file_category}")
         logger.error(f"Unexpected file category for {in_file}: {file_category}")
-        return in_file, None
+        result = in_file, None
 
+    if cache and result[1]:
+        cache.put(checksum_original, result[1], _get_orig_file_path(in_file, internal_filename, out_dir_full))
     return result
 
 
+def _get_checksum_from_cache(in_file: Path, cache: ProcessingCache) -> Optional[str]:
+    try:
+        return cache.get_checksum(in_file)
+    except OSError:
+        logger.warning(f"Couldn't look up the checksum of {in_file}", exc_info=True)
+        return None
+
+
+def _put_checksum_into_cache(in_file: Path, checksum: str, cache: ProcessingCache) -> None:
+    try:
+        cache.put_checksum(in_file, checksum)
+    except OSError:
+        logger.warning(f"Couldn't remember the checksum of {in_file}", exc_info=True)
+
+
+def _reuse_processed_file(
+    in_file: Path,
+    derivative: Path,
+    orig: Path,
+    output_dir: Path,
+    internal_filename: Optional[str] = None,
+) -> Optional[Path]:
+    """
+    Link the files that were processed from a file with the same content under a new internal filename,
+    and write a sidecar file with the new filenames.
+    Every file needs its own internal filename, because it is uploaded as a separate file value.
+
+    Args:
+        in_file: the input file
+        derivative: the derivative of the file with the same content
+        orig: the .orig file of the file with the same content
+        output_dir: the output directory
+        internal_filename: the internal filename under which the .orig file was already created (if any)
+
+    Returns:
+        the new derivative, or None if the files could not be linked
+    """
+    old_filename = derivative.stem
+    orig_exists = internal_filename is not None
+    internal_filename = internal_filename or str(uuid.uuid4())
+    out_dir_full = Path(output_dir, internal_filename[:2], internal_filename[2:4])
+    new_derivative = out_dir_full / f"{internal_filename}{derivative.suffix}"
+    new_orig = _get_orig_file_path(in_file, internal_filename, out_dir_full)
+    try:
+        out_dir_full.mkdir(parents=True, exist_ok=True)
+        link_or_copy(derivative, new_derivative)
+        if not orig_exists:
+            link_or_copy(orig, new_orig)
+        sidecar = json.loads((derivative.parent / f"{old_filename}.info").read_text(encoding="utf-8"))
+        sidecar["originalFilename"] = in_file.name
+        sidecar["internalFilename"] = new_derivative.name
+        sidecar["originalInternalFilename"] = new_orig.name
+        (out_dir_full / f"{internal_filename}.info").write_text(json.dumps(sidecar, indent=4), encoding="utf-8")
+        # the preview image of a video
+        if (preview_dir := derivative.parent / old_filename).is_dir():
+            (new_preview_dir := out_dir_full / internal_filename).mkdir(exist_ok=True)
+            for preview in preview_dir.iterdir():
+                link_or_copy(preview, new_preview_dir / preview.name.replace(old_filename, internal_filename))
+    except (OSError, ValueError, KeyError):
+        logger.warning(f"Couldn't reuse the processed file {derivative} for {in_file}", exc_info=True)
+        if orig_exists:
+            # the file will be processed under this internal filename, which must not write into the links
+            _remove_linked_files(new_derivative, out_dir_full / internal_filename)
+        return None
+    logger.info(f"Reused the processed file {derivative} for {in_file}")
+    return new_derivative
+
+
+def _remove_linked_files(derivative: Path, preview_dir: Path) -> None:
+    try:
+        derivative.unlink(missing_ok=True)
+        if preview_dir.is_dir():
+            for preview in preview_dir.iterdir():
+                preview.unlink()
+    except OSError:
+        logger.warning(f"Couldn't remove the linked files of {derivative}", exc_info=True)
+
+
 def _process_other_file(
     in_file: Path,
     internal_filename: str,
     out_dir: Path,
+    checksum_original: str,
 ) -> tuple[Path, Optional[Path]]:
     """
     Processes a file of file category OTHER.
     There is no real derivate created,
-    but the original file is copied,
+    but the .orig file is linked or copied,
     and a sidecar file is created.
 
     Args:
@@ -587,6 +898,7 @@ def _process_other_file(
         internal_filename: the internal filename that should be used for the output file
         out_dir: the output directory where the processed file should be written to,
             e.g. tmp/in/te/ if the internal filename is "internal_file_name"
+        checksum_original: checksum of the original file (which is also the checksum of the derivate)
 
     Returns:
         a tuple of the original file path and the path to the processed file.
@@ -594,7 +906,7 @@ def _process_other_file(
     """
     converted_file_full_path = out_dir / Path(internal_filename).with_suffix(in_file.suffix)
     try:
-        shutil.copyfile(in_file, converted_file_full_path)
+        link_or_copy(_get_orig_file_path(in_file, internal_filename, out_dir), converted_file_full_path)
     except Exception:
         print(f"{datetime.now()}: ERROR: Couldn't process file of category OTHER: {in_file}")
         logger.error(f"Couldn't process file of category OTHER: {in_file}", exc_info=True)
@@ -603,6 +915,8 @@ def _process_other_file(
         orig_file=in_file,
         converted_file=converted_file_full_path,
         file_category="OTHER",
+        checksum_original=checksum_original,
+        checksum_derivative=checksum_original,
     ):
         print(f"{datetime.now()}: ERROR: Couldn't create sidecar file for: {in_file}")
         logger.error(f"Couldn't create sidecar file for: {in_file}")
@@ -615,6 +929,7 @@ def _process_image_file(
     internal_filename: str,
     out_dir: Path,
     input_dir: Path,
+    checksum_original: str,
 ) -> tuple[Path, Optional[Path]]:
     """
     Processes a file of file category IMAGE
@@ -625,6 +940,7 @@ def _process_image_file(
         out_dir: the output directory where the processed file should be written to,
             e.g. tmp/in/te/ if the internal filename is "internal_file_name"
         input_dir: root directory of the input files
+        checksum_original: checksum of the original file
 
     Returns:
         a tuple of the original file path and the path to the processed file.
@@ -651,6 +967,7 @@ def _process_image_file(
         orig_file=in_file,
         converted_file=converted_file_full_path,
         file_category="IMAGE",
+        checksum_original=checksum_original,
     ):
         print(f"{datetime.now()}: ERROR: Couldn't create sidecar file for: {in_file}")
         logger.error(f"Couldn't create sidecar file for: {in_file}")
@@ -662,6 +979,7 @@ def _process_video_file(
     in_file: Path,
     internal_filename: str,
     out_dir: Path,
+    checksum_original: str,
 ) -> tuple[Path, Optional[Path]]:
     """
     Processes a file of file category VIDEO
@@ -671,6 +989,7 @@ def _process_video_file(
         internal_filename: the internal filename that should be used for the output file
         out_dir: the output directory where the processed file should be written to,
             e.g. tmp/in/te/ if the internal filename is "internal_file_name"
+        checksum_original: checksum of the original file (which is also the checksum of the derivate)
 
     Returns:
         a tuple of the original file path and the path to the processed file.
@@ -679,7 +998,7 @@ def _process_video_file(
     converted_file_full_path = out_dir / Path(internal_filename).with_suffix(in_file.suffix)
     # create derivate file (identical to original file)
     try:
-        shutil.copyfile(in_file, converted_file_full_path)
+        link_or_copy(_get_orig_file_path(in_file, internal_filename, out_dir), converted_file_full_path)
     except Exception:
         print(f"{datetime.now()}: ERROR: Couldn't create derivate file for video '{in_file}'")
         logger.error(f"Couldn't create derivate file for video '{in_file}'", exc_info=True)
@@ -697,6 +1016,8 @@ def _process_video_file(
         orig_file=in_file,
         converted_file=converted_file_full_path,
         file_category="VIDEO",
+        checksum_original=checksum_original,
+        checksum_derivative=checksum_original,
     ):
         print(f"{datetime.now()}: ERROR: Couldn't create sidecar file for video '{in_file}'")
         logger.error(f"Couldn't create sidecar file for video '{in_file}'")
@@ -722,12 +1043,12 @@ def _write_processed_and_unprocessed_files_to_txt_files(
     """
     success = True
     processed_original_paths = [x[0] for x in processed_files]
-    with open("processed_files.txt", "x", encoding="utf-8") as f:
+    with open("processed_files.txt", "w", encoding="utf-8") as f:
         f.write("\n".join([str(x) for x in processed_original_paths]))
     msg = "Wrote 'processed_files.txt'"
 
     if unprocessed_original_paths := [x for x in all_files if x not in processed_original_paths]:
-        with open("unprocessed_files.txt", "x", encoding="utf-8") as f:
+        with open("unprocessed_files.txt", "w", encoding="utf-8") as f:
             f.write("\n".join([str(x) for x in unprocessed_original_paths]))
         msg += " and 'unprocessed_files.txt'"
         success = False
@@ -744,16 +1065,16 @@ def handle_interruption(
 ) -> None:
     """
     Handles an interruption of the processing.
-    Writes the pickle file,
-    and the txt files with the processed and unprocessed files,
+    Writes the txt files with the processed and unprocessed files,
     and exits the program with exit code 1.
+    (The processed files are already in the journal, so that the next run can continue where this one stopped.)
 
     Args:
         all_files: list of all paths that should be processed
         processed_files: list of tuples (orig path, processed path). 2nd path is None if a file could not be processed.
         exception: the exception that was raised
     """
-    msg = "ERROR while processing the files. Writing pickle file and human-readable txt files..."
+    msg = "ERROR while processing the files. Writing human-readable txt files..."
     print(f"{datetime.now()}: {msg}")
     logger.error(msg, exc_info=exception)
 
@@ -761,7 +1082,6 @@ def handle_interruption(
         all_files=all_files,
         processed_files=processed_files,
     )
-    _write_result_to_pkl_file(processed_files)
 
     sys.exit(1)
 
@@ -805,73 +1125,103 @@ def process_files(
     output_dir: str,
     xml_file: str,
     nthreads: Optional[int],
+    sipi_containers: Optional[int] = None,
+    max_threads: Optional[int] = None,
 ) -> bool:
     """
     Process the files referenced in the given XML file.
     Writes the processed files
     (derivative, .orig file, sidecar file, as well as the preview file for movies)
     to the given output directory.
-    Additionally, writes a pickle file containing the mapping between the original files and the processed files,
-    e.g. Path('multimedia/nested/subfolder/test.tif'), Path('tmp/0b/22/0b22570d-515f-4c3d-a6af-e42b458e7b2b.jp2').
+    Additionally, appends the mapping between the original files and the processed files to a journal,
+    e.g. multimedia/nested/subfolder/test.tif -> tmp/0b/22/0b22570d-515f-4c3d-a6af-e42b458e7b2b.jp2.
+    Files that are in the journal of an earlier run are not processed again.
 
     Args:
         input_dir: path to the directory where the files should be read from
         output_dir: path to the directory where the transformed / created files should be written to
         xml_file: path to xml file containing the resources
-        nthreads: number of threads to use for processing
+        nthreads: number of threads to use for processing (by default, the number of CPUs + 4, at most 32),
+            or the initial number of threads if max_threads is given
+        sipi_containers: number of SIPI containers that convert the images (by default, one per 4 CPUs, at most 8)
+        max_threads: if given, the number of threads is adapted to the load of the machine, up to this number
 
     Returns:
         True if all multimedia files in the XML file were processed, False otherwise
     """
-    input_dir_path, output_dir_path, xml_file_path = _check_input_params(
+    input_dir_path, output_dir_path, xml_file_path = check_input_params(
         input_dir=input_dir,
         out_dir=output_dir,
         xml_file=xml_file,
     )
-    all_files = _get_file_paths_from_xml(xml_file_path)
-    _restart_sipi_container(
+    all_files = get_file_paths_from_xml(xml_file_path)
+    # the same default as the one of the ThreadPoolExecutor
+    nthreads = nthreads or min(32, (os.cpu_count() or 1) + 4)
+    concurrency = AdaptiveConcurrency.create("process-files", nthreads, max_threads)
+    start_sipi_workers(
         input_dir=input_dir_path,
         output_dir=output_dir_path,
+        sipi_containers=sipi_containers,
+        nthreads=concurrency.max_limit,
     )
     if any(path.suffix == ".mp4" for path in all_files):
-        _get_export_moving_image_frames_script()
+        get_export_moving_image_frames_script()
 
     start_time = datetime.now()
     print(f"{start_time}: Start local file processing...")
     logger.info("Start local file processing...")
 
-    processed_files: list[tuple[Path, Optional[Path]]] = []
-    unprocessed_files = all_files
-    while unprocessed_files:
-        try:
-            result, unprocessed_files = _process_files_in_parallel(
-                files_to_process=unprocessed_files,
-                input_dir=input_dir_path,
-                output_dir=output_dir_path,
-                nthreads=nthreads,
-            )
-            processed_files.extend(result)
-        except BaseException as exc:  # noqa: BLE001 (blind-except)
-            handle_interruption(
-                all_files=all_files,
-                processed_files=processed_files,
-                exception=exc,
-            )
+    processed_files = get_files_processed_earlier(all_files, output_dir_path)
+    if processed_files:
+        msg = f"{len(processed_files)} files had been processed by an earlier run already, and are skipped"
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+    processed_earlier = {orig for orig, _ in processed_files}
+    files_to_process = [x for x in all_files if x not in processed_earlier]
+
+    cache = ProcessingCache.load(output_dir_path)
+    journal = ProcessingJournal.create()
+    try:
+        _process_files_in_parallel(
+            files_to_process=files_to_process,
+            input_dir=input_dir_path,
+            output_dir=output_dir_path,
+            concurrency=concurrency,
+            orig_filepath_2_uuid=processed_files,
+            cache=cache,
+            journal=journal,
+        )
+    except BaseException as exc:  # noqa: BLE001 (blind-except)
+        cache.save()
+        journal.close()
+        handle_interruption(
+            all_files=all_files,
+            processed_files=processed_files,
+            exception=exc,
+        )
+    cache.save()
+    journal.close()
 
     end_time = datetime.now()
     print(f"{end_time}: Processing files took: {end_time - start_time}")
     logger.info(f"Processing files took: {end_time - start_time}")
+    concurrency.log_summary()
+    if cache.reused:
+        msg = f"{cache.reused} files had been processed by an earlier run already, and were reused"
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
 
     success = _write_processed_and_unprocessed_files_to_txt_files(
         all_files=all_files,
         processed_files=processed_files,
     )
-    _write_result_to_pkl_file(processed_files)
 
     if success:
-        # if there were problems, don't remove the sipi container. it might contain valuable log data.
-        _stop_and_remove_sipi_container()
+        # if there were problems, don't remove the sipi containers. they might contain valuable log data.
+        stop_sipi_workers()
         return True
     else:
-        print("Something went wrong. The SIPI container is still available to be analyzed. Don't forget to remove it.")
+        print(
+            "Something went wrong. The SIPI containers are still available to be analyzed. Don't forget to remove them."
+        )
         return False
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ProcessingCache:
+    """
+    Remembers the files that have been processed into an output directory,
+    keyed by the SHA-256 checksum of the original file,
+    so that a file with the same content doesn't need to be processed again by a later run.
+    It is stored as JSON file in the output directory.
+    Additionally, the checksums are stored together with the size and modification time of the input files,
+    so that unchanged input files don't need to be read for the lookup.
+
+    Attributes:
+        filepath: file in which the cache is stored
+        entries: checksum of the original file -> paths of the derivative and the .orig file
+        checksums: path of an input file -> size, modification time and checksum
+        reused: number of files in this run that didn't need to be processed
+    """
+
+    filepath: Path
+    entries: dict[str, dict[str, str]] = field(default_factory=dict)
+    checksums: dict[str, list[Any]] = field(default_factory=dict)
+    reused: int = 0
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    @staticmethod
+    def load(output_dir: Path) -> ProcessingCache:
+        """
+        Load the cache of an output directory.
+
+        Args:
+            output_dir: the output directory of process-files
+
+        Returns:
+            the cache (empty if there is none yet, or if it is unreadable)
+        """
+        filepath = output_dir / "processing_cache.json"
+        try:
+            content = json.loads(filepath.read_text(encoding="utf-8"))
+            return ProcessingCache(filepath, content["entries"], content["checksums"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return ProcessingCache(filepath)
+
+    def get_checksum(self, in_file: Path) -> Optional[str]:
+        """
+        Get the checksum of an input file without reading it,
+        if it was recorded for the same size and modification time.
+
+        Args:
+            in_file: the input file
+
+        Raises:
+            OSError: if the file could not be accessed
+
+        Returns:
+            the checksum, or None if the file is unknown or was modified
+        """
+        stat = in_file.stat()
+        with self._lock:
+            known = self.checksums.get(str(in_file.absolute()))
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return str(known[2])
+        return None
+
+    def put_checksum(self, in_file: Path, checksum: str) -> None:
+        """
+        Remember the checksum of an input file, together with its current size and modification time.
+
+        Args:
+            in_file: the input file
+            checksum: the checksum that was computed while copying the file
+
+        Raises:
+            OSError: if the file could not be accessed
+        """
+        stat = in_file.stat()
+        with self._lock:
+            self.checksums[str(in_file.absolute())] = [stat.st_size, stat.st_mtime_ns, checksum]
+
+    def get(self, checksum: str) -> Optional[tuple[Path, Path]]:
+        """
+        Get the files that were created from an original file with the given checksum.
+
+        Args:
+            checksum: checksum of the original file
+
+        Returns:
+            the derivative and the .orig file, or None if they don't exist (anymore)
+        """
+        with self._lock:
+            entry = self.entries.get(checksum)
+        if not entry:
+            return None
+        derivative = self.filepath.parent / entry["derivative"]
+        orig = self.filepath.parent / entry["orig"]
+        if not derivative.is_file() or not orig.is_file():
+            with self._lock:
+                self.entries.pop(checksum, None)
+            return None
+        return derivative, orig
+
+    def put(self, checksum: str, derivative: Path, orig: Path) -> None:
+        """
+        Remember the files that were created from an original file.
+
+        Args:
+            checksum: checksum of the original file
+            derivative: the derivative in the output directory
+            orig: the .orig file in the output directory
+        """
+        output_dir = self.filepath.parent
+        entry = {"derivative": str(derivative.relative_to(output_dir)), "orig": str(orig.relative_to(output_dir))}
+        with self._lock:
+            self.entries[checksum] = entry
+
+    def record_reuse(self) -> None:
+        """Count a file that didn't need to be processed, because an earlier run processed it already."""
+        with self._lock:
+            self.reused += 1
+
+    def save(self) -> None:
+        """Write the cache to disk (atomically, so that an interruption doesn't corrupt it)."""
+        with self._lock:
+            content = json.dumps({"entries": self.entries, "checksums": self.checksums})
+        try:
+            fd, tmp_name = tempfile.mkstemp(dir=self.filepath.parent, prefix=".processing_cache-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_name, self.filepath)
+        except OSError:
+            logger.warning(f"The processing cache could not be written to {self.filepath}", exc_info=True)
@@ -0,0 +1,174 @@
+"""
+This module writes and reads the result of process-files:
+a journal in the current working directory that maps the original files to the processed files.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import pickle
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from dsp_tools.models.exceptions import UserError
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ProcessingJournal:
+    """
+    Append-only journal of a run of process-files, in the JSON Lines format.
+    Every processed file is appended as soon as it is finished,
+    so that the progress is not lost if the run crashes.
+
+    Attributes:
+        filepath: path of the journal (processing_result_[timestamp].jsonl)
+        file: the opened journal
+    """
+
+    filepath: Path
+    file: TextIO
+
+    @staticmethod
+    def create() -> ProcessingJournal:
+        """
+        Create a new journal in the current working directory.
+
+        Raises:
+            UserError: if the journal could not be created
+
+        Returns:
+            the journal, opened for appending
+        """
+        filepath = Path(f"processing_result_{datetime.now().strftime('%Y-%m-%d_%H.%M.%S.%f')}.jsonl")
+        try:
+            file = open(filepath, "a", encoding="utf-8")
+        except OSError:
+            logger.error(f"Could not create the journal {filepath}", exc_info=True)
+            raise UserError(f"Could not create the journal {filepath}") from None
+        print(f"{datetime.now()}: The result is written to: {filepath}")
+        logger.info(f"The result is written to: {filepath}")
+        return ProcessingJournal(filepath, file)
+
+    def append(self, orig_file: Path, processed_file: Optional[Path], files: Optional[list[str]] = None) -> None:
+        """
+        Append a file to the journal, and hand it over to the operating system right away.
+
+        Args:
+            orig_file: the original file
+            processed_file: the processed file (None if the file could not be processed)
+            files: all files that must be uploaded for the original file (derivative, .orig, sidecar, preview),
+                relative to the directory of the processed file
+        """
+        entry: dict[str, Any] = {
+            "original": str(orig_file),
+            "processed": str(processed_file) if processed_file else None,
+        }
+        if files:
+            entry["files"] = files
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def sync(self) -> None:
+        """Write the journal to the disk, so that it survives a power failure."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        """Write the journal to the disk and close it."""
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def get_result_files(required: bool = True) -> list[Path]:
+    """
+    Get the results of process-files in the current working directory, from the oldest to the newest:
+    the journals "processing_result_*.jsonl", and the pickle files "processing_result_*.pkl" of older versions.
+
+    Args:
+        required: if True, it is an error if there is no result
+
+    Raises:
+        UserError: if there is no result, but a result is required
+
+    Returns:
+        the result files
+    """
+    result_files = sorted(glob.glob("processing_result_*.jsonl") + glob.glob("processing_result_*.pkl"))
+    if not result_files and required:
+        raise UserError("No processing result found. Please run the processing step first.")
+    return [Path(x) for x in result_files]
+
+
+def read_result_files(result_files: list[Path]) -> Iterator[tuple[Path, Optional[Path]]]:
+    """
+    Read the results of process-files one by one.
+    A truncated last line of a journal (if a run crashed while writing it) is skipped.
+
+    Args:
+        result_files: the result files, from the oldest to the newest
+
+    Yields:
+        tuples of the original file and the processed file (None if the file could not be processed)
+    """
+    for result_file in result_files:
+        if result_file.suffix == ".pkl":
+            yield from pickle.loads(result_file.read_bytes())  # noqa: S301 (deserialize untrusted data)
+            continue
+        for entry in _read_journal(result_file):
+            processed = entry["processed"]
+            yield Path(entry["original"]), Path(processed) if processed else None
+
+
+def _read_journal(journal_file: Path) -> Iterator[dict[str, Any]]:
+    with open(journal_file, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping an incomplete line of {journal_file}: {line!r}")
+
+
+def get_processing_results(result_files: list[Path]) -> dict[Path, Optional[Path]]:
+    """
+    Get the latest result of every original file,
+    so that a file that could not be processed by one run, but by a later one, counts as processed.
+
+    Args:
+        result_files: the result files, from the oldest to the newest
+
+    Returns:
+        mapping of the original files to the processed files (None if a file could not be processed)
+    """
+    return dict(read_result_files(result_files))
+
+
+def get_upload_manifest(result_files: list[Path]) -> dict[Path, list[Path]]:
+    """
+    Get the files that must be uploaded for every processed file,
+    as they were recorded by process-files.
+    Results of older versions don't contain this information, so their processed files are missing.
+
+    Args:
+        result_files: the result files, from the oldest to the newest
+
+    Returns:
+        mapping of the processed files to the paths of their derivative, .orig file, sidecar file and preview
+    """
+    manifest: dict[Path, list[Path]] = {}
+    for result_file in result_files:
+        if result_file.suffix == ".pkl":
+            continue
+        for entry in _read_journal(result_file):
+            if entry["processed"] and entry.get("files"):
+                processed = Path(entry["processed"])
+                manifest[processed] = [processed.parent / x for x in entry["files"]]
+    return manifest
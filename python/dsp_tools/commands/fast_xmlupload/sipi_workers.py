@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import docker
+from docker.models.containers import Container
+
+from dsp_tools.models.exceptions import UserError
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+_sipi_image = "daschswiss/sipi:3.8.6"
+
+
+@dataclass
+class SipiWorker:
+    """
+    A long-running SIPI container, in which the conversions are executed.
+
+    Attributes:
+        name: name of the container
+        container: the running container
+        generation: number of times the container has been replaced
+        last_health_check: time of the last successful health check
+        lock: held while the container is checked or replaced
+    """
+
+    name: str
+    container: Optional[Container] = None
+    generation: int = 0
+    last_health_check: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SipiWorkerPool:
+    """
+    A pool of long-running SIPI containers that convert the images of process-files.
+    The conversions are distributed over the containers through a queue of free slots,
+    so that every container executes the same number of conversions at the same time.
+    If a container is unhealthy (it isn't running anymore, or the Docker API fails while talking to it),
+    only this container is replaced, and the conversion is retried in the next free container.
+    """
+
+    def __init__(
+        self,
+        input_dir: Path,
+        output_dir: Path,
+        num_containers: int,
+        nthreads: int,
+        docker_client: Any = None,
+        health_check_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Prepare the pool, without starting the containers.
+
+        Args:
+            input_dir: the root directory of the images that should be processed, is mounted into the containers
+            output_dir: the directory where the processed files are written to, is mounted into the containers
+            num_containers: number of SIPI containers
+            nthreads: number of conversions that are executed at the same time (over all containers)
+            docker_client: client of the Docker API (by default, it is created from the environment)
+            health_check_interval: number of seconds after which a container is checked again before it is used
+            clock: source of the time (can be replaced in tests)
+        """
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.docker_client = docker_client or docker.from_env()
+        self.health_check_interval = health_check_interval
+        self.clock = clock
+        self.max_attempts = num_containers + 1
+        self.workers = [SipiWorker(f"sipi-processing-{i}") for i in range(num_containers)]
+        self._free_slots: queue.Queue[SipiWorker] = queue.Queue()
+        for _ in range(math.ceil(nthreads / num_containers)):
+            for worker in self.workers:
+                self._free_slots.put(worker)
+
+    def start(self) -> None:
+        """Start the containers (a container with the same name that is left over from an earlier run is removed)."""
+        for worker in self.workers:
+            self._remove_container(worker.name)
+            self._start_container(worker)
+        msg = f"Created and started {len(self.workers)} Sipi container(s)."
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+
+    def stop(self) -> None:
+        """Stop and remove the containers."""
+        for worker in self.workers:
+            self._remove_container(worker.name)
+            worker.container = None
+        msg = "Stopped and removed the Sipi container(s)."
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+
+    def convert(self, in_file_sipi_path: Path, out_file_sipi_path: Path) -> bool:
+        """
+        Convert a file in the next free container.
+
+        Args:
+            in_file_sipi_path: path of the input file inside the container
+            out_file_sipi_path: path of the output file inside the container
+
+        Raises:
+            UserError: if no container could execute the conversion, because the Docker API keeps failing
+
+        Returns:
+            True if SIPI converted the file, False if SIPI failed
+        """
+        for _ in range(self.max_attempts):
+            worker = self._free_slots.get()
+            generation = worker.generation
+            try:
+                container, generation = self._get_healthy_container(worker)
+                result = container.exec_run(f"/sipi/sipi '{in_file_sipi_path}' {out_file_sipi_path}")
+            except docker.errors.APIError:
+                logger.error(
+                    f"The Docker API failed while converting {in_file_sipi_path} in {worker.name}", exc_info=True
+                )
+                self._replace_container(worker, generation)
+                continue
+            finally:
+                self._free_slots.put(worker)
+            if result.exit_code != 0:
+                logger.error(f"Sipi conversion of {in_file_sipi_path} failed: {result}")
+                return False
+            return True
+        raise UserError(f"The Sipi containers were not able to convert {in_file_sipi_path}")
+
+    def _get_healthy_container(self, worker: SipiWorker) -> tuple[Container, int]:
+        with worker.lock:
+            generation = worker.generation
+            container = worker.container
+            if container and self.clock() - worker.last_health_check < self.health_check_interval:
+                return container, generation
+            try:
+                if container:
+                    container.reload()
+                healthy = container is not None and container.status == "running"
+            except docker.errors.APIError:
+                healthy = False
+            if healthy and container:
+                worker.last_health_check = self.clock()
+                return container, generation
+        logger.warning(f"The Sipi container {worker.name} is not running anymore")
+        container = self._replace_container(worker, generation)
+        return container, worker.generation
+
+    def _replace_container(self, worker: SipiWorker, generation: int) -> Container:
+        with worker.lock:
+            # another thread may have replaced the container in the meantime
+            if worker.container and worker.generation != generation:
+                return worker.container
+            print(f"{datetime.now()}: WARNING: Restarting the Sipi container {worker.name}...")
+            logger.warning(f"Restarting the Sipi container {worker.name}...")
+            self._remove_container(worker.name)
+            return self._start_container(worker)
+
+    def _start_container(self, worker: SipiWorker) -> Container:
+        container: Container = self.docker_client.containers.run(
+            image=_sipi_image,
+            name=worker.name,
+            volumes=[
+                f"{self.input_dir.absolute()}:/sipi/processing-input",
+                f"{self.output_dir.absolute()}:/sipi/processing-output",
+            ],
+            entrypoint=["tail", "-f", "/dev/null"],
+            detach=True,
+        )
+        worker.container = container
+        worker.generation += 1
+        worker.last_health_check = self.clock()
+        logger.info(f"Created and started the Sipi container {worker.name}")
+        return container
+
+    def _remove_container(self, name: str) -> None:
+        try:
+            container = self.docker_client.containers.get(name)
+            container.remove(force=True)
+            logger.info(f"Stopped and removed the Sipi container {name}")
+        except docker.errors.NotFound:
+            return
+        except docker.errors.APIError:
+            print(f"{datetime.now()}: WARNING: It was not possible to stop and remove the Sipi container {name}.")
+            logger.warning(f"It was not possible to stop and remove the Sipi container {name}.", exc_info=True)
@@ -1,16 +1,30 @@
-import glob
-import pickle
+from __future__ import annotations
+
+import io
+import os
+import queue
+import random
+import uuid
+from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 from itertools import batched
 from pathlib import Path
 from time import sleep
-from typing import Optional
+from typing import BinaryIO, Optional
 
-import requests
 from regex import regex
-from requests import JSONDecodeError
-
+from requests import JSONDecodeError, RequestException, Response, Session
+from requests.adapters import HTTPAdapter
+
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.processing_journal import (
+    get_processing_results,
+    get_result_files,
+    get_upload_manifest,
+)
+from dsp_tools.commands.fast_xmlupload.upload_ledger import UploadLedger
 from dsp_tools.models.exceptions import UserError
 from dsp_tools.utils.connection import Connection
 from dsp_tools.utils.connection_live import ConnectionLive
@@ -18,6 +32,94 @@ from dsp_tools.utils.create_logger import get_logger
 
 logger = get_logger(__name__)
 
+# a failed upload is retried after 1, 2, 4, ... seconds (at most 60 seconds, with random jitter)
+_max_attempts = 8
+_backoff_base = 1.0
+_backoff_cap = 60.0
+# size of the chunks in which a file is read from the disk while it is sent
+_chunk_size = 1024 * 1024
+
+
+class SessionPool:
+    """
+    Keep-alive sessions for the upload threads (one per thread),
+    so that the connections to SIPI are reused for all files, also across the batches,
+    instead of opening a new TCP/TLS connection for every file.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._sessions: queue.LifoQueue[Session] = queue.LifoQueue()
+        for _ in range(size):
+            session = Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions.put(session)
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """
+        Borrow a session for a request.
+
+        Yields:
+            a session that is not used by another thread
+        """
+        session = self._sessions.get()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
+    def close(self) -> None:
+        """Close the connections of all sessions."""
+        while not self._sessions.empty():
+            self._sessions.get().close()
+
+
+class _MultipartBody:
+    """
+    A multipart/form-data request body with a single file,
+    which is read from the disk while it is sent,
+    instead of being loaded into the memory as a whole (which is what requests does with the "files" parameter).
+    """
+
+    def __init__(self, file: BinaryIO, filename: str, size: int) -> None:
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n\r\n'
+        tail = f"\r\n--{boundary}--\r\n"
+        self._parts: list[BinaryIO] = [io.BytesIO(head.encode("utf-8")), file, io.BytesIO(tail.encode("utf-8"))]
+        self._length = len(head.encode("utf-8")) + size + len(tail.encode("utf-8"))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while chunk := self.read(_chunk_size):
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read the next bytes of the body.
+
+        Args:
+            size: maximum number of bytes (all remaining bytes if negative)
+
+        Returns:
+            the bytes (empty at the end of the body)
+        """
+        chunks: list[bytes] = []
+        remaining = size
+        while self._parts and remaining != 0:
+            chunk = self._parts[0].read(remaining)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if remaining > 0:
+                remaining -= len(chunk)
+        return b"".join(chunks)
+
 
 def _check_processed_dir(dir_with_processed_files: str) -> Path:
     """
@@ -38,38 +140,18 @@ def _check_processed_dir(dir_with_processed_files: str) -> Path:
     return dir_with_processed_files_path
 
 
-def get_pkl_files() -> list[Path]:
-    """
-    Get all pickle files starting with "processing_result_" in the current working directory.
-
-    Raises:
-        UserError: If no pickle file was found
-
-    Returns:
-        list of pickle files
+def _get_paths_from_result_files(result_files: list[Path]) -> list[Path]:
     """
-    if pkl_file_paths := [Path(x) for x in glob.glob("processing_result_*.pkl")]:
-        return pkl_file_paths
-    else:
-        raise UserError("No pickle file found. Please run the processing step first.")
-
-
-def _get_paths_from_pkl_files(pkl_files: list[Path]) -> list[Path]:
-    """
-    Read the pickle file(s) returned by the processing step.
+    Read the journal(s) (or the pickle file(s) of older versions) written by the processing step.
 
     Args:
-        pkl_files: pickle file(s) returned by the processing step
+        result_files: result file(s) written by the processing step
 
     Returns:
         list of file paths of the processed files (uuid filenames)
     """
-    orig_paths_2_processed_paths: list[tuple[Path, Optional[Path]]] = []
-    for pkl_file in pkl_files:
-        orig_paths_2_processed_paths.extend(pickle.loads(pkl_file.read_bytes()))  # noqa: S301 (deserialize untrusted data)
-
     processed_paths: list[Path] = []
-    for orig_path, processed_path in orig_paths_2_processed_paths:
+    for orig_path, processed_path in get_processing_results(result_files).items():
         if processed_path:
             processed_paths.append(processed_path)
         else:
@@ -81,10 +163,11 @@ def _get_paths_from_pkl_files(pkl_files: list[Path]) -> list[Path]:
 
 def _get_upload_candidates(
     dir_with_processed_files: Path,
-    internal_filename_of_processed_file: Path,
-) -> list[Path]:
+    result_files: list[Path],
+    internal_filenames_of_processed_files: list[Path],
+) -> dict[Path, list[Path]]:
     """
-    Based on the base derivate file, get all files based on the same uuid.
+    For every base derivate file, get all files based on the same uuid.
     For example, if the base derivate file is tmp/1f/fb/1ffbbb30-77e8-414c-94ff-7e1c060f9146.jp2,
     the upload candidates are:
     - derivate: tmp/1f/fb/1ffbbb30-77e8-414c-94ff-7e1c060f9146.jp2
@@ -94,22 +177,59 @@ def _get_upload_candidates(
     In case of video files, there is a preview file in addition to the above files:
      - tmp/1f/fb/1ffbbb30-77e8-414c-94ff-7e1c060f9146/1ffbbb30-77e8-414c-94ff-7e1c060f9146_m_0.jpg
 
+    The files are taken from the manifest that the processing step wrote into its journal.
+    Only for files that are not in the manifest (i.e. processed by an older version),
+    the directory with the processed files is indexed once.
+
     Args:
         dir_with_processed_files: path to the directory where the processed files are located
-        internal_filename_of_processed_file: processed file (uuid filename)
+        result_files: result file(s) written by the processing step
+        internal_filenames_of_processed_files: processed files (uuid filenames)
 
     Returns:
-        list of all processed files that belong to the same original file
+        mapping of the processed files to all processed files that belong to the same original file
     """
-    upload_candidates = glob.glob(f"{dir_with_processed_files}/**/**/{internal_filename_of_processed_file.stem}/*.*")
-    upload_candidates.extend(
-        glob.glob(f"{dir_with_processed_files}/**/**/{internal_filename_of_processed_file.stem}*.*")
-    )
-    upload_candidates_paths = [Path(c) for c in upload_candidates]
-    linestart = "\n" + " " * 67 + "- "
-    cand = linestart + linestart.join([str(c) for c in upload_candidates])
-    logger.info(f"Found the following upload candidates for {internal_filename_of_processed_file}: {cand}")
-    return upload_candidates_paths
+    manifest = get_upload_manifest(result_files)
+    upload_candidates: dict[Path, list[Path]] = {}
+    missing: list[Path] = []
+    for internal_filename in internal_filenames_of_processed_files:
+        if internal_filename in manifest:
+            upload_candidates[internal_filename] = manifest[internal_filename]
+        else:
+            missing.append(internal_filename)
+    if missing:
+        logger.info(f"{len(missing)} processed files are not in the manifest. Indexing {dir_with_processed_files}...")
+        index = _index_processed_files(dir_with_processed_files)
+        for internal_filename in missing:
+            upload_candidates[internal_filename] = index.get(internal_filename.stem, [])
+    return upload_candidates
+
+
+def _index_processed_files(dir_with_processed_files: Path) -> dict[str, list[Path]]:
+    """
+    Index the directory with the processed files (which has two levels of subdirectories, e.g. tmp/1f/fb/),
+    by the uuid that is the first part of their filename (or the name of their directory, for preview images).
+
+    Args:
+        dir_with_processed_files: path to the directory where the processed files are located
+
+    Returns:
+        mapping of the uuids to the files
+    """
+    index: dict[str, list[Path]] = {}
+    for level_1 in os.scandir(dir_with_processed_files):
+        if not level_1.is_dir():
+            continue
+        for level_2 in os.scandir(level_1.path):
+            if not level_2.is_dir():
+                continue
+            for entry in os.scandir(level_2.path):
+                if entry.is_dir():
+                    previews = [Path(x.path) for x in os.scandir(entry.path) if "." in x.name]
+                    index.setdefault(entry.name, []).extend(previews)
+                elif "." in entry.name:
+                    index.setdefault(entry.name.split(".")[0], []).append(Path(entry.path))
+    return index
 
 
 def _check_upload_candidates(
@@ -151,140 +271,164 @@ def _check_upload_candidates(
     return True
 
 
-def _call_upload_without_processing_recursively(
-    file: Path,
-    sipi_url: str,
-    con: Connection,
-    err_msg: str,
-) -> bool:
+def _get_backoff(attempt: int) -> float:
     """
-    There are different kinds of failures in _upload_without_processing(),
-    and each of them should be handled the same way:
-    By calling this function.
-
-    This function logs and prints the error message,
-    sleeps for 2 seconds,
-    and then calls _upload_without_processing() again.
+    Get the waiting time before the next attempt to upload a file:
+    it doubles with every attempt, up to a maximum,
+    and half of it is random, so that the threads don't retry all at the same time.
 
     Args:
-        file: file to upload
-        sipi_url: URL of the SIPI server
-        con: connection to the DSP server
-        err_msg: message to print and log
+        attempt: number of the attempt that failed (starting with 0)
 
     Returns:
-        return value of _upload_without_processing()
+        the waiting time in seconds
     """
-    print(f"{datetime.now()}: ERROR: {err_msg}")
-    logger.error(err_msg, exc_info=True)
-    sleep(2)
-    return _upload_without_processing(
-        file=file,
-        sipi_url=sipi_url,
-        con=con,
-    )
+    backoff: float = min(_backoff_cap, _backoff_base * 2.0**attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)  # noqa: S311 (suspicious-non-cryptographic-random-usage)
+
+
+def _send_file(file: Path, url: str, token: str, sessions: SessionPool) -> Response:
+    with open(file, "rb") as bitstream, sessions.session() as session:
+        body = _MultipartBody(bitstream, file.name, os.fstat(bitstream.fileno()).st_size)
+        return session.post(
+            url=url,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": body.content_type},
+            data=body,
+            timeout=8 * 60,
+        )
+
+
+def _is_transient(status_code: int) -> bool:
+    return status_code in (408, 429) or status_code >= 500
 
 
 def _upload_without_processing(
     file: Path,
     sipi_url: str,
     con: Connection,
+    sessions: SessionPool,
+    concurrency: AdaptiveConcurrency,
 ) -> bool:
     """
     Send a single file to the "upload_without_processing" route.
-    In case of failure, retry after 2 seconds
-    by recursively calling this function again.
-    Retry until the file could be uploaded.
+    In case of a connection error, a timeout, or a response that indicates a temporary problem of the server,
+    retry with an increasing waiting time, but at most a limited number of times.
+    Other errors (e.g. if the file can't be read, or if the server rejects it) are not retried.
+    The temporary problems also lower the number of concurrent uploads.
 
     Args:
         file: file to upload
         sipi_url: URL of the SIPI server
         con: connection to the DSP server
+        sessions: keep-alive sessions of the upload threads
+        concurrency: limit of the number of concurrent uploads
 
     Returns:
-        True if the file could be uploaded
+        True if the file could be uploaded, False if it failed permanently
     """
-    try:
-        with open(file, "rb") as bitstream:
-            response_upload = requests.post(
-                url=f"{regex.sub(r'/$', '', sipi_url)}/upload_without_processing",
-                headers={"Authorization": f"Bearer {con.get_token()}"},
-                files={"file": bitstream},
-                timeout=8 * 60,
-            )
-    except Exception:  # noqa: BLE001 (blind-except)
-        return _call_upload_without_processing_recursively(
-            file=file,
-            sipi_url=sipi_url,
-            con=con,
-            err_msg=(
-                f"An exception occurred while opening the file {file} "
-                "or while sending it to the /upload_without_processing route. Retrying..."
-            ),
-        )
-
-    try:
-        msg = response_upload.json().get("message")
-    except JSONDecodeError:
-        msg = None
-
-    if msg == "server.fs.mkdir() failed: File exists":
-        # This error can be safely ignored, since the file was uploaded correctly.
-        logger.info(f"In spite of 'server.fs.mkdir() failed: File exists', successfully uploaded file {file}")
-    elif response_upload.status_code != 200:
-        return _call_upload_without_processing_recursively(
-            file=file,
-            sipi_url=sipi_url,
-            con=con,
-            err_msg=f"Uploading the file {file} returned non-200. Retrying... The response was {vars(response_upload)}",
-        )
-    else:
-        logger.info(f"Successfully uploaded file {file}")
-
-    return True
+    url = f"{regex.sub(r'/$', '', sipi_url)}/upload_without_processing"
+    size_in_mib = file.stat().st_size / 2**20 if file.is_file() else 1.0
+    for attempt in range(_max_attempts):
+        if attempt:
+            sleep(_get_backoff(attempt - 1))
+        with concurrency.slot(weight=size_in_mib) as slot:
+            try:
+                response_upload = _send_file(file, url, con.get_token(), sessions)
+            except RequestException:
+                slot.congested = True
+                err_msg = f"An exception occurred while sending the file {file} to the /upload_without_processing route"
+                print(f"{datetime.now()}: ERROR: {err_msg}. Retrying...")
+                logger.error(f"{err_msg} (attempt {attempt + 1}/{_max_attempts})", exc_info=True)
+                continue
+            except OSError:
+                err_msg = f"The file {file} could not be read"
+                print(f"{datetime.now()}: ERROR: {err_msg}")
+                logger.error(err_msg, exc_info=True)
+                return False
+            slot.congested = _is_transient(response_upload.status_code)
+
+        try:
+            msg = response_upload.json().get("message")
+        except (JSONDecodeError, AttributeError):
+            msg = None
+
+        if msg == "server.fs.mkdir() failed: File exists":
+            # This error can be safely ignored, since the file was uploaded correctly.
+            logger.info(f"In spite of 'server.fs.mkdir() failed: File exists', successfully uploaded file {file}")
+            return True
+        elif response_upload.status_code == 200:
+            logger.info(f"Successfully uploaded file {file}")
+            return True
+
+        err_msg = f"Uploading the file {file} returned {response_upload.status_code}: {response_upload.text}"
+        if not _is_transient(response_upload.status_code):
+            print(f"{datetime.now()}: ERROR: {err_msg}")
+            logger.error(err_msg)
+            return False
+        print(f"{datetime.now()}: ERROR: {err_msg}. Retrying...")
+        logger.error(f"{err_msg} (attempt {attempt + 1}/{_max_attempts})")
+
+    err_msg = f"Permanently unable to upload the file {file} after {_max_attempts} attempts"
+    print(f"{datetime.now()}: ERROR: {err_msg}")
+    logger.error(err_msg)
+    return False
 
 
-def _upload_file(
-    dir_with_processed_files: Path,
+def upload_file(
     internal_filename_of_processed_file: Path,
+    upload_candidates: list[Path],
     sipi_url: str,
     con: Connection,
+    sessions: SessionPool,
+    concurrency: AdaptiveConcurrency,
+    ledger: UploadLedger,
 ) -> tuple[Path, bool]:
     """
-    Retrieves all derivatives of one file and uploads them to the SIPI server.
+    Uploads all derivatives of one file to the SIPI server.
+    The files that were uploaded by an earlier run (according to the ledger) are skipped,
+    and the result of every upload is recorded in the ledger.
 
     Args:
-        dir_with_processed_files: path to the directory where the processed files are located
         internal_filename_of_processed_file: path to the derivate of the original file,
             i.e. the processed file (uuid filename)
+        upload_candidates: all processed files that belong to the same original file
         sipi_url: URL of the SIPI server
         con: connection to the DSP server
+        sessions: keep-alive sessions of the upload threads
+        concurrency: limit of the number of concurrent uploads
+        ledger: upload state of the files
 
     Returns:
         tuple with the processed file and a boolean indicating if the upload was successful
     """
-    upload_candidates = _get_upload_candidates(
-        dir_with_processed_files=dir_with_processed_files,
-        internal_filename_of_processed_file=internal_filename_of_processed_file,
-    )
+    linestart = "\n" + " " * 67 + "- "
+    cand = linestart + linestart.join([str(c) for c in upload_candidates])
+    logger.info(f"Found the following upload candidates for {internal_filename_of_processed_file}: {cand}")
 
     check_result = _check_upload_candidates(
         internal_filename_of_processed_file=internal_filename_of_processed_file,
         upload_candidates=upload_candidates,
     )
     if not check_result:
+        ledger.record(internal_filename_of_processed_file, uploaded=False)
         return internal_filename_of_processed_file, False
 
-    results: list[bool] = []
+    success = True
     for candidate in upload_candidates:
-        res = _upload_without_processing(
-            file=candidate,
-            sipi_url=sipi_url,
-            con=con,
+        if ledger.is_uploaded(candidate):
+            logger.info(f"Skipping {candidate}, because it was uploaded by an earlier run")
+            ledger.record_skipped()
+            continue
+        uploaded = _upload_without_processing(
+            file=candidate, sipi_url=sipi_url, con=con, sessions=sessions, concurrency=concurrency
         )
-        results.append(res)
+        ledger.record(candidate, uploaded)
+        if not uploaded:
+            # the remaining files are not uploaded if one of them failed permanently
+            success = False
+            break
 
-    if not all(results):
+    if not success:
         logger.error(f"Could not upload all files for {internal_filename_of_processed_file}.")
         return internal_filename_of_processed_file, False
     else:
@@ -293,88 +437,101 @@ def _upload_file(
 
 
 def _upload_files_in_parallel(
-    dir_with_processed_files: Path,
+    upload_candidates: dict[Path, list[Path]],
     internal_filenames_of_processed_files: list[Path],
     sipi_url: str,
     con: Connection,
-    nthreads: int,
-) -> list[tuple[Path, bool]]:
+    concurrency: AdaptiveConcurrency,
+    ledger: UploadLedger,
+) -> None:
     """
     Use a ThreadPoolExecutor to upload the files in parallel.
+    Every thread reuses its connection to SIPI for all files.
+    The number of concurrent uploads is limited by the (possibly adaptive) concurrency limit.
 
     Args:
-        dir_with_processed_files: path to the directory where the processed files are located
+        upload_candidates: mapping of the processed files to all processed files that belong to the same original file
         internal_filenames_of_processed_files: list of uuid filenames,
             each filename being the path to the derivate of the original file
         sipi_url: URL of the SIPI server
         con: connection to the DSP server
-        nthreads: number of threads to use for the upload (optimum depends on the number of CPUs on the server)
-
-    Returns:
-        _description_
+        concurrency: limit of the number of concurrent uploads
+        ledger: upload state of the files, to which the result of every upload is recorded
     """
-    result: list[tuple[Path, bool]] = []
-    for batch in batched(internal_filenames_of_processed_files, 1000):
-        _launch_thread_pool(nthreads, dir_with_processed_files, sipi_url, con, batch, result)
-    return result
+    counter = 0
+    sessions = SessionPool(concurrency.max_limit)
+    try:
+        for batch in batched(internal_filenames_of_processed_files, 1000):
+            counter += _launch_thread_pool(concurrency, upload_candidates, sipi_url, con, sessions, ledger, batch)
+            print(f"{datetime.now()}: Uploaded {counter}/{len(internal_filenames_of_processed_files)} files...")
+    finally:
+        sessions.close()
 
 
 def _launch_thread_pool(
-    nthreads: int,
-    dir_with_processed_files: Path,
+    concurrency: AdaptiveConcurrency,
+    upload_candidates: dict[Path, list[Path]],
     sipi_url: str,
     con: Connection,
+    sessions: SessionPool,
+    ledger: UploadLedger,
     batch: tuple[Path, ...],
-    result: list[tuple[Path, bool]],
-) -> None:
-    with ThreadPoolExecutor(max_workers=nthreads) as pool:
+) -> int:
+    with ThreadPoolExecutor(max_workers=concurrency.max_limit) as pool:
         upload_jobs = [
             pool.submit(
-                _upload_file,
-                dir_with_processed_files,
+                upload_file,
                 internal_filename_of_processed_file,
+                upload_candidates[internal_filename_of_processed_file],
                 sipi_url,
                 con,
+                sessions,
+                concurrency,
+                ledger,
             )
             for internal_filename_of_processed_file in batch
         ]
         for uploaded in as_completed(upload_jobs):
-            result.append(uploaded.result())
-            if len(result) % 1000 == 0:
-                print(f"{datetime.now()}: Uploaded {len(result)} files...")
+            uploaded.result()
+    return len(upload_jobs)
 
 
 def _check_if_all_files_were_uploaded(
-    result: list[tuple[Path, bool]],
     internal_filenames_of_processed_files: list[Path],
+    upload_candidates: dict[Path, list[Path]],
+    ledger: UploadLedger,
 ) -> bool:
     """
-    Print the files which could not be uploaded.
+    Check in the ledger if all derivates of all files were uploaded (by this or an earlier run),
+    and print the files which could not be uploaded.
 
     Args:
-        result: list of tuples with the path of the file and the success status
         internal_filenames_of_processed_files: list of files that should have been uploaded (uuid filenames)
+        upload_candidates: mapping of the processed files to all processed files that belong to the same original file
+        ledger: upload state of the files
 
     Returns:
         True if all files were uploaded, False otherwise
     """
-    if len(result) == len(internal_filenames_of_processed_files):
-        success = True
-        print(f"{datetime.now()}: Number of files of which the derivates were uploaded: {len(result)}: Okay")
-        logger.info(f"Number of files of which the derivates were uploaded: {len(result)}: Okay")
-    else:
-        success = False
-        ratio = f"{len(result)}/{len(internal_filenames_of_processed_files)}"
-        msg = f"Some derivates of some files could not be uploaded: Only {ratio} were uploaded. The failed ones are:"
-        print(f"{datetime.now()}: ERROR: {msg}")
-        logger.error(msg)
-
-    for path, res in result:
-        if not res:
-            print(f" - {path} could not be uploaded.")
-            logger.error(f"{path} could not be uploaded.")
-
-    return success
+    failed = [
+        path
+        for path in internal_filenames_of_processed_files
+        if not upload_candidates[path] or not all(ledger.is_uploaded(c) for c in upload_candidates[path])
+    ]
+    num_uploaded = len(internal_filenames_of_processed_files) - len(failed)
+    if not failed:
+        print(f"{datetime.now()}: Number of files of which the derivates were uploaded: {num_uploaded}: Okay")
+        logger.info(f"Number of files of which the derivates were uploaded: {num_uploaded}: Okay")
+        return True
+
+    ratio = f"{num_uploaded}/{len(internal_filenames_of_processed_files)}"
+    msg = f"Some derivates of some files could not be uploaded: Only {ratio} were uploaded. The failed ones are:"
+    print(f"{datetime.now()}: ERROR: {msg}")
+    logger.error(msg)
+    for path in failed:
+        print(f" - {path} could not be uploaded.")
+        logger.error(f"{path} could not be uploaded.")
+    return False
 
 
 def upload_files(
@@ -384,6 +541,7 @@ def upload_files(
     password: str,
     dsp_url: str,
     sipi_url: str,
+    max_threads: Optional[int] = None,
 ) -> bool:
     """
     Uploads the processed files to the DSP server, using multithreading.
@@ -391,25 +549,32 @@ def upload_files(
 
     Args:
         dir_with_processed_files: path to the directory where the processed files are located
-        nthreads: number of threads to use for uploading (optimum depends on the number of CPUs on the server)
+        nthreads: number of threads to use for uploading (optimum depends on the number of CPUs on the server),
+            or the initial number of threads if max_threads is given
         user: the user's e-mail for login into DSP
         password: the user's password for login into DSP
         dsp_url: URL to the DSP server
         sipi_url: URL of the SIPI server
+        max_threads: if given, the number of threads is adapted to the load of the server, up to this number
 
     Returns:
         success status
     """
     dir_with_processed_files_path = _check_processed_dir(dir_with_processed_files)
-    pkl_file_paths = get_pkl_files()
-    logger.info("Found the following pickle files:")
-    for pkl in pkl_file_paths:
-        logger.info(f" - {pkl!s}")
+    result_files = get_result_files()
+    logger.info("Found the following processing results:")
+    for result_file in result_files:
+        logger.info(f" - {result_file!s}")
 
-    # read paths from pkl file
-    internal_filenames_of_processed_files = _get_paths_from_pkl_files(pkl_files=pkl_file_paths)
+    # read paths from the processing results
+    internal_filenames_of_processed_files = _get_paths_from_result_files(result_files=result_files)
     print(f"{datetime.now()}: Found {len(internal_filenames_of_processed_files)} files to upload...")
     logger.info(f"Found {len(internal_filenames_of_processed_files)} files to upload...")
+    upload_candidates = _get_upload_candidates(
+        dir_with_processed_files=dir_with_processed_files_path,
+        result_files=result_files,
+        internal_filenames_of_processed_files=internal_filenames_of_processed_files,
+    )
 
     # create connection to DSP
     con = ConnectionLive(dsp_url)
@@ -419,19 +584,31 @@ def upload_files(
     start_time = datetime.now()
     print(f"{start_time}: Start file uploading...")
     logger.info("Start file uploading...")
-    result = _upload_files_in_parallel(
-        dir_with_processed_files=dir_with_processed_files_path,
-        internal_filenames_of_processed_files=internal_filenames_of_processed_files,
-        sipi_url=sipi_url,
-        con=con,
-        nthreads=nthreads,
-    )
+    concurrency = AdaptiveConcurrency.create("upload-files", nthreads, max_threads)
+    ledger = UploadLedger.load(sipi_url, user)
+    try:
+        _upload_files_in_parallel(
+            upload_candidates=upload_candidates,
+            internal_filenames_of_processed_files=internal_filenames_of_processed_files,
+            sipi_url=sipi_url,
+            con=con,
+            concurrency=concurrency,
+            ledger=ledger,
+        )
+    finally:
+        ledger.close()
+    concurrency.log_summary()
+    if ledger.skipped:
+        msg = f"{ledger.skipped} files had been uploaded by an earlier run already, and were skipped"
+        print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
 
     # check if all files were uploaded
     end_time = datetime.now()
     print(f"{datetime.now()}: Uploading files took {end_time - start_time}")
     logger.info(f"Uploading files took {end_time - start_time}")
     return _check_if_all_files_were_uploaded(
-        result=result,
         internal_filenames_of_processed_files=internal_filenames_of_processed_files,
+        upload_candidates=upload_candidates,
+        ledger=ledger,
     )
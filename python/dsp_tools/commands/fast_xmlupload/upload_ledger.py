@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, TextIO
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class UploadLedger:
+    """
+    Records the upload state of every file sent by upload-files
+    (derivative, .orig file, sidecar file, preview image),
+    so that a rerun (e.g. after an interruption) doesn't upload the same files again.
+    It is stored in the JSON Lines format in the current working directory, and every upload is appended right away.
+    A file counts as uploaded only if its size and modification time didn't change since the upload.
+    Every entry belongs to the SIPI server and the user of its upload,
+    so that the uploads to another server (or as another user) don't skip any file.
+
+    Attributes:
+        filepath: file in which the ledger is stored
+        sipi_url: URL of the SIPI server the files are uploaded to
+        user: e-mail of the user who uploads the files
+        entries: absolute path of a file -> size, modification time and upload state
+        skipped: number of files in this run that didn't need to be uploaded
+    """
+
+    filepath: Path
+    sipi_url: str
+    user: str
+    entries: dict[str, tuple[int, int, bool]] = field(default_factory=dict)
+    skipped: int = 0
+    _file: Optional[TextIO] = field(init=False, default=None)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    @staticmethod
+    def load(sipi_url: str, user: str, filepath: Path = Path("upload_ledger.jsonl")) -> UploadLedger:
+        """
+        Load the ledger of the earlier runs that uploaded to the same SIPI server as the same user.
+        A truncated last line (if a run crashed while writing it) is skipped.
+
+        Args:
+            sipi_url: URL of the SIPI server the files are uploaded to
+            user: e-mail of the user who uploads the files
+            filepath: file in which the ledger is stored
+
+        Returns:
+            the ledger (empty if there is none yet)
+        """
+        ledger = UploadLedger(filepath, sipi_url, user)
+        if not filepath.is_file():
+            return ledger
+        with open(filepath, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if (entry.get("sipi_url"), entry.get("user")) != (sipi_url, user):
+                        continue
+                    ledger.entries[entry["file"]] = (entry["size"], entry["mtime_ns"], entry["uploaded"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping an invalid line of {filepath}: {line!r}")
+        return ledger
+
+    def is_uploaded(self, file: Path) -> bool:
+        """
+        Check if a file was uploaded by this or an earlier run, and didn't change since then.
+
+        Args:
+            file: the file
+
+        Returns:
+            True if the file was uploaded
+        """
+        with self._lock:
+            entry = self.entries.get(str(file.absolute()))
+        if not entry or not entry[2]:
+            return False
+        try:
+            stat = file.stat()
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == entry[:2]
+
+    def record(self, file: Path, uploaded: bool) -> None:
+        """
+        Record the upload state of a file, and append it to the ledger on the disk.
+
+        Args:
+            file: the file
+            uploaded: True if the file was uploaded, False if the upload failed
+        """
+        try:
+            stat = file.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size, mtime_ns = -1, -1
+        key = str(file.absolute())
+        entry = {
+            "sipi_url": self.sipi_url,
+            "user": self.user,
+            "file": key,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "uploaded": uploaded,
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self.entries[key] = (size, mtime_ns, uploaded)
+            try:
+                if not self._file:
+                    self._file = open(self.filepath, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+            except OSError:
+                logger.warning(f"The upload of {file} could not be written to {self.filepath}", exc_info=True)
+
+    def record_skipped(self) -> None:
+        """Count a file that didn't need to be uploaded, because an earlier run uploaded it already."""
+        with self._lock:
+            self.skipped += 1
+
+    def close(self) -> None:
+        """Close the ledger on the disk."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
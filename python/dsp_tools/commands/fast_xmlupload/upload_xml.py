@@ -1,11 +1,10 @@
-import pickle
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, cast
+from typing import cast
 
 from lxml import etree
 
-from dsp_tools.commands.fast_xmlupload.upload_files import get_pkl_files
+from dsp_tools.commands.fast_xmlupload.processing_journal import get_processing_results, get_result_files
 from dsp_tools.commands.xmlupload.upload_config import UploadConfig
 from dsp_tools.commands.xmlupload.xmlupload import xmlupload
 from dsp_tools.models.exceptions import UserError
@@ -14,12 +13,12 @@ from dsp_tools.utils.create_logger import get_logger
 logger = get_logger(__name__)
 
 
-def _get_paths_from_pkl_files(pkl_files: list[Path]) -> dict[str, str]:
+def _get_paths_from_result_files(result_files: list[Path]) -> dict[str, str]:
     """
-    Read the pickle file(s) returned by the processing step.
+    Read the journal(s) (or the pickle file(s) of older versions) written by the processing step.
 
     Args:
-        pkl_files: pickle file(s) returned by the processing step
+        result_files: result file(s) written by the processing step
 
     Raises:
         UserError: If for a file, no derivative was found
@@ -27,12 +26,8 @@ def _get_paths_from_pkl_files(pkl_files: list[Path]) -> dict[str, str]:
     Returns:
         dict of original paths to uuid filenames
     """
-    orig_path_2_processed_path: list[tuple[Path, Optional[Path]]] = []
-    for pkl_file in pkl_files:
-        orig_path_2_processed_path.extend(pickle.loads(pkl_file.read_bytes()))  # noqa: S301 (deserialize untrusted data)
-
     orig_path_2_uuid_filename: dict[str, str] = {}
-    for orig_path, processed_path in orig_path_2_processed_path:
+    for orig_path, processed_path in get_processing_results(result_files).items():
         if processed_path:
             orig_path_2_uuid_filename[str(orig_path)] = str(processed_path.name)
         else:
@@ -53,7 +48,7 @@ def replace_bitstream_paths(
 
     Args:
         xml_tree: The parsed original XML tree
-        orig_path_2_uuid_filename: Mapping from original filenames to uuid filenames (from the pickle file)
+        orig_path_2_uuid_filename: Mapping from original filenames to uuid filenames (from the processing results)
 
     Raises:
         UserError: If for a file, no derivative was found
@@ -101,8 +96,8 @@ def fast_xmlupload(
         success status
     """
     xml_tree_orig = etree.parse(xml_file)
-    pkl_files = get_pkl_files()
-    orig_path_2_uuid_filename = _get_paths_from_pkl_files(pkl_files)
+    result_files = get_result_files()
+    orig_path_2_uuid_filename = _get_paths_from_result_files(result_files)
     xml_tree_replaced = replace_bitstream_paths(
         xml_tree=xml_tree_orig,
         orig_path_2_uuid_filename=orig_path_2_uuid_filename,
@@ -0,0 +1,265 @@
+"""
+A long-lived local worker that executes jobs submitted by "dsp-tools submit" over a Unix socket.
+The libraries are imported, the XSD schema is compiled and the HTTP connections are opened only once,
+and the jobs run concurrently.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, TextIO
+
+from dsp_tools.models.exceptions import BaseError, InternalError, UserError
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+default_socket_path = Path.home() / ".dsp-tools" / "dsp-tools.sock"
+
+# actions that can be submitted as jobs ("xmlupload --validate-only" is the validation job),
+# mapped to the arguments that contain paths, which are evaluated relative to the working directory of the client
+_path_arguments = {
+    "xmlupload": ["xmlfile", "imgdir"],
+    "id2iri": ["xmlfile", "mapping"],
+}
+
+
+@dataclass
+class JobResult:
+    """
+    Result of a job, as it is sent back to the client.
+
+    Attributes:
+        success: success status of the job
+        output: what the job printed
+        error: error message, if the job failed with an error
+    """
+
+    success: bool
+    output: str = ""
+    error: str | None = None
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """
+    Replaces sys.stdout / sys.stderr while the worker is running,
+    so that the output of a job can be sent back to the client that submitted it.
+    Output of threads that don't belong to a job goes to the original stream.
+    """
+
+    def __init__(self, original: TextIO) -> None:
+        self.original = original
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[io.StringIO]:
+        buffer = io.StringIO()
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, s: str) -> int:
+        buffer: io.StringIO | None = getattr(self._local, "buffer", None)
+        return buffer.write(s) if buffer else self.original.write(s)
+
+    def flush(self) -> None:
+        self.original.flush()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    server: JobServer
+
+    def handle(self) -> None:
+        result = self.server.run_job(self.rfile.readline())
+        self.wfile.write(json.dumps(asdict(result)).encode("utf-8") + b"\n")
+
+
+class JobServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Server that accepts one job per connection.
+    A job is a line of JSON with the CLI arguments and the working directory of the client,
+    and the result is sent back as a line of JSON.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        max_jobs: int,
+        parse: Callable[[list[str]], argparse.Namespace],
+        execute: Callable[[argparse.Namespace], bool],
+    ) -> None:
+        """
+        Bind the server to a Unix socket.
+
+        Args:
+            socket_path: path of the Unix socket
+            max_jobs: maximum number of jobs that run at the same time (the others wait)
+            parse: function that parses the CLI arguments of a job
+            execute: function that executes a parsed job
+        """
+        self.parse = parse
+        self.execute = execute
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._stdout = _ThreadLocalStream(sys.stdout)
+        self._stderr = _ThreadLocalStream(sys.stderr)
+        super().__init__(str(socket_path), _JobHandler)
+
+    def run_job(self, request: bytes) -> JobResult:
+        """
+        Parse and execute a job.
+
+        Args:
+            request: the job, as it was sent by the client
+
+        Returns:
+            the result of the job
+        """
+        with self._stdout.capture() as output, self._stderr.capture() as errors:
+            try:
+                args = self._parse_job(request)
+                logger.info(f"Starting job: {args.action} {args.xmlfile}")
+                with self._slots:
+                    success = self.execute(args)
+                error = None
+            except BaseError as err:
+                logger.exception(err)
+                success, error = False, err.message
+            except SystemExit:
+                # some commands exit after having printed the reason, which must not stop the worker
+                logger.exception("The job exited")
+                success, error = False, None
+            except Exception as err:
+                logger.exception(err)
+                success, error = False, str(InternalError())
+        return JobResult(success, output.getvalue() + errors.getvalue(), error)
+
+    def _parse_job(self, request: bytes) -> argparse.Namespace:
+        try:
+            job = json.loads(request)
+            cli_args, cwd = list(job["args"]), Path(job["cwd"])
+        except (ValueError, KeyError, TypeError):
+            raise UserError(f"The job is invalid: {request!r}") from None
+        args = self.parse(cli_args)
+        if args.action not in _path_arguments:
+            raise UserError(f"The action '{args.action}' can't be submitted as a job")
+        for name in _path_arguments[args.action]:
+            setattr(args, name, str(cwd / getattr(args, name)))
+        return args
+
+    def server_activate(self) -> None:
+        super().server_activate()
+        sys.stdout, sys.stderr = self._stdout, self._stderr
+
+    def server_close(self) -> None:
+        super().server_close()
+        sys.stdout, sys.stderr = self._stdout.original, self._stderr.original
+
+
+def serve(
+    socket_path: Path,
+    max_jobs: int,
+    parse: Callable[[list[str]], argparse.Namespace],
+    execute: Callable[[argparse.Namespace], bool],
+) -> bool:
+    """
+    Run a worker that executes the jobs submitted with "dsp-tools submit", until it is interrupted.
+
+    Args:
+        socket_path: path of the Unix socket on which the worker listens
+        max_jobs: maximum number of jobs that run at the same time
+        parse: function that parses the CLI arguments of a job
+        execute: function that executes a parsed job
+
+    Raises:
+        UserError: if Unix sockets are not supported, or if another worker is already listening on the socket
+
+    Returns:
+        success status
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise UserError("'dsp-tools serve' is not available on this operating system")
+    _remove_stale_socket(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    # only the owner may submit jobs, because the jobs run with the credentials passed by the client
+    with _restrictive_umask():
+        server = JobServer(socket_path, max_jobs, parse, execute)
+    try:
+        msg = f"Listening for jobs on {socket_path}, with at most {max_jobs} concurrent jobs. Stop with Ctrl+C."
+        logger.info(msg)
+        print(f"{datetime.now()}: {msg}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("The worker was stopped by the user")
+        print(f"{datetime.now()}: The worker was stopped.")
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+    return True
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    if not socket_path.exists():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            logger.info(f"Removing the stale socket {socket_path}")
+            socket_path.unlink()
+            return
+    raise UserError(f"Another worker is already listening on {socket_path}")
+
+
+@contextlib.contextmanager
+def _restrictive_umask() -> Iterator[None]:
+    previous = os.umask(0o177)
+    try:
+        yield
+    finally:
+        os.umask(previous)
+
+
+def submit(args: list[str], socket_path: Path) -> bool:
+    """
+    Submit a job to the worker started with "dsp-tools serve", wait for it to finish, and print its output.
+
+    Args:
+        args: the CLI arguments of the job, e.g. ["xmlupload", "data.xml"]
+        socket_path: path of the Unix socket on which the worker listens
+
+    Raises:
+        UserError: if no worker is listening on the socket
+
+    Returns:
+        success status of the job
+    """
+    job: dict[str, Any] = {"args": args, "cwd": str(Path.cwd())}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(job).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as response:
+                result = JobResult(**json.loads(response.readline()))
+    except (OSError, AttributeError, ValueError):
+        logger.error(f"Unable to submit the job to {socket_path}", exc_info=True)
+        raise UserError(f"No worker is listening on {socket_path}. Start it with 'dsp-tools serve'.") from None
+    print(result.output, end="")
+    if result.error:
+        print("\nThe job was terminated because of an Error:")
+        print(result.error)
+    return result.success
@@ -103,8 +103,8 @@ def _diagnose_class(cls_type: str, onto_check_info: OntoCheckInformation) -> str
     prefix, cls_ = _get_prefix_and_prop_or_cls_identifier(cls_type, onto_check_info.default_ontology_prefix)
     if not prefix:
         return "Property name does not follow a known ontology pattern"
-    if onto := onto_check_info.onto_lookup.get(prefix):
-        return "Invalid Class Type" if cls_ not in onto.classes else None
+    if (known_classes := onto_check_info.classes_lookup.get(prefix)) is not None:
+        return "Invalid Class Type" if cls_ not in known_classes else None
     else:
         return "Unknown ontology prefix"
 
@@ -123,8 +123,8 @@ def _diagnose_property(prop_name: str, onto_check_info: OntoCheckInformation) ->
     prefix, prop = _get_prefix_and_prop_or_cls_identifier(prop_name, onto_check_info.default_ontology_prefix)
     if not prefix:
         return "Property name does not follow a known ontology pattern"
-    if onto := onto_check_info.onto_lookup.get(prefix):
-        return "Invalid Property" if prop not in onto.properties else None
+    if (known_properties := onto_check_info.properties_lookup.get(prefix)) is not None:
+        return "Invalid Property" if prop not in known_properties else None
     else:
         return "Unknown ontology prefix"
 
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
 from typing import Any, Iterable, Protocol
 from urllib.parse import quote_plus
 
@@ -9,6 +13,8 @@ from dsp_tools.utils.create_logger import get_logger
 
 logger = get_logger(__name__)
 
+_max_concurrent_downloads = 4
+
 
 @dataclass(frozen=True)
 class ListNode:
@@ -43,24 +49,37 @@ class ListClient(Protocol):
 
 @dataclass
 class ListClientLive:
-    """Client handling list-related requests to the DSP-API."""
+    """
+    Client handling list-related requests to the DSP-API.
+
+    Attributes:
+        con: connection to the DSP server
+        project_iri: IRI of the project whose lists are retrieved
+        snapshot_file: if provided, the lists are written to this file,
+            and reused in later runs as long as the lists of the project have not changed
+    """
 
     con: Connection
     project_iri: str
+    snapshot_file: Path | None = None
     list_info: ProjectLists | None = field(init=False, default=None)
+    node_lookup: dict[str, str] | None = field(init=False, default=None)
 
     def get_list_node_id_to_iri_lookup(self) -> dict[str, str]:
         """
         Get a mapping of list node IDs to their respective IRIs.
         A list node ID is structured as follows:
         <list name>:<node name> where the list name is the node name of the root node.
+        The mapping is only built once.
 
         Returns:
             The mapping of list node IDs to IRIs.
         """
-        if not self.list_info:
-            self.list_info = _get_list_info_from_server(self.con, self.project_iri)
-        return dict(_get_node_tuples(self.list_info.lists))
+        if self.node_lookup is None:
+            if not self.list_info:
+                self.list_info = _get_list_info_from_server(self.con, self.project_iri, self.snapshot_file)
+            self.node_lookup = dict(_get_node_tuples(self.list_info.lists))
+        return self.node_lookup
 
 
 def _get_node_tuples(lists: list[List]) -> Iterable[tuple[str, str]]:
@@ -72,19 +91,69 @@ def _get_node_tuples(lists: list[List]) -> Iterable[tuple[str, str]]:
             yield node_id, node.node_iri
 
 
-def _get_list_info_from_server(con: Connection, project_iri: str) -> ProjectLists:
+def _get_list_info_from_server(con: Connection, project_iri: str, snapshot_file: Path | None = None) -> ProjectLists:
     logger.info(f"Retrieving lists of project {project_iri}")
-    list_iris = _get_list_iris_from_server(con, project_iri)
-    lists = [_get_list_from_server(con, list_iri) for list_iri in list_iris]
+    if not snapshot_file:
+        return _get_lists_from_server(con, _get_list_iris_from_server(con, project_iri))
+    list_summaries = _get_list_summaries_from_server(con, project_iri)
+    fingerprint = _get_fingerprint(list_summaries)
+    if snapshot := _read_snapshot(snapshot_file, fingerprint):
+        logger.info(f"Reusing the lists from the snapshot {snapshot_file}")
+        return snapshot
+    project_lists = _get_lists_from_server(con, [lst["id"] for lst in list_summaries])
+    _write_snapshot(snapshot_file, fingerprint, project_lists)
+    return project_lists
+
+
+def _get_lists_from_server(con: Connection, list_iris: list[str]) -> ProjectLists:
+    with ThreadPoolExecutor(max_workers=_max_concurrent_downloads) as pool:
+        lists = list(pool.map(lambda list_iri: _get_list_from_server(con, list_iri), list_iris))
     return ProjectLists(lists)
 
 
+def _get_fingerprint(list_summaries: list[dict[str, Any]]) -> str:
+    """
+    The list summaries contain the IRI, name, labels and comments of every root node,
+    so the fingerprint changes if a list is added, deleted or renamed.
+    """
+    serialized = json.dumps(list_summaries, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _read_snapshot(snapshot_file: Path, fingerprint: str) -> ProjectLists | None:
+    try:
+        content = json.loads(snapshot_file.read_text(encoding="utf-8"))
+        if content["fingerprint"] != fingerprint:
+            logger.info(f"The lists have changed since the snapshot {snapshot_file} was written")
+            return None
+        return ProjectLists(
+            [
+                List(lst["root_iri"], lst["list_name"], [ListNode(**node) for node in lst["nodes"]])
+                for lst in content["lists"]
+            ]
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_snapshot(snapshot_file: Path, fingerprint: str, project_lists: ProjectLists) -> None:
+    content = {"fingerprint": fingerprint, "lists": [asdict(lst) for lst in project_lists.lists]}
+    try:
+        snapshot_file.write_text(json.dumps(content, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        logger.warning(f"The list snapshot could not be written to {snapshot_file}", exc_info=True)
+
+
 def _get_list_iris_from_server(con: Connection, project_iri: str) -> list[str]:
+    return [lst["id"] for lst in _get_list_summaries_from_server(con, project_iri)]
+
+
+def _get_list_summaries_from_server(con: Connection, project_iri: str) -> list[dict[str, Any]]:
     iri = quote_plus(project_iri)
     res = con.get(f"/admin/lists?projectIri={iri}")
     lists: list[dict[str, Any]] = res["lists"]
     logger.info(f"Found {len(lists)} lists for project")
-    return [lst["id"] for lst in lists]
+    return lists
 
 
 def _get_list_from_server(con: Connection, list_iri: str) -> List:
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from types import FunctionType, ModuleType
+from typing import Any
+
+import rustworkx as rx
+from lxml import etree
+
+from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class AllocationSite:
+    """A source line that allocated memory, as reported by tracemalloc."""
+
+    location: str
+    size_kib: float
+    count: int
+
+
+@dataclass(frozen=True)
+class MemorySnapshot:
+    """Memory usage at a phase boundary of the xmlupload."""
+
+    phase: str
+    timestamp: str
+    rss_mib: float | None
+    peak_rss_mib: float | None
+    traced_current_mib: float
+    traced_peak_mib: float
+    structure_sizes: dict[str, dict[str, Any]]
+    top_allocations: list[AllocationSite]
+    top_allocations_since_previous_phase: list[AllocationSite]
+
+
+@dataclass
+class MemoryProfiler:
+    """
+    Takes tracemalloc snapshots (plus the RSS of the process) at the phase boundaries of the xmlupload,
+    measures the major data structures,
+    and writes a report into the diagnostics folder.
+    If it is disabled, all methods are no-ops.
+    """
+
+    enabled: bool
+    top_n: int = 15
+    snapshots: list[MemorySnapshot] = field(default_factory=list)
+    _previous: tracemalloc.Snapshot | None = field(init=False, default=None)
+
+    def start(self) -> None:
+        """Start tracing the Python memory allocations."""
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        logger.info("Memory diagnostics enabled: tracing Python memory allocations")
+
+    def snapshot(self, phase: str, **structures: Any) -> None:
+        """
+        Take a snapshot at the end of a phase of the xmlupload.
+
+        Args:
+            phase: name of the phase that has just been completed
+            structures: data structures that are alive at this point and whose size should be reported
+        """
+        if not self.enabled or not tracemalloc.is_tracing():
+            return
+        gc.collect()
+        current = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),)
+        )
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        top_allocations = [_to_allocation_site(stat) for stat in current.statistics("lineno")[: self.top_n]]
+        top_since_previous = []
+        if self._previous:
+            diff = current.compare_to(self._previous, "lineno")
+            top_since_previous = [_to_allocation_site(stat) for stat in diff[: self.top_n]]
+        self._previous = current
+        mem_snapshot = MemorySnapshot(
+            phase=phase,
+            timestamp=str(datetime.now()),
+            rss_mib=_get_current_rss_mib(),
+            peak_rss_mib=_get_peak_rss_mib(),
+            traced_current_mib=_to_mib(traced_current),
+            traced_peak_mib=_to_mib(traced_peak),
+            structure_sizes={name: _measure_structure(obj) for name, obj in structures.items()},
+            top_allocations=top_allocations,
+            top_allocations_since_previous_phase=top_since_previous,
+        )
+        self.snapshots.append(mem_snapshot)
+        logger.info(
+            f"Memory after phase '{phase}': RSS={mem_snapshot.rss_mib} MiB, "
+            f"traced={mem_snapshot.traced_current_mib} MiB (peak {mem_snapshot.traced_peak_mib} MiB), "
+            f"structures={mem_snapshot.structure_sizes}"
+        )
+
+    def write_report(self, diagnostics: DiagnosticsConfig) -> Path | None:
+        """
+        Stop tracing and write all snapshots into a JSON file in the diagnostics folder.
+
+        Args:
+            diagnostics: the diagnostics configuration
+
+        Returns:
+            the path to the report, or None if memory diagnostics are disabled
+        """
+        if not self.enabled:
+            return None
+        tracemalloc.stop()
+        self._previous = None
+        filename = (
+            diagnostics.save_location
+            / f"{diagnostics.timestamp_str}_memory_diagnostics_{diagnostics.server_as_foldername}.json"
+        )
+        report = [_snapshot_to_dict(s) for s in self.snapshots]
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"{datetime.now()}: The memory diagnostics were written to {filename}")
+        logger.info(f"The memory diagnostics were written to {filename}")
+        return filename
+
+
+def _snapshot_to_dict(snapshot: MemorySnapshot) -> dict[str, Any]:
+    return {
+        "phase": snapshot.phase,
+        "timestamp": snapshot.timestamp,
+        "rss_mib": snapshot.rss_mib,
+        "peak_rss_mib": snapshot.peak_rss_mib,
+        "traced_current_mib": snapshot.traced_current_mib,
+        "traced_peak_mib": snapshot.traced_peak_mib,
+        "structure_sizes": snapshot.structure_sizes,
+        "top_allocations": [vars(x) for x in snapshot.top_allocations],
+        "top_allocations_since_previous_phase": [vars(x) for x in snapshot.top_allocations_since_previous_phase],
+    }
+
+
+def _to_allocation_site(stat: tracemalloc.Statistic | tracemalloc.StatisticDiff) -> AllocationSite:
+    frame = stat.traceback[0]
+    size = stat.size_diff if isinstance(stat, tracemalloc.StatisticDiff) else stat.size
+    count = stat.count_diff if isinstance(stat, tracemalloc.StatisticDiff) else stat.count
+    return AllocationSite(location=f"{frame.filename}:{frame.lineno}", size_kib=round(size / 1024, 1), count=count)
+
+
+def _measure_structure(obj: Any) -> dict[str, Any]:
+    if isinstance(obj, (rx.PyDiGraph, rx.PyGraph)):
+        # the graph lives on the Rust heap, which is invisible to tracemalloc and sys.getsizeof()
+        return {"nodes": obj.num_nodes(), "edges": obj.num_edges()}
+    if isinstance(obj, etree._Element):
+        # the tree lives in libxml2 memory, which is only visible in the RSS
+        return {"elements": sum(1 for _ in obj.iter())}
+    sizes: dict[str, Any] = {"deep_size_mib": _to_mib(_deep_getsizeof(obj))}
+    if hasattr(obj, "__len__"):
+        sizes["length"] = len(obj)
+    return sizes
+
+
+def _deep_getsizeof(obj: Any) -> int:
+    """
+    Approximate the memory footprint of an object,
+    including all objects that are reachable from it.
+    Objects that are referenced several times are only counted once,
+    and shared objects like classes, modules and functions are not counted at all.
+
+    Args:
+        obj: the object to measure
+
+    Returns:
+        size in bytes
+    """
+    seen: set[int] = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+    return total
+
+
+def _get_current_rss_mib() -> float | None:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        # not on Linux
+        return None
+    return _to_mib(rss_pages * os.sysconf("SC_PAGE_SIZE"))
+
+
+def _get_peak_rss_mib() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        # the resource module is POSIX-only
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, but in kilobytes on Linux
+    return _to_mib(peak) if sys.platform == "darwin" else _to_mib(peak * 1024)
+
+
+def _to_mib(size_in_bytes: int) -> float:
+    return round(size_in_bytes / 1024 / 1024, 2)
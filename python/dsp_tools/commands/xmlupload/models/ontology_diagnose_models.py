@@ -25,6 +25,13 @@ class OntoCheckInformation:
 
     default_ontology_prefix: str
     onto_lookup: dict[str, OntoInfo]
+    classes_lookup: dict[str, set[str]] = field(init=False)
+    properties_lookup: dict[str, set[str]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        # an XML file can reference thousands of classes and properties, so the membership test must be cheap
+        self.classes_lookup = {prefix: set(onto.classes) for prefix, onto in self.onto_lookup.items()}
+        self.properties_lookup = {prefix: set(onto.properties) for prefix, onto in self.onto_lookup.items()}
 
 
 @dataclass(frozen=True)
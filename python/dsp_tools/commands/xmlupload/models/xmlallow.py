@@ -29,7 +29,7 @@ class XmlAllow:
                 if tmp[0] == "knora-admin" and tmp[1] in sysgroups:
                     self._group = node.attrib["group"]
                 else:
-                    _group = project_context.group_map.get(node.attrib["group"])
+                    _group = project_context.get_group_iri(node.attrib["group"])
                     if _group is None:
                         raise XmlUploadError(f'Group "{node.attrib["group"]}" is not known: Cannot find project!')
                     self._group = _group
@@ -1,6 +1,11 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Protocol
+from urllib.parse import quote_plus
 
 from dsp_tools.commands.xmlupload.models.ontology_diagnose_models import OntoInfo
 from dsp_tools.models.exceptions import BaseError, UserError
@@ -9,6 +14,9 @@ from dsp_tools.utils.create_logger import get_logger
 
 logger = get_logger(__name__)
 
+_ontology_cache_filename = "ontology_cache.json"
+_max_concurrent_downloads = 4
+
 
 @dataclass
 class OntologyClient(Protocol):
@@ -37,20 +45,53 @@ class OntologyClientLive:
     def get_all_ontologies_from_server(self) -> dict[str, OntoInfo]:
         """
         This function returns all the project ontologies plus the knora-api ontology that are on the server.
+        The ontologies are downloaded concurrently.
+        If an ontology was already downloaded in an earlier upload and has not been modified since,
+        it is taken from the cache in the save location instead.
 
         Returns:
             a dictionary with the ontology name as key and the ontology as value.
         """
-        ontologies = self._get_all_ontology_jsons_from_server()
-        return {onto_name: deserialize_ontology(onto_graph) for onto_name, onto_graph in ontologies.items()}
-
-    def _get_all_ontology_jsons_from_server(self) -> dict[str, list[dict[str, Any]]]:
-        self._get_ontology_names_from_server()
-        project_ontos = {onto: self._get_ontology_from_server(onto) for onto in self.ontology_names}
-        project_ontos["knora-api"] = self._get_knora_api_ontology_from_server()
-        return project_ontos
-
-    def _get_ontology_names_from_server(self) -> None:
+        versions = self._get_ontology_versions_from_server()
+        cache = _OntologyCache.load(self.save_location / _ontology_cache_filename, self.shortcode)
+        ontologies = {name: onto for name, version in versions.items() if (onto := cache.get(name, version))}
+        if missing := [name for name in versions if name not in ontologies]:
+            logger.info(f"Retrieve the ontologies {missing} from the server")
+            downloaded = self._get_ontology_jsons_from_server(missing)
+            for name, onto_graph in downloaded.items():
+                ontologies[name] = deserialize_ontology(onto_graph)
+                cache.put(name, versions[name], ontologies[name])
+            cache.save()
+        else:
+            logger.info("All ontologies were taken from the cache")
+        return {name: ontologies[name] for name in versions}
+
+    def _get_ontology_versions_from_server(self) -> dict[str, str | None]:
+        """
+        Get the names of the project ontologies and a version identifier for each of them,
+        i.e. the last modification date of a project ontology, and the API version for the knora-api ontology.
+        If the version of an ontology cannot be determined, it is None and the ontology won't be cached.
+        """
+        project_iri = self._get_ontology_names_from_server()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            modification_dates = pool.submit(self._get_last_modification_dates_from_server, project_iri)
+            api_version = pool.submit(self._get_api_version_from_server)
+            versions: dict[str, str | None] = {
+                name: modification_dates.result().get(name) for name in self.ontology_names
+            }
+            versions["knora-api"] = api_version.result()
+        return versions
+
+    def _get_ontology_jsons_from_server(self, ontology_names: list[str]) -> dict[str, list[dict[str, Any]]]:
+        def download(name: str) -> list[dict[str, Any]]:
+            if name == "knora-api":
+                return self._get_knora_api_ontology_from_server()
+            return self._get_ontology_from_server(name)
+
+        with ThreadPoolExecutor(max_workers=_max_concurrent_downloads) as pool:
+            return dict(zip(ontology_names, pool.map(download, ontology_names)))
+
+    def _get_ontology_names_from_server(self) -> str | None:
         try:
             url = f"/admin/projects/shortcode/{self.shortcode}"
             res = self.con.get(url)
@@ -62,6 +103,35 @@ class OntologyClientLive:
             raise BaseError(f"Unexpected response from server: {res}") from e
         onto_names: list[str] = [iri.split("/")[-1] for iri in onto_iris]
         self.ontology_names = onto_names
+        project_iri: str | None = res["project"].get("id")
+        return project_iri
+
+    def _get_last_modification_dates_from_server(self, project_iri: str | None) -> dict[str, str]:
+        if not project_iri:
+            return {}
+        try:
+            res = self.con.get(f"/v2/ontologies/metadata/{quote_plus(project_iri)}")
+        except BaseError:
+            logger.warning(f"The ontology metadata of project {self.shortcode} could not be retrieved", exc_info=True)
+            return {}
+        # the response is a single object if the project has only one ontology
+        body = res.get("@graph", res)
+        metadata: list[dict[str, Any]] = body if isinstance(body, list) else [body]
+        modification_dates = {}
+        for onto in metadata:
+            if "@id" in onto and (date := onto.get("knora-api:lastModificationDate")):
+                onto_name = onto["@id"].split("/")[-2]
+                modification_dates[onto_name] = date["@value"] if isinstance(date, dict) else str(date)
+        return modification_dates
+
+    def _get_api_version_from_server(self) -> str | None:
+        try:
+            res = self.con.get("/version")
+        except BaseError:
+            logger.warning("The version of the DSP-API could not be retrieved", exc_info=True)
+            return None
+        api_version: str | None = res.get("webapi")
+        return api_version
 
     def _get_ontology_from_server(self, ontology_name: str) -> list[dict[str, Any]]:
         try:
@@ -90,6 +160,48 @@ class OntologyClientLive:
         return onto_graph
 
 
+@dataclass
+class _OntologyCache:
+    """
+    Deserialized ontologies from earlier uploads, stored as JSON file in the save location.
+    The save location is specific to the server and the project,
+    and every ontology is stored together with its version,
+    so that an ontology that was modified on the server is downloaded again.
+    """
+
+    filepath: Path
+    shortcode: str
+    entries: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @staticmethod
+    def load(filepath: Path, shortcode: str) -> _OntologyCache:
+        try:
+            content = json.loads(filepath.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return _OntologyCache(filepath, shortcode)
+        if content.get("shortcode") != shortcode:
+            return _OntologyCache(filepath, shortcode)
+        return _OntologyCache(filepath, shortcode, content.get("ontologies", {}))
+
+    def get(self, ontology_name: str, version: str | None) -> OntoInfo | None:
+        entry = self.entries.get(ontology_name)
+        if version is None or not entry or entry.get("version") != version:
+            return None
+        return OntoInfo(classes=entry["classes"], properties=entry["properties"])
+
+    def put(self, ontology_name: str, version: str | None, onto: OntoInfo) -> None:
+        if version is None:
+            return
+        self.entries[ontology_name] = {"version": version, "classes": onto.classes, "properties": onto.properties}
+
+    def save(self) -> None:
+        content = {"shortcode": self.shortcode, "ontologies": self.entries}
+        try:
+            self.filepath.write_text(json.dumps(content), encoding="utf-8")
+        except OSError:
+            logger.warning(f"The ontology cache could not be written to {self.filepath}", exc_info=True)
+
+
 def deserialize_ontology(onto_graph: list[dict[str, Any]]) -> OntoInfo:
     """
     This function takes an ontology graph from the DSP-API.
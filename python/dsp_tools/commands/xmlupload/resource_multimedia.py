@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 from dsp_tools.commands.xmlupload.models.permission import Permissions
 from dsp_tools.commands.xmlupload.models.sipi import Sipi
@@ -19,6 +20,7 @@ def handle_media_info(
     sipi_server: Sipi,
     imgdir: str,
     permissions_lookup: dict[str, Permissions],
+    media_resolver: Callable[[str], str | None] | None = None,
 ) -> tuple[bool, None | BitstreamInfo]:
     """
     This function checks if a resource has a bitstream.
@@ -33,6 +35,9 @@ def handle_media_info(
         sipi_server: server to upload
         imgdir: directory of the file
         permissions_lookup: dictionary that contains the permission name as string and the corresponding Python object
+        media_resolver: if the image is already in SIPI:
+            maps the path in the <bitstream> tag to the internal filename (None if the file is not in SIPI).
+            By default, the <bitstream> tag contains the internal filename already.
 
     Returns:
         If the bitstream could be processed successfully, then the function returns True and the new internal ID.
@@ -56,7 +61,13 @@ def handle_media_info(
         if not bitstream_information:
             success = False
     else:
-        bitstream_information = resource.get_bitstream_information(bitstream.value, permissions_lookup)
+        internal_filename = media_resolver(bitstream.value) if media_resolver else bitstream.value
+        if not internal_filename:
+            msg = f"The file '{bitstream.value}' of resource '{resource.label}' ({resource.res_id}) is not in SIPI"
+            print(f"{datetime.now()}: WARNING: {msg}")
+            logger.warning(msg)
+            return False, None
+        bitstream_information = resource.get_bitstream_information(internal_filename, permissions_lookup)
     return success, bitstream_information
 
 
@@ -87,9 +98,7 @@ def _handle_media_upload(
             imgdir=imgdir,
             permissions_lookup=permissions_lookup,
         )
-        msg = f"Uploaded file '{bitstream.value}'"
-        print(f"{datetime.now()}: {msg}")
-        logger.info(msg)
+        logger.debug(f"Uploaded file '{bitstream.value}'")
         return resource_bitstream
     except PermanentConnectionError as err:
         msg = f"Unable to upload file '{bitstream.value}' of resource '{resource.label}' ({resource.res_id})"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import cast
+from typing import TYPE_CHECKING, cast
 from uuid import uuid4
 
 from lxml import etree
@@ -23,6 +23,9 @@ from dsp_tools.commands.xmlupload.stash.stash_models import (
 )
 from dsp_tools.utils.create_logger import get_logger
 
+if TYPE_CHECKING:
+    from dsp_tools.commands.xmlupload.memory_diagnostics import MemoryProfiler
+
 logger = get_logger(__name__)
 
 
@@ -122,7 +125,10 @@ def stash_circular_references(
     return Stash.make(standoff_stash, link_value_stash)
 
 
-def identify_circular_references(root: etree._Element) -> tuple[dict[str, list[str]], list[str]]:
+def identify_circular_references(
+    root: etree._Element,
+    memory_profiler: MemoryProfiler | None = None,
+) -> tuple[dict[str, list[str]], list[str]]:
     """
     Identifies problematic resource-references inside an XML tree.
     A reference is problematic if it creates a circle (circular references).
@@ -131,6 +137,7 @@ def identify_circular_references(root: etree._Element) -> tuple[dict[str, list[s
 
     Args:
         root: the root element of the parsed XML document
+        memory_profiler: if provided, a memory snapshot is taken while the graph is still alive
 
     Returns:
         stash_lookup: A dictionary which maps the resources that have stashes to the UUIDs of the stashed links
@@ -138,5 +145,7 @@ def identify_circular_references(root: etree._Element) -> tuple[dict[str, list[s
     """
     resptr_links, xml_links, all_resource_ids = create_info_from_xml_for_graph(root)
     graph, node_to_id, edges = make_graph(resptr_links, xml_links, all_resource_ids)
+    if memory_profiler:
+        memory_profiler.snapshot("build_graph", rustworkx_graph=graph, edges=edges)
     stash_lookup, upload_order, _ = generate_upload_order(graph, node_to_id, edges)
     return stash_lookup, upload_order
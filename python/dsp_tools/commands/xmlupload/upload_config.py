@@ -8,6 +8,7 @@ from pathlib import Path
 import regex
 
 from dsp_tools.utils.create_logger import get_logger
+from dsp_tools.utils.request_timeline import TimelineFormat
 
 logger = get_logger(__name__)
 
@@ -39,9 +40,17 @@ class DiagnosticsConfig:
     """Configures all diagnostics for a given upload."""
 
     verbose: bool = False
+    quiet: bool = False
+    memory_diagnostics: bool = False
+    request_timeline: TimelineFormat | None = None
+    record_connection: bool = False
     server_as_foldername: str = "unknown"
     save_location: Path = field(default=Path.home() / ".dsp-tools" / "xmluploads")
-    timestamp_str: str = field(default=datetime.now().strftime("%Y-%m-%d_%H%M%S"))
+    # taken per upload, with microseconds, so that the jobs of "dsp-tools serve" don't write into the same files
+    timestamp_str: str = field(
+        default_factory=lambda: datetime.now().strftime("%Y-%m-%d_%H%M%S_%f"),
+        compare=False,
+    )
 
 
 @dataclass(frozen=True)
@@ -49,6 +58,8 @@ class UploadConfig:
     """Configuration for the upload process."""
 
     media_previously_uploaded: bool = False
+    list_snapshot: bool = False
+    cache_get_requests: bool = False
     server: str = "unknown"
     shortcode: str = "unknown"
     diagnostics: DiagnosticsConfig = field(default_factory=DiagnosticsConfig)
@@ -8,7 +8,9 @@ from typing import Any
 from lxml import etree
 
 from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig
+from dsp_tools.utils.connection_recording import ConnectionRecorder
 from dsp_tools.utils.create_logger import get_logger
+from dsp_tools.utils.request_timeline import RequestTimeline
 
 logger = get_logger(__name__)
 
@@ -30,3 +32,18 @@ def write_id2iri_mapping(
         json.dump(id2iri_mapping, f, ensure_ascii=False, indent=4)
         print(f"{datetime.now()}: The mapping of internal IDs to IRIs was written to {id2iri_filename}")
         logger.info(f"The mapping of internal IDs to IRIs was written to {id2iri_filename}")
+
+
+def write_request_timeline(timeline: RequestTimeline, diagnostics: DiagnosticsConfig) -> None:
+    """Writes the timeline of the HTTP requests into the diagnostics folder, in the configured format."""
+    if not diagnostics.request_timeline:
+        return
+    extension = "jsonl" if diagnostics.request_timeline == "jsonl" else "json"
+    filename = f"{diagnostics.timestamp_str}_request_timeline_{diagnostics.server_as_foldername}.{extension}"
+    timeline.export(diagnostics.save_location / filename, diagnostics.request_timeline)
+
+
+def write_connection_recording(recorder: ConnectionRecorder, diagnostics: DiagnosticsConfig) -> None:
+    """Writes the recorded requests and responses into the diagnostics folder, so that they can be replayed."""
+    filename = f"{diagnostics.timestamp_str}_connection_recording_{diagnostics.server_as_foldername}.json"
+    recorder.save(diagnostics.save_location / filename)
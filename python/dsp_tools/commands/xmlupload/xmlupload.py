@@ -4,15 +4,15 @@ import json
 import sys
 from dataclasses import asdict
 from datetime import datetime
-from logging import FileHandler
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Callable, Union
 
 from lxml import etree
 
 from dsp_tools.commands.xmlupload.check_consistency_with_ontology import do_xml_consistency_check
 from dsp_tools.commands.xmlupload.iri_resolver import IriResolver
 from dsp_tools.commands.xmlupload.list_client import ListClient, ListClientLive
+from dsp_tools.commands.xmlupload.memory_diagnostics import MemoryProfiler
 from dsp_tools.commands.xmlupload.models.permission import Permissions
 from dsp_tools.commands.xmlupload.models.sipi import Sipi
 from dsp_tools.commands.xmlupload.models.xmlpermission import XmlPermission
@@ -30,13 +30,21 @@ from dsp_tools.commands.xmlupload.stash.stash_models import Stash
 from dsp_tools.commands.xmlupload.stash.upload_stashed_resptr_props import upload_stashed_resptr_props
 from dsp_tools.commands.xmlupload.stash.upload_stashed_xml_texts import upload_stashed_xml_texts
 from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig, UploadConfig
-from dsp_tools.commands.xmlupload.write_diagnostic_info import write_id2iri_mapping
+from dsp_tools.commands.xmlupload.write_diagnostic_info import (
+    write_connection_recording,
+    write_id2iri_mapping,
+    write_request_timeline,
+)
 from dsp_tools.models.exceptions import BaseError, UserError
 from dsp_tools.models.projectContext import ProjectContext
 from dsp_tools.utils.connection import Connection
 from dsp_tools.utils.connection_live import ConnectionLive
-from dsp_tools.utils.create_logger import get_logger
+from dsp_tools.utils.connection_recording import ConnectionRecorder
+from dsp_tools.utils.create_logger import get_logfile_path, get_logger
+from dsp_tools.utils.get_cache import GetCache
 from dsp_tools.utils.json_ld_util import get_json_ld_context_for_project
+from dsp_tools.utils.progress_reporter import ProgressReporter
+from dsp_tools.utils.request_timeline import RequestTimeline
 
 logger = get_logger(__name__)
 
@@ -49,6 +57,7 @@ def xmlupload(
     imgdir: str,
     sipi: str,
     config: UploadConfig = UploadConfig(),
+    media_resolver: Callable[[str], str | None] | None = None,
 ) -> bool:
     """
     This function reads an XML file and imports the data described in it onto the DSP server.
@@ -61,6 +70,10 @@ def xmlupload(
         imgdir: the image directory
         sipi: the sipi instance to be used
         config: the upload configuration
+        media_resolver: only together with media_previously_uploaded:
+            maps the path in the <bitstream> tag to the internal filename of the uploaded file
+            (or None if the file could not be uploaded).
+            It is called right before the resource is created, and may block until the file is uploaded.
 
     Raises:
         BaseError: in case of permanent network or software failure
@@ -70,58 +83,87 @@ def xmlupload(
         True if all resources could be uploaded without errors; False if one of the resources could not be
         uploaded because there is an error in it
     """
-    default_ontology, root, shortcode = validate_and_parse_xml_file(
-        input_file=input_file,
-        imgdir=imgdir,
-        preprocessing_done=config.media_previously_uploaded,
-    )
-
-    config = config.with_server_info(
-        server=server,
-        shortcode=shortcode,
-        onto_name=default_ontology,
-    )
+    memory_profiler = MemoryProfiler(enabled=config.diagnostics.memory_diagnostics)
+    memory_profiler.start()
+    try:
+        default_ontology, root, shortcode = validate_and_parse_xml_file(
+            input_file=input_file,
+            imgdir=imgdir,
+            preprocessing_done=config.media_previously_uploaded,
+        )
+        memory_profiler.snapshot("parse_xml", xml_tree=root)
 
-    # establish connection to DSP server
-    con = ConnectionLive(server)
-    con.login(user, password)
-    sipi_con = ConnectionLive(sipi, token=con.get_token())
-    sipi_server = Sipi(sipi_con)
+        config = config.with_server_info(
+            server=server,
+            shortcode=shortcode,
+            onto_name=default_ontology,
+        )
 
-    ontology_client = OntologyClientLive(
-        con=con,
-        shortcode=shortcode,
-        default_ontology=default_ontology,
-        save_location=config.diagnostics.save_location,
-    )
-    do_xml_consistency_check(onto_client=ontology_client, root=root)
+        # establish connection to DSP server
+        timeline = RequestTimeline() if config.diagnostics.request_timeline else None
+        get_cache = GetCache() if config.cache_get_requests else None
+        con: Connection = ConnectionLive(server, timeline=timeline, get_cache=get_cache)
+        con.login(user, password)
+        sipi_con: Connection = ConnectionLive(sipi, token=con.get_token(), timeline=timeline)
+        recorder = None
+        if config.diagnostics.record_connection:
+            recorder = ConnectionRecorder(con)
+            con = recorder
+            sipi_con = ConnectionRecorder(sipi_con, exchanges=recorder.exchanges)
+        sipi_server = Sipi(sipi_con)
+
+        ontology_client = OntologyClientLive(
+            con=con,
+            shortcode=shortcode,
+            default_ontology=default_ontology,
+            save_location=config.diagnostics.save_location,
+        )
+        do_xml_consistency_check(onto_client=ontology_client, root=root)
+        memory_profiler.snapshot("consistency_check", xml_tree=root)
 
-    resources, permissions_lookup, stash = _prepare_upload(
-        root=root,
-        con=con,
-        default_ontology=default_ontology,
-        verbose=config.diagnostics.verbose,
-    )
+        resources, permissions_lookup, stash = _prepare_upload(
+            root=root,
+            con=con,
+            default_ontology=default_ontology,
+            verbose=config.diagnostics.verbose,
+            memory_profiler=memory_profiler,
+        )
 
-    project_client: ProjectClient = ProjectClientLive(con, config.shortcode)
-    if default_ontology not in project_client.get_ontology_name_dict():
-        raise UserError(
-            f"The default ontology '{default_ontology}' "
-            "specified in the XML file is not part of the project on the DSP server."
+        project_client: ProjectClient = ProjectClientLive(con, config.shortcode)
+        if default_ontology not in project_client.get_ontology_name_dict():
+            raise UserError(
+                f"The default ontology '{default_ontology}' "
+                "specified in the XML file is not part of the project on the DSP server."
+            )
+        list_client: ListClient = ListClientLive(
+            con=con,
+            project_iri=project_client.get_project_iri(),
+            snapshot_file=config.diagnostics.save_location / "list_snapshot.json" if config.list_snapshot else None,
         )
-    list_client: ListClient = ListClientLive(con, project_client.get_project_iri())
 
-    iri_resolver, failed_uploads = _upload(
-        resources=resources,
-        imgdir=imgdir,
-        sipi_server=sipi_server,
-        permissions_lookup=permissions_lookup,
-        con=con,
-        stash=stash,
-        config=config,
-        project_client=project_client,
-        list_client=list_client,
-    )
+        try:
+            iri_resolver, failed_uploads = _upload(
+                resources=resources,
+                imgdir=imgdir,
+                sipi_server=sipi_server,
+                permissions_lookup=permissions_lookup,
+                con=con,
+                stash=stash,
+                config=config,
+                project_client=project_client,
+                list_client=list_client,
+                memory_profiler=memory_profiler,
+                media_resolver=media_resolver,
+            )
+        finally:
+            if timeline:
+                write_request_timeline(timeline, config.diagnostics)
+            if recorder:
+                write_connection_recording(recorder, config.diagnostics)
+            if get_cache:
+                logger.info(get_cache.stats())
+    finally:
+        memory_profiler.write_report(config.diagnostics)
 
     write_id2iri_mapping(iri_resolver.lookup, input_file, config.diagnostics)
     success = not failed_uploads
@@ -139,11 +181,12 @@ def _prepare_upload(
     con: Connection,
     default_ontology: str,
     verbose: bool,
+    memory_profiler: MemoryProfiler | None = None,
 ) -> tuple[list[XMLResource], dict[str, Permissions], Stash | None]:
     logger.info("Checking resources for circular references...")
     if verbose:
         print(f"{datetime.now()}: Checking resources for circular references...")
-    stash_lookup, upload_order = identify_circular_references(root)
+    stash_lookup, upload_order = identify_circular_references(root, memory_profiler)
     logger.info("Get data from XML...")
     resources, permissions_lookup = _get_data_from_xml(
         con=con,
@@ -156,6 +199,14 @@ def _prepare_upload(
     if verbose:
         print(f"{datetime.now()}: Stashing circular references...")
     stash = stash_circular_references(resources, stash_lookup, permissions_lookup)
+    if memory_profiler:
+        memory_profiler.snapshot(
+            "prepare_upload",
+            xml_tree=root,
+            resources=resources,
+            permissions_lookup=permissions_lookup,
+            stash=stash,
+        )
     return resources, permissions_lookup, stash
 
 
@@ -169,6 +220,8 @@ def _upload(
     config: UploadConfig,
     project_client: ProjectClient,
     list_client: ListClient,
+    memory_profiler: MemoryProfiler | None = None,
+    media_resolver: Callable[[str], str | None] | None = None,
 ) -> tuple[IriResolver, list[str]]:
     # upload all resources, then update the resources with the stashed XML texts and resptrs
     failed_uploads: list[str] = []
@@ -184,7 +237,15 @@ def _upload(
             project_client=project_client,
             list_client=list_client,
             id_to_iri_resolver=iri_resolver,
+            media_resolver=media_resolver,
         )
+        if memory_profiler:
+            memory_profiler.snapshot(
+                "upload_resources",
+                resources=resources,
+                stash=stash,
+                iri_resolver_lookup=iri_resolver.lookup,
+            )
         nonapplied_stash = (
             _upload_stash(
                 stash=stash,
@@ -196,6 +257,8 @@ def _upload(
             if stash
             else None
         )
+        if memory_profiler:
+            memory_profiler.snapshot("upload_stash", iri_resolver_lookup=iri_resolver.lookup)
         if nonapplied_stash:
             msg = "Some stashed resptrs or XML texts could not be reapplied to their resources on the DSP server."
             logger.error(msg)
@@ -219,7 +282,7 @@ def _get_data_from_xml(
     root: etree._Element,
     default_ontology: str,
 ) -> tuple[list[XMLResource], dict[str, Permissions]]:
-    proj_context = _get_project_context_from_server(connection=con)
+    proj_context = ProjectContext(con=con)
     permissions = _extract_permissions_from_xml(root, proj_context)
     resources = _extract_resources_from_xml(root, default_ontology)
     permissions_lookup = {name: perm.get_permission_instance() for name, perm in permissions.items()}
@@ -256,32 +319,9 @@ def _upload_stash(
     return Stash.make(nonapplied_standoff, nonapplied_resptr_props)
 
 
-def _get_project_context_from_server(connection: Connection) -> ProjectContext:
-    """
-    This function retrieves the project context previously uploaded on the server (json file)
-
-    Args:
-        connection: connection to the server
-
-    Returns:
-        Project context
-
-    Raises:
-        UserError: If the project was not previously uploaded on the server
-    """
-    try:
-        proj_context = ProjectContext(con=connection)
-    except BaseError:
-        logger.error(
-            "Unable to retrieve project context from DSP server",
-            exc_info=True,
-        )
-        raise UserError("Unable to retrieve project context from DSP server") from None
-    return proj_context
-
-
 def _extract_permissions_from_xml(root: etree._Element, proj_context: ProjectContext) -> dict[str, XmlPermission]:
     permission_ele = list(root.iter(tag="permissions"))
+    proj_context.prefetch_groups({allow.attrib["group"] for allow in root.iter(tag="allow")})
     permissions = [XmlPermission(permission, proj_context) for permission in permission_ele]
     return {permission.permission_id: permission for permission in permissions}
 
@@ -301,6 +341,7 @@ def _upload_resources(
     project_client: ProjectClient,
     list_client: ListClient,
     id_to_iri_resolver: IriResolver,
+    media_resolver: Callable[[str], str | None] | None = None,
 ) -> tuple[IriResolver, list[str]]:
     """
     Iterates through all resources and tries to upload them to DSP.
@@ -317,6 +358,7 @@ def _upload_resources(
         project_client: a client for HTTP communication with the DSP-API
         list_client: a client for HTTP communication with the DSP-API
         id_to_iri_resolver: a resolver for internal IDs to IRIs
+        media_resolver: maps the paths in the <bitstream> tags to the internal filenames of the uploaded files
 
     Returns:
         id2iri_mapping, failed_uploads
@@ -337,25 +379,28 @@ def _upload_resources(
         media_previously_ingested=config.media_previously_uploaded,
     )
 
+    progress = ProgressReporter(total=len(resources), description="Resources", quiet=config.diagnostics.quiet)
     for i, resource in enumerate(resources):
         success, media_info = handle_media_info(
-            resource, config.media_previously_uploaded, sipi_server, imgdir, permissions_lookup
+            resource, config.media_previously_uploaded, sipi_server, imgdir, permissions_lookup, media_resolver
         )
         if not success:
             failed_uploads.append(resource.res_id)
+            progress.failure(f"Failed to upload the file of resource {i+1}/{len(resources)}: '{resource.res_id}'")
             continue
 
         res = _create_resource(resource, media_info, resource_create_client)
         if not res:
             failed_uploads.append(resource.res_id)
+            progress.failure(f"Failed to create resource {i+1}/{len(resources)}: '{resource.res_id}'")
             continue
 
         iri, label = res
         id_to_iri_resolver.update(resource.res_id, iri)
 
         resource_designation = f"'{label}' (ID: '{resource.res_id}', IRI: '{iri}')"
-        print(f"{datetime.now()}: Created resource {i+1}/{len(resources)}: {resource_designation}")
-        logger.info(f"Created resource {i+1}/{len(resources)}: {resource_designation}")
+        progress.success(f"Created resource {i+1}/{len(resources)}: {resource_designation}")
+    progress.finish()
 
     return id_to_iri_resolver, failed_uploads
 
@@ -413,12 +458,12 @@ def _handle_upload_error(
         stash: an object that contains all stashed links that could not be reapplied to their resources
         diagnostics: the diagnostics configuration
     """
-    logfiles = ", ".join([handler.baseFilename for handler in logger.handlers if isinstance(handler, FileHandler)])
+    logfile = get_logfile_path()
     print(
         f"\n==========================================\n"
         f"{datetime.now()}: xmlupload must be aborted because of an error.\n"
         f"Error message: '{err}'\n"
-        f"For more information, see the log file: {logfiles}\n"
+        f"For more information, see the log file: {logfile}\n"
     )
     logger.error("xmlupload must be aborted because of an error", exc_info=err)
 
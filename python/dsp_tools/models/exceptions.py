@@ -86,5 +86,9 @@ class BadCredentialsError(PermanentConnectionError):
     """This error is raised when DSP-API doesn't accept the prodived credentials."""
 
 
+class ResourceNotFoundError(PermanentConnectionError):
+    """This error is raised when DSP-API responds that the requested resource doesn't exist."""
+
+
 class XmlUploadError(BaseError):
     """Represents an error raised in the context of the xmlupload."""
@@ -1,49 +1,127 @@
-from typing import Optional
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NoReturn, Optional
 
 from dsp_tools.commands.project.models.group import Group
 from dsp_tools.commands.project.models.project import Project
-from dsp_tools.models.exceptions import BaseError
+from dsp_tools.models.exceptions import BaseError, ResourceNotFoundError, UserError
 from dsp_tools.utils.connection import Connection
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+_max_concurrent_requests = 4
 
 
 class ProjectContext:
-    """Represents the project context"""
+    """
+    Represents the project context.
+    The projects and groups are retrieved lazily from the server,
+    only for the group names that are actually looked up,
+    and cached for the lifetime of the instance.
+    """
 
-    _projects: list[Project]
-    _inv_project_map: dict[str, str]  # dictionary of (project IRI:project name) pairs
-    _groups: Optional[list[Group]]
-    _group_map: Optional[dict[str, str]]
+    _con: Connection
     _shortcode: Optional[str]
     _project_name: Optional[str]
+    _project_name_retrieved: bool
+    _project_iris: dict[str, Optional[str]]  # dictionary of (project shortname:project IRI) pairs
+    _groups: Optional[list[Group]]
+    _groups_retrieved: bool
+    _group_map: dict[str, Optional[str]]  # dictionary of (project shortname:group name) and (group IRI) pairs
 
     def __init__(self, con: Connection, shortcode: Optional[str] = None):
+        self._con = con
         self._shortcode = shortcode
-        self._projects = Project.getAllProjects(con=con)
-        self._inv_project_map: dict[str, str] = {x.iri: x.shortname for x in self._projects}
-        try:
-            self._groups = Group.getAllGroups(con=con)
-        except BaseError:
-            self._groups = None
-        if self._groups:
-            self._group_map: dict[str, str] = {
-                self._inv_project_map[x.project] + ":" + x.name: x.iri for x in self._groups
-            }
-        else:
-            self._group_map = None
         self._project_name = None
-        # get the project name from the shortcode
-        if self._shortcode:
-            for p in self._projects:
-                if p.shortcode == self._shortcode:
-                    self._project_name = p.shortname
-                    break
+        self._project_name_retrieved = False
+        self._project_iris = {}
+        self._groups = None
+        self._groups_retrieved = False
+        self._group_map = {}
 
-    @property
-    def group_map(self) -> dict[str, str]:
-        """Dictionary of (project:group name) and (group id) pairs of all groups in project"""
-        return self._group_map
+    def prefetch_groups(self, group_names: Iterable[str]) -> None:
+        """
+        Retrieve the projects of the given groups concurrently,
+        so that the subsequent lookups don't need to wait for the server one by one.
+
+        Args:
+            group_names: group names in the form "project shortname:group name"
+
+        Raises:
+            UserError: if the projects could not be retrieved from the DSP server
+        """
+        shortnames = {name.split(":")[0] for name in group_names if ":" in name}
+        shortnames = {x for x in shortnames if x and x != "knora-admin" and x not in self._project_iris}
+        if not shortnames:
+            return
+        with ThreadPoolExecutor(max_workers=_max_concurrent_requests) as pool:
+            project_iris = dict(zip(shortnames, pool.map(self._get_project_iri_from_server, shortnames)))
+        self._project_iris.update(project_iris)
+
+    def get_group_iri(self, group_name: str) -> Optional[str]:
+        """
+        Get the IRI of a group.
+
+        Args:
+            group_name: group name in the form "project shortname:group name"
+
+        Raises:
+            UserError: if the projects or groups could not be retrieved from the DSP server
+
+        Returns:
+            the IRI of the group, or None if the project or the group doesn't exist
+        """
+        if group_name not in self._group_map:
+            self._group_map[group_name] = self._resolve_group(group_name)
+        return self._group_map[group_name]
 
     @property
     def project_name(self) -> Optional[str]:
         """Name of the project"""
+        if self._shortcode and not self._project_name_retrieved:
+            try:
+                self._project_name = Project(con=self._con, shortcode=self._shortcode).read().shortname
+            except ResourceNotFoundError:
+                logger.warning(f"There is no project with shortcode {self._shortcode} on the DSP server")
+            except (BaseError, KeyError):
+                _raise_unable_to_retrieve_project_context()
+            self._project_name_retrieved = True
         return self._project_name
+
+    def _resolve_group(self, group_name: str) -> Optional[str]:
+        shortname, _, name = group_name.partition(":")
+        if shortname not in self._project_iris:
+            self._project_iris[shortname] = self._get_project_iri_from_server(shortname)
+        if not (project_iri := self._project_iris[shortname]):
+            return None
+        groups = self._get_groups_from_server()
+        return next((g.iri for g in groups if g.project == project_iri and g.name == name), None)
+
+    def _get_project_iri_from_server(self, shortname: str) -> Optional[str]:
+        try:
+            return Project(con=self._con, shortname=shortname).read().iri
+        except ResourceNotFoundError:
+            logger.warning(f"There is no project with shortname {shortname} on the DSP server")
+            return None
+        except (BaseError, KeyError):
+            _raise_unable_to_retrieve_project_context()
+
+    def _get_groups_from_server(self) -> list[Group]:
+        # DSP-API has no route for the groups of a single project, so all groups are retrieved once
+        if not self._groups_retrieved:
+            try:
+                self._groups = Group.getAllGroups(con=self._con)
+            except ResourceNotFoundError:
+                logger.warning("There are no groups on the DSP server")
+                self._groups = None
+            except (BaseError, KeyError):
+                _raise_unable_to_retrieve_project_context()
+            self._groups_retrieved = True
+        return self._groups or []
+
+
+def _raise_unable_to_retrieve_project_context() -> NoReturn:
+    logger.error("Unable to retrieve project context from DSP server", exc_info=True)
+    raise UserError("Unable to retrieve project context from DSP server") from None
@@ -1,22 +1,36 @@
 import json
+import logging
 import os
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from functools import partial
 from importlib.metadata import version
-from typing import Any, Literal, Optional, cast
+from typing import Any, Callable, Literal, Optional, cast
 
 import regex
-from requests import JSONDecodeError, ReadTimeout, RequestException, Response, Session
+from requests import ReadTimeout, RequestException, Response, Session
 from urllib3.exceptions import ReadTimeoutError
 
-from dsp_tools.models.exceptions import BadCredentialsError, BaseError, PermanentConnectionError, UserError
-from dsp_tools.utils.create_logger import get_logger
+from dsp_tools.models.exceptions import (
+    BadCredentialsError,
+    BaseError,
+    PermanentConnectionError,
+    ResourceNotFoundError,
+    UserError,
+)
+from dsp_tools.utils.create_logger import get_logger, should_log_payload, truncate_payload
+from dsp_tools.utils.get_cache import GetCache
+from dsp_tools.utils.request_timeline import RequestSpan, RequestTimeline
 from dsp_tools.utils.set_encoder import SetEncoder
+from dsp_tools.utils.token_cache import TokenCache
 
 HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
 HTTP_UNAUTHORIZED = 401
+HTTP_NOT_FOUND = 404
+
+_sensitive_json_fields = regex.compile(rb'"(password|token)"\s*:\s*"((?:[^"\\]|\\.)*)"')
 
 logger = get_logger(__name__)
 
@@ -39,6 +53,17 @@ class RequestParameters:
         # where the content-length of the request will turn out to be different from the actual length.
         return json.dumps(payload, cls=SetEncoder, ensure_ascii=False).encode("utf-8") if payload else None
 
+    def payload_size(self) -> int:
+        """Size of the request body in bytes (serialized payload and/or files)."""
+        size = len(self.data_serialized) if self.data_serialized else 0
+        for _, fileobj in (self.files or {}).values():
+            try:
+                size += os.fstat(fileobj.fileno()).st_size
+            except (AttributeError, OSError):
+                # not a real file, e.g. an in-memory buffer
+                continue
+        return size
+
     def as_kwargs(self) -> dict[str, Any]:
         return {
             "method": self.method,
@@ -58,10 +83,19 @@ class ConnectionLive:
     Attributes:
         server: address of the server, e.g https://api.dasch.swiss
         token: session token received by the server after login
+        timeline: if provided, every network action is recorded as a span in this timeline
+        get_cache: if provided, the responses of GET requests are cached in it
+        token_cache: if provided, the login reuses a token from an earlier command
+            (by default, it is enabled with the environment variable DSP_TOOLS_TOKEN_CACHE="true")
     """
 
     server: str
     token: Optional[str] = None
+    timeline: RequestTimeline | None = None
+    get_cache: GetCache | None = None
+    token_cache: TokenCache | None = field(default_factory=TokenCache.from_env)
+    # kept to log in again if the server rejects a cached token
+    _credentials: tuple[str, str] | None = field(init=False, default=None, repr=False)
     session: Session = field(init=False, default=Session())
     # downtimes of server-side services -> API still processes request
     # -> retry too early has side effects (e.g. duplicated resources)
@@ -74,6 +108,7 @@ class ConnectionLive:
     def login(self, email: str, password: str) -> None:
         """
         Retrieve a session token and store it as class attribute.
+        If a token cache is configured, a valid token of an earlier login with the same credentials is reused.
 
         Args:
             email: email address of the user
@@ -82,6 +117,32 @@ class ConnectionLive:
         Raises:
             UserError: if DSP-API returns no token with the provided user credentials
         """
+        if not self.token_cache:
+            self._login_on_server(email, password)
+            return
+        self._credentials = (email, password)
+        if token := self.token_cache.get(self.server, email, password):
+            logger.info(f"Reusing the cached token of user {email} on server {self.server}")
+            self._set_token(token)
+            return
+        self._login_on_server(email, password)
+        self.token_cache.put(self.server, email, password, self.get_token())
+
+    def _relogin(self) -> bool:
+        """Log in again after the server rejected a cached token. Returns False if that isn't possible."""
+        if not self.token_cache or not self._credentials:
+            return False
+        email, password = self._credentials
+        logger.info(f"The cached token of user {email} was rejected by the server, logging in again")
+        self.token_cache.remove(self.server, email, password)
+        self._login_on_server(email, password)
+        self.token_cache.put(self.server, email, password, self.get_token())
+        return True
+
+    def _set_token(self, token: str) -> None:
+        self.token = token
+
+    def _login_on_server(self, email: str, password: str) -> None:
         try:
             response = self.post(
                 route="/v2/authentication",
@@ -94,16 +155,17 @@ class ConnectionLive:
             raise UserError(e.message) from None
         if not response.get("token"):
             raise UserError("Unable to retrieve a token from the server with the provided credentials.")
-        self.token = response["token"]
-        self.session.headers["Authorization"] = f"Bearer {self.token}"
+        self._set_token(response["token"])
 
     def logout(self) -> None:
         """
-        Delete the token on the server and in this class.
+        Delete the token on the server and in this class (and in the token cache, if there is one).
         """
         if self.token:
             self.delete(route="/v2/authentication")
             self.token = None
+            if self.token_cache and self._credentials:
+                self.token_cache.remove(self.server, *self._credentials)
 
     def get_token(self) -> str:
         """
@@ -142,6 +204,7 @@ class ConnectionLive:
 
         Raises:
             PermanentConnectionError: if the server returns a permanent error
+            ResourceNotFoundError: if the server returns a 404 status code
         """
         if data:
             headers = headers or {}
@@ -151,6 +214,8 @@ class ConnectionLive:
             "POST", self._make_url(route), timeout or self.timeout_put_post, data, headers, files
         )
         response = self._try_network_action(params)
+        if self.get_cache:
+            self.get_cache.invalidate(route)
         return cast(dict[str, Any], response.json())
 
     def get(
@@ -160,6 +225,7 @@ class ConnectionLive:
     ) -> dict[str, Any]:
         """
         Make an HTTP GET request to the server to which this connection has been established.
+        If a GET cache is configured, the response is served from it if possible.
 
         Args:
             route: route that will be called on the server
@@ -171,10 +237,30 @@ class ConnectionLive:
         Raises:
             PermanentConnectionError: if the server returns a permanent error
         """
+        if self.get_cache:
+            return self._cached_get(self.get_cache, route, headers)
         params = RequestParameters("GET", self._make_url(route), self.timeout_get_delete, headers=headers)
         response = self._try_network_action(params)
         return cast(dict[str, Any], response.json())
 
+    def _cached_get(self, cache: GetCache, route: str, headers: dict[str, str] | None) -> dict[str, Any]:
+        key = cache.make_key(route, headers)
+        if (content := cache.get_fresh(key)) is not None:
+            return cast(dict[str, Any], json.loads(content))
+        request_headers = headers
+        if etag := cache.get_etag(key):
+            request_headers = (headers or {}) | {"If-None-Match": etag}
+        params = RequestParameters("GET", self._make_url(route), self.timeout_get_delete, headers=request_headers)
+        response = self._try_network_action(params)
+        if response.status_code == HTTP_NOT_MODIFIED:
+            if (content := cache.revalidate(key)) is not None:
+                return cast(dict[str, Any], json.loads(content))
+            # the entry was evicted in the meantime by another thread
+            params = RequestParameters("GET", self._make_url(route), self.timeout_get_delete, headers=headers)
+            response = self._try_network_action(params)
+        cache.store(key, response.content, response.headers.get("ETag"))
+        return cast(dict[str, Any], response.json())
+
     def put(
         self,
         route: str,
@@ -201,6 +287,8 @@ class ConnectionLive:
                 headers["Content-Type"] = "application/json; charset=UTF-8"
         params = RequestParameters("PUT", self._make_url(route), self.timeout_put_post, data, headers)
         response = self._try_network_action(params)
+        if self.get_cache:
+            self.get_cache.invalidate(route)
         return cast(dict[str, Any], response.json())
 
     def delete(
@@ -223,6 +311,8 @@ class ConnectionLive:
         """
         params = RequestParameters("DELETE", self._make_url(route), self.timeout_get_delete, headers=headers)
         response = self._try_network_action(params)
+        if self.get_cache:
+            self.get_cache.invalidate(route)
         return cast(dict[str, Any], response.json())
 
     def _make_url(self, route: str) -> str:
@@ -236,69 +326,128 @@ class ConnectionLive:
         If a timeout error, a ConnectionError, or a requests.RequestException occur,
         or if the response indicates that there is a non-permanent server-side problem,
         this function waits and retries the HTTP request.
+        A GET request for a resource that doesn't exist (404) is not retried.
         The waiting times are 1, 2, 4, 8, 16, 32, 64 seconds.
+        If the server rejects a cached token, this function logs in again and retries the HTTP request once.
 
         Args:
             params: keyword arguments for the HTTP request
 
         Raises:
             BadCredentialsError: if the server returns a 401 status code on the route /v2/authentication
+            ResourceNotFoundError: if the server returns a 404 status code on a GET request
             PermanentConnectionError: if the server returns a permanent error
             unexpected exceptions: if the action fails with an unexpected exception
 
         Returns:
             the return value of action
         """
-        action = partial(self.session.request, **params.as_kwargs())
-        for i in range(7):
-            try:
-                self._log_request(params)
-                response = action()
-            except (TimeoutError, ReadTimeout, ReadTimeoutError):
-                self._log_and_sleep(reason="Timeout Error", retry_counter=i, exc_info=True)
-                continue
-            except (ConnectionError, RequestException):
-                self._renew_session()
-                self._log_and_sleep(reason="Connection Error raised", retry_counter=i, exc_info=True)
-                continue
-
-            self._log_response(response)
-            if response.status_code == HTTP_OK:
-                return response
-            elif "v2/authentication" in params.url and response.status_code == HTTP_UNAUTHORIZED:
-                raise BadCredentialsError("Bad credentials")
-            elif not self._in_testing_environment():
-                self._log_and_sleep(reason="Non-200 response code", retry_counter=i, exc_info=False)
-                continue
-            else:
-                msg = "Permanently unable to execute the network action. See logs for more details."
-                raise PermanentConnectionError(msg)
+        self._authorize(params)
+        log_payload = should_log_payload()
+        relogged_in = False
+        span = self.timeline.start_span(params.method, params.url, params.payload_size()) if self.timeline else None
+        try:
+            for i in range(7):
+                action = partial(self.session.request, **params.as_kwargs())
+                try:
+                    self._log_request(params, log_payload)
+                    response = self._send(action, span)
+                except (TimeoutError, ReadTimeout, ReadTimeoutError):
+                    self._log_and_sleep(reason="Timeout Error", retry_counter=i, exc_info=True, span=span)
+                    continue
+                except (ConnectionError, RequestException):
+                    self._renew_session()
+                    self._log_and_sleep(reason="Connection Error raised", retry_counter=i, exc_info=True, span=span)
+                    continue
+
+                self._log_response(response, log_payload)
+                if response.status_code == HTTP_OK:
+                    return response
+                elif response.status_code == HTTP_NOT_MODIFIED and "If-None-Match" in (params.headers or {}):
+                    return response
+                elif "v2/authentication" in params.url and response.status_code == HTTP_UNAUTHORIZED:
+                    raise BadCredentialsError("Bad credentials")
+                elif response.status_code == HTTP_NOT_FOUND and params.method == "GET":
+                    raise ResourceNotFoundError(f"The requested resource does not exist: {params.url}")
+                elif response.status_code == HTTP_UNAUTHORIZED and not relogged_in and self._relogin():
+                    relogged_in = True
+                    self._authorize(params)
+                    continue
+                elif not self._in_testing_environment():
+                    self._log_and_sleep(reason="Non-200 response code", retry_counter=i, exc_info=False, span=span)
+                    continue
+                else:
+                    msg = "Permanently unable to execute the network action. See logs for more details."
+                    raise PermanentConnectionError(msg)
+
+            # after 7 vain attempts to create a response, try it a last time and let it escalate
+            return self._send(partial(self.session.request, **params.as_kwargs()), span)
+        except BaseException as err:
+            if span:
+                span.error = type(err).__name__
+            raise
+        finally:
+            if span and self.timeline:
+                self.timeline.end_span(span)
+
+    def _authorize(self, params: RequestParameters) -> None:
+        # The token is sent with every request instead of being stored in the session,
+        # because the session is shared by all connections of the process,
+        # which may belong to different users and servers (e.g. the concurrent jobs of "dsp-tools serve").
+        if self.token:
+            params.headers = (params.headers or {}) | {"Authorization": f"Bearer {self.token}"}
 
-        # after 7 vain attempts to create a response, try it a last time and let it escalate
-        return action()
+    def _send(self, action: Callable[[], Response], span: RequestSpan | None) -> Response:
+        if not span or not self.timeline:
+            return action()
+        start = self.timeline.now()
+        try:
+            response = action()
+            span.status_code = response.status_code
+            return response
+        finally:
+            span.attempts.append((start, self.timeline.now()))
+            span.retry_count = len(span.attempts) - 1
 
     def _renew_session(self) -> None:
         self.session.close()
         self.session = Session()
-        self.session.headers["Authorization"] = f"Bearer {self.token}"
+        self.session.headers["User-Agent"] = f'DSP-TOOLS/{version("dsp-tools")}'
 
-    def _log_and_sleep(self, reason: str, retry_counter: int, exc_info: bool) -> None:
+    def _log_and_sleep(
+        self,
+        reason: str,
+        retry_counter: int,
+        exc_info: bool,
+        span: RequestSpan | None = None,
+    ) -> None:
         msg = f"{reason}: Try reconnecting to DSP server, next attempt in {2 ** retry_counter} seconds..."
         print(f"{datetime.now()}: {msg}")
         logger.error(f"{msg} ({retry_counter=:})", exc_info=exc_info)
+        if not span or not self.timeline:
+            time.sleep(2**retry_counter)
+            return
+        start = self.timeline.now()
         time.sleep(2**retry_counter)
-
-    def _log_response(self, response: Response) -> None:
-        try:
-            content = self._anonymize(response.json())
-        except JSONDecodeError:
-            content = {"content": response.text}
+        end = self.timeline.now()
+        span.backoffs.append((start, end))
+        span.backoff_seconds += end - start
+
+    def _log_response(self, response: Response, log_payload: bool) -> None:
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if not log_payload:
+            logger.debug(f"RESPONSE: {response.status_code}")
+            return
+        # a JSON body is logged as it came over the wire, without decoding it into a dict and encoding it again
         dumpobj = {
             "status_code": response.status_code,
             "headers": self._anonymize(dict(response.headers)),
-            "content": content,
         }
-        logger.debug(f"RESPONSE: {json.dumps(dumpobj)}")
+        msg = json.dumps(dumpobj)
+        if response.content:
+            msg = f'{msg[:-1]}, "content": {self._redact_response_content(response)}}}'
+        logger.debug(f"RESPONSE: {truncate_payload(msg)}")
 
     def _anonymize(self, data: dict[str, Any] | None) -> dict[str, Any] | None:
         if not data:
@@ -315,6 +464,27 @@ class ConnectionLive:
             data["password"] = "*" * len(data["password"])
         return data
 
+    def _redact(self, payload: bytes) -> str:
+        """Mask the passwords and tokens in a serialized JSON payload, at any nesting level."""
+
+        def _mask_match(match: regex.Match[bytes]) -> bytes:
+            key: bytes = match.group(1)
+            value: str = match.group(2).decode("utf-8", errors="replace")
+            masked = "*" * len(value) if key == b"password" else self._mask(value)
+            return b'"' + key + b'": "' + masked.encode("utf-8") + b'"'
+
+        redacted: bytes = _sensitive_json_fields.sub(_mask_match, payload)
+        return redacted.decode("utf-8", errors="replace")
+
+    def _redact_response_content(self, response: Response) -> str:
+        """Redact a JSON body, or wrap any other body into a JSON object, so that the log line stays valid JSON."""
+        redacted = self._redact(response.content)
+        media_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        if media_type.endswith("json"):
+            # e.g. application/json or application/ld+json
+            return redacted
+        return json.dumps({"content": redacted}, ensure_ascii=False)
+
     def _mask(self, sensitive_info: str) -> str:
         unmasked_until = 5
         if len(sensitive_info) <= unmasked_until * 2:
@@ -326,15 +496,22 @@ class ConnectionLive:
         in_testing_env = os.getenv("DSP_TOOLS_TESTING")  # set in .github/workflows/tests-on-push.yml
         return in_testing_env == "true"
 
-    def _log_request(self, params: RequestParameters) -> None:
+    def _log_request(self, params: RequestParameters, log_payload: bool) -> None:
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if not log_payload:
+            logger.debug(f"REQUEST: {params.method} {params.url}")
+            return
         dumpobj = {
             "method": params.method,
             "url": params.url,
             "headers": self._anonymize(dict(self.session.headers) | (params.headers or {})),
             "timeout": params.timeout,
         }
-        if params.data:
-            dumpobj["data"] = self._anonymize(params.data)
         if params.files:
             dumpobj["files"] = params.files["file"][0]
-        logger.debug(f"REQUEST: {json.dumps(dumpobj, cls=SetEncoder)}")
+        msg = json.dumps(dumpobj)
+        if params.data_serialized:
+            # reuse the bytes that are sent over the wire, instead of serializing the payload a second time
+            msg = f'{msg[:-1]}, "data": {self._redact(params.data_serialized)}}}'
+        logger.debug(f"REQUEST: {truncate_payload(msg)}")
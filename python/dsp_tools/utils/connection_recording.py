@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from dsp_tools.models.exceptions import BadCredentialsError, BaseError, PermanentConnectionError, UserError
+from dsp_tools.utils.connection import Connection
+from dsp_tools.utils.create_logger import get_logger
+from dsp_tools.utils.request_timeline import make_route_template
+from dsp_tools.utils.set_encoder import SetEncoder
+
+logger = get_logger(__name__)
+
+_replayable_errors: dict[str, type[BaseError]] = {
+    cls.__name__: cls for cls in (BaseError, UserError, PermanentConnectionError, BadCredentialsError)
+}
+
+
+@dataclass
+class RecordedExchange:
+    """
+    One call of a connection method, together with its outcome.
+    Credentials and tokens are never recorded.
+    """
+
+    method: str
+    route: str
+    duration: float
+    data: dict[str, Any] | None = None
+    files: list[str] | None = None
+    response: dict[str, Any] | None = None
+    error_type: str | None = None
+    error_message: str | None = None
+
+
+@dataclass
+class ConnectionRecorder:
+    """
+    Wraps a connection and records all request/response pairs that go through it,
+    so that a real session can later be replayed offline with ConnectionReplay.
+    Several recorders can share the same list of exchanges (e.g. the connections to DSP-API and to SIPI).
+    """
+
+    con: Connection
+    exchanges: list[RecordedExchange] = field(default_factory=list)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def get(
+        self,
+        route: str,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        return self._record("GET", route, None, None, lambda: self.con.get(route, headers=headers))
+
+    def put(
+        self,
+        route: str,
+        data: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        return self._record("PUT", route, data, None, lambda: self.con.put(route, data=data, headers=headers))
+
+    def post(
+        self,
+        route: str,
+        data: dict[str, Any] | None = None,
+        files: dict[str, tuple[str, Any]] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: int | None = None,
+    ) -> dict[str, Any]:
+        filenames = [name for name, _ in files.values()] if files else None
+        return self._record(
+            "POST",
+            route,
+            data,
+            filenames,
+            lambda: self.con.post(route, data=data, files=files, headers=headers, timeout=timeout),
+        )
+
+    def delete(
+        self,
+        route: str,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        return self._record("DELETE", route, None, None, lambda: self.con.delete(route, headers=headers))
+
+    def get_token(self) -> str:
+        return self.con.get_token()
+
+    def login(self, email: str, password: str) -> None:
+        self.con.login(email, password)
+
+    def logout(self) -> None:
+        self.con.logout()
+
+    def save(self, filepath: Path) -> None:
+        """
+        Write the recorded exchanges into a JSON file.
+
+        Args:
+            filepath: the file to write to
+        """
+        with self._lock:
+            exchanges = [asdict(x) for x in self.exchanges]
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(exchanges, f, cls=SetEncoder, ensure_ascii=False, indent=1)
+        print(f"{datetime.now()}: The recording of the connection was written to {filepath}")
+        logger.info(f"The recording of {len(exchanges)} requests was written to {filepath}")
+
+    def _record(
+        self,
+        method: str,
+        route: str,
+        data: dict[str, Any] | None,
+        files: list[str] | None,
+        action: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        exchange = RecordedExchange(method=method, route=route, duration=0.0, data=data, files=files)
+        start = time.perf_counter()
+        try:
+            exchange.response = action()
+            return exchange.response
+        except BaseError as err:
+            exchange.error_type = type(err).__name__
+            exchange.error_message = err.message
+            raise
+        finally:
+            exchange.duration = time.perf_counter() - start
+            with self._lock:
+                self.exchanges.append(exchange)
+
+
+@dataclass
+class ConnectionReplay:
+    """
+    Serves the exchanges of a recorded session back, without a server.
+
+    The requests are matched by HTTP method and route template (see make_route_template()),
+    in the order in which they were recorded.
+    This is robust against the IRIs and UUIDs that differ from one run to the other.
+
+    Attributes:
+        exchanges: the recorded exchanges
+        time_scale: factor for the recorded durations: 1 replays the original timings,
+            0 answers immediately (to measure the client-side CPU cost only)
+    """
+
+    exchanges: list[RecordedExchange]
+    time_scale: float = 1.0
+    token: str = "replayed-token"
+    _queues: dict[tuple[str, str], deque[RecordedExchange]] = field(init=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self._queues = defaultdict(deque)
+        for exchange in self.exchanges:
+            self._queues[exchange.method, make_route_template(exchange.route)].append(exchange)
+
+    @staticmethod
+    def from_file(filepath: Path, time_scale: float = 1.0) -> ConnectionReplay:
+        """
+        Load a recording that was written by ConnectionRecorder.save().
+
+        Args:
+            filepath: the recording
+            time_scale: factor for the recorded durations
+
+        Returns:
+            a connection that replays the recording
+        """
+        with open(filepath, encoding="utf-8") as f:
+            exchanges = [RecordedExchange(**x) for x in json.load(f)]
+        return ConnectionReplay(exchanges, time_scale=time_scale)
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded exchanges that have not been replayed yet."""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def get(
+        self,
+        route: str,
+        headers: dict[str, str] | None = None,  # noqa: ARG002 (unused-method-argument)
+    ) -> dict[str, Any]:
+        return self._replay("GET", route)
+
+    def put(
+        self,
+        route: str,
+        data: dict[str, Any] | None = None,  # noqa: ARG002 (unused-method-argument)
+        headers: dict[str, str] | None = None,  # noqa: ARG002 (unused-method-argument)
+    ) -> dict[str, Any]:
+        return self._replay("PUT", route)
+
+    def post(
+        self,
+        route: str,
+        data: dict[str, Any] | None = None,  # noqa: ARG002 (unused-method-argument)
+        files: dict[str, tuple[str, Any]] | None = None,  # noqa: ARG002 (unused-method-argument)
+        headers: dict[str, str] | None = None,  # noqa: ARG002 (unused-method-argument)
+        timeout: int | None = None,  # noqa: ARG002 (unused-method-argument)
+    ) -> dict[str, Any]:
+        return self._replay("POST", route)
+
+    def delete(
+        self,
+        route: str,
+        headers: dict[str, str] | None = None,  # noqa: ARG002 (unused-method-argument)
+    ) -> dict[str, Any]:
+        return self._replay("DELETE", route)
+
+    def get_token(self) -> str:
+        return self.token
+
+    def login(self, email: str, password: str) -> None:
+        pass
+
+    def logout(self) -> None:
+        pass
+
+    def _replay(self, method: str, route: str) -> dict[str, Any]:
+        key = method, make_route_template(route)
+        with self._lock:
+            queue = self._queues.get(key)
+            exchange = queue.popleft() if queue else None
+        if not exchange:
+            raise BaseError(f"The recording contains no further response for {method} {key[1]}")
+        if self.time_scale:
+            time.sleep(exchange.duration * self.time_scale)
+        if exchange.error_type:
+            error_cls = _replayable_errors.get(exchange.error_type, BaseError)
+            raise error_cls(exchange.error_message or "")
+        return exchange.response or {}
@@ -1,9 +1,128 @@
+from __future__ import annotations
+
+import atexit
 import logging
 import logging.handlers
+import os
+import queue
+import random
+from dataclasses import dataclass
 from pathlib import Path
 
-# the handler must live on module level, so that it is created only once
-_rotating_file_handler: logging.handlers.RotatingFileHandler | None = None
+# the handlers must live on module level, so that they are created only once
+_queue_handler: logging.handlers.QueueHandler | None = None
+_queue_listener: logging.handlers.QueueListener | None = None
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    """
+    Configures how much is written into the logfile.
+    The defaults can be overridden with environment variables,
+    because the loggers are created at import time, before the CLI arguments are parsed.
+
+    Attributes:
+        level: level of all DSP-TOOLS loggers (env: DSP_TOOLS_LOG_LEVEL, e.g. "INFO")
+        log_payloads: log the headers and bodies of the HTTP requests and responses
+            (env: DSP_TOOLS_LOG_PAYLOADS="true")
+        payload_sample_rate: share of the HTTP requests (0..1) whose payloads are logged
+            (env: DSP_TOOLS_LOG_PAYLOAD_SAMPLE_RATE)
+        max_payload_chars: logged payloads are truncated to this length (env: DSP_TOOLS_LOG_PAYLOAD_MAX_CHARS)
+        filesize_mb: maximum size of a logfile in MB (env: DSP_TOOLS_LOG_FILESIZE_MB)
+        backupcount: number of logfiles to keep (env: DSP_TOOLS_LOG_BACKUPCOUNT)
+    """
+
+    level: int = logging.DEBUG
+    log_payloads: bool = False
+    payload_sample_rate: float = 1.0
+    max_payload_chars: int = 10_000
+    filesize_mb: int = 100
+    backupcount: int = 30
+
+    @staticmethod
+    def from_env() -> LoggingConfig:
+        """
+        Read the configuration from the environment variables.
+        Invalid values are ignored, because an error at import time would make DSP-TOOLS unusable.
+
+        Returns:
+            the logging configuration
+        """
+        default = LoggingConfig()
+        level = logging.getLevelName(os.getenv("DSP_TOOLS_LOG_LEVEL", "").upper())
+        return LoggingConfig(
+            level=level if isinstance(level, int) else default.level,
+            log_payloads=os.getenv("DSP_TOOLS_LOG_PAYLOADS", "").lower() == "true",
+            payload_sample_rate=_get_number_from_env("DSP_TOOLS_LOG_PAYLOAD_SAMPLE_RATE", default.payload_sample_rate),
+            max_payload_chars=int(_get_number_from_env("DSP_TOOLS_LOG_PAYLOAD_MAX_CHARS", default.max_payload_chars)),
+            filesize_mb=int(_get_number_from_env("DSP_TOOLS_LOG_FILESIZE_MB", default.filesize_mb)),
+            backupcount=int(_get_number_from_env("DSP_TOOLS_LOG_BACKUPCOUNT", default.backupcount)),
+        )
+
+
+def _get_number_from_env(name: str, default: float) -> float:
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+_logging_config = LoggingConfig.from_env()
+
+
+def get_logging_config() -> LoggingConfig:
+    """
+    Return the logging configuration that is currently in effect.
+
+    Returns:
+        the logging configuration
+    """
+    return _logging_config
+
+
+def set_logging_config(config: LoggingConfig) -> None:
+    """
+    Replace the logging configuration, e.g. in tests.
+    The level is applied to the loggers that already exist, the file size and backup count are not.
+
+    Args:
+        config: the new configuration
+    """
+    global _logging_config
+    _logging_config = config
+    for logger in logging.Logger.manager.loggerDict.values():
+        if isinstance(logger, logging.Logger) and logger.name.startswith("dsp_tools"):
+            logger.setLevel(config.level)
+
+
+def should_log_payload() -> bool:
+    """
+    Decide whether the payload of an HTTP request and its response should be logged,
+    according to the configuration and the sample rate.
+
+    Returns:
+        True if the payload should be logged
+    """
+    config = _logging_config
+    if not config.log_payloads or config.level > logging.DEBUG:
+        return False
+    return config.payload_sample_rate >= 1 or random.random() < config.payload_sample_rate  # noqa: S311 (suspicious-non-cryptographic-random-usage)
+
+
+def truncate_payload(payload: str) -> str:
+    """
+    Cut a payload to the configured maximum length.
+
+    Args:
+        payload: the serialized payload
+
+    Returns:
+        the payload, possibly truncated
+    """
+    max_chars = _logging_config.max_payload_chars
+    if len(payload) <= max_chars:
+        return payload
+    return f"{payload[:max_chars]}[+{len(payload) - max_chars} characters]"
 
 
 def _make_handler(
@@ -41,9 +160,43 @@ def _make_handler(
     return handler
 
 
+def _make_queue_handler(file_handler: logging.Handler) -> logging.handlers.QueueHandler:
+    """
+    Create a handler that only puts the log records into a queue,
+    and start a listener that formats them and writes them to the file on a background thread,
+    so that the calling thread doesn't block on disk I/O.
+    The listener is stopped (and the queue is flushed) when the interpreter exits.
+
+    Args:
+        file_handler: the handler that writes the records to the file
+
+    Returns:
+        handler instance
+    """
+    global _queue_listener
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+    return logging.handlers.QueueHandler(log_queue)
+
+
+def get_logfile_path() -> Path | None:
+    """
+    Get the path of the file that the log records are written to.
+
+    Returns:
+        the path of the logfile, or None if no logger has been created yet
+    """
+    if not _queue_listener:
+        return None
+    file_handlers = [x for x in _queue_listener.handlers if isinstance(x, logging.FileHandler)]
+    return Path(file_handlers[0].baseFilename) if file_handlers else None
+
+
 def get_logger(
     name: str,
-    level: int = logging.DEBUG,
+    level: int | None = None,
 ) -> logging.Logger:
     """
     Create a logger instance,
@@ -51,19 +204,20 @@ def get_logger(
 
     Args:
         name: name of the logger
-        level: logging level, defaults to logging.DEBUG
+        level: logging level, defaults to the level of the logging configuration
 
     Returns:
         the logger instance
     """
-    global _rotating_file_handler
-    if not _rotating_file_handler:
-        _rotating_file_handler = _make_handler(
+    global _queue_handler
+    if not _queue_handler:
+        file_handler = _make_handler(
             Path.home() / Path(".dsp-tools"),
-            filesize_mb=100,
-            backupcount=30,
+            filesize_mb=_logging_config.filesize_mb,
+            backupcount=_logging_config.backupcount,
         )
+        _queue_handler = _make_queue_handler(file_handler)
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(_rotating_file_handler)
+    logger.setLevel(level if level is not None else _logging_config.level)
+    logger.addHandler(_queue_handler)
     return logger
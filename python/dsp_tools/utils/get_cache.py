@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+# a write to the values of a resource changes the representation of the resource, and vice versa
+_dependent_route_families = {
+    "/v2/values": ("/v2/values", "/v2/resources"),
+    "/v2/resources": ("/v2/resources", "/v2/values"),
+}
+
+
+@dataclass
+class CachedResponse:
+    """The body of a GET response, as it came over the wire, together with its ETag."""
+
+    content: bytes
+    etag: str | None
+    stored_at: float
+
+
+@dataclass
+class GetCache:
+    """
+    In-memory cache for the responses of GET requests, with LRU eviction.
+    A fresh entry is served without a request.
+    A stale entry with an ETag is revalidated with a conditional request.
+    Only the bodies are stored, so every hit is decoded anew, and the callers can't modify the cached data.
+
+    Attributes:
+        max_entries: maximum number of cached responses, the least recently used one is evicted first
+        ttl: number of seconds during which a response is served without asking the server
+        clock: source of the time (can be replaced in tests)
+        hits: number of responses served from the cache without a request
+        revalidations: number of stale responses that the server confirmed as unchanged (HTTP 304)
+        misses: number of responses that had to be downloaded
+    """
+
+    max_entries: int = 256
+    ttl: float = 300.0
+    clock: Callable[[], float] = time.monotonic
+    hits: int = field(init=False, default=0)
+    revalidations: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    _entries: OrderedDict[str, CachedResponse] = field(init=False, default_factory=OrderedDict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    @staticmethod
+    def make_key(route: str, headers: dict[str, str] | None) -> str:
+        """
+        Make the cache key of a GET request.
+        The headers are part of the key, because some of them change the response (e.g. the schema).
+
+        Args:
+            route: route of the request
+            headers: headers of the request
+
+        Returns:
+            the cache key
+        """
+        if not headers:
+            return route
+        return route + "".join(f"|{k}={v}" for k, v in sorted(headers.items()))
+
+    def get_fresh(self, key: str) -> bytes | None:
+        """
+        Get a response that is younger than the TTL.
+
+        Args:
+            key: cache key of the request
+
+        Returns:
+            the body of the response, or None if there is no fresh response
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or self.clock() - entry.stored_at > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.content
+
+    def get_etag(self, key: str) -> str | None:
+        """
+        Get the ETag of a cached response, in order to revalidate it.
+
+        Args:
+            key: cache key of the request
+
+        Returns:
+            the ETag, or None if there is no cached response or if it has no ETag
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.etag if entry else None
+
+    def revalidate(self, key: str) -> bytes | None:
+        """
+        Mark a cached response as fresh again, after the server confirmed that it is unchanged.
+
+        Args:
+            key: cache key of the request
+
+        Returns:
+            the body of the response, or None if it was evicted in the meantime
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            entry.stored_at = self.clock()
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            return entry.content
+
+    def store(self, key: str, content: bytes, etag: str | None) -> None:
+        """
+        Store a downloaded response, and evict the least recently used one if the cache is full.
+
+        Args:
+            key: cache key of the request
+            content: body of the response
+            etag: ETag header of the response, if any
+        """
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = CachedResponse(content, etag, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, route: str) -> None:
+        """
+        Remove the responses that may have been changed by a mutating request on the given route,
+        i.e. all cached routes that share its first two path segments (e.g. "/admin/groups"),
+        plus the routes that depend on them (e.g. a write to "/v2/values" invalidates "/v2/resources").
+
+        Args:
+            route: route of the mutating request
+        """
+        family = "/".join(route.split("?")[0].split("/")[:3])
+        prefixes = _dependent_route_families.get(family, (family,))
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefixes)]:
+                del self._entries[key]
+
+    def stats(self) -> str:
+        """Summary of the counters, for the log file."""
+        requests = self.hits + self.revalidations + self.misses
+        return (
+            f"GET cache: {requests} requests, {self.hits} hits, "
+            f"{self.revalidations} revalidated, {self.misses} misses, {len(self._entries)} entries"
+        )
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ProgressReporter:
+    """
+    Reports the progress of a long-running loop at a fixed interval,
+    instead of printing a line for every item.
+    The detail about the single items is only written to the log file, at DEBUG level.
+
+    Attributes:
+        total: number of items that will be processed
+        description: what is counted, e.g. "Created resources"
+        interval: minimum number of seconds between two progress lines
+        quiet: if True, nothing is printed to the console (the progress is still logged)
+        clock: source of the time (can be replaced in tests)
+    """
+
+    total: int
+    description: str
+    interval: float = 5.0
+    quiet: bool = False
+    clock: Callable[[], float] = time.monotonic
+    succeeded: int = field(init=False, default=0)
+    failed: int = field(init=False, default=0)
+    _start: float = field(init=False)
+    _last_report: float = field(init=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self._start = self.clock()
+        self._last_report = self._start
+
+    @property
+    def processed(self) -> int:
+        """Number of items processed so far, successful or not."""
+        return self.succeeded + self.failed
+
+    def success(self, detail: str) -> None:
+        """
+        Count an item that was processed successfully.
+
+        Args:
+            detail: description of the item, for the log file
+        """
+        logger.debug(detail)
+        with self._lock:
+            self.succeeded += 1
+        self._report_if_due()
+
+    def failure(self, detail: str) -> None:
+        """
+        Count an item that could not be processed.
+        The caller is responsible for reporting the error itself.
+
+        Args:
+            detail: description of the item, for the log file
+        """
+        logger.debug(detail)
+        with self._lock:
+            self.failed += 1
+        self._report_if_due()
+
+    def finish(self) -> None:
+        """Report the final state, regardless of the interval."""
+        self._report(self.clock())
+
+    def _report_if_due(self) -> None:
+        now = self.clock()
+        with self._lock:
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self._report(now)
+
+    def _report(self, now: float) -> None:
+        msg = self._format_progress(now)
+        if not self.quiet:
+            print(f"{datetime.now()}: {msg}")
+        logger.info(msg)
+
+    def _format_progress(self, now: float) -> str:
+        processed = self.processed
+        elapsed = now - self._start
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        percentage = processed / self.total * 100 if self.total else 100.0
+        msg = f"{self.description}: {processed}/{self.total} ({percentage:.1f}%), {rate:.1f}/s"
+        if processed < self.total and rate > 0:
+            msg += f", ETA {timedelta(seconds=round((self.total - processed) / rate))}"
+        if self.failed:
+            msg += f", {self.failed} failed"
+        return msg
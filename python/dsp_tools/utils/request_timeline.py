@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+from urllib.parse import urlsplit
+
+import regex
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+TimelineFormat = Literal["chrome", "jsonl"]
+
+
+@dataclass
+class RequestSpan:
+    """
+    One network action of a connection, including all its retries.
+    Times are in seconds, relative to the start of the timeline.
+    """
+
+    method: str
+    route: str
+    payload_bytes: int
+    start: float
+    thread: str
+    in_flight_at_start: int
+    end: float | None = None
+    status_code: int | None = None
+    retry_count: int = 0
+    backoff_seconds: float = 0.0
+    error: str | None = None
+    attempts: list[tuple[float, float]] = field(default_factory=list)
+    backoffs: list[tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class RequestTimeline:
+    """
+    Thread-safe recorder of the network actions of one or several connections.
+    The recorded spans can be exported as Chrome trace (to be opened in chrome://tracing or https://ui.perfetto.dev)
+    or as JSONL file (one span per line).
+    """
+
+    started_at: datetime = field(default_factory=datetime.now)
+    spans: list[RequestSpan] = field(default_factory=list)
+    _origin: float = field(init=False, default_factory=time.perf_counter)
+    _in_flight: int = field(init=False, default=0)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def now(self) -> float:
+        """Seconds since the start of the timeline."""
+        return time.perf_counter() - self._origin
+
+    def start_span(self, method: str, url: str, payload_bytes: int) -> RequestSpan:
+        """
+        Open a span for a network action that is about to start.
+
+        Args:
+            method: HTTP method
+            url: the full URL that is called (it is reduced to a route template)
+            payload_bytes: size of the request body
+
+        Returns:
+            the span, which must be closed with end_span()
+        """
+        with self._lock:
+            self._in_flight += 1
+            span = RequestSpan(
+                method=method,
+                route=make_route_template(url),
+                payload_bytes=payload_bytes,
+                start=self.now(),
+                thread=threading.current_thread().name,
+                in_flight_at_start=self._in_flight,
+            )
+        return span
+
+    def end_span(self, span: RequestSpan) -> None:
+        """
+        Close a span and add it to the timeline.
+
+        Args:
+            span: the span to close
+        """
+        span.end = self.now()
+        with self._lock:
+            self._in_flight -= 1
+            self.spans.append(span)
+
+    def export(self, filepath: Path, fmt: TimelineFormat) -> None:
+        """
+        Write the timeline to a file.
+
+        Args:
+            filepath: the file to write to
+            fmt: "chrome" for the Chrome trace event format, "jsonl" for one span per line
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda x: x.start)
+        match fmt:
+            case "chrome":
+                content = json.dumps(
+                    {"traceEvents": _to_chrome_trace_events(spans), "displayTimeUnit": "ms"},
+                    ensure_ascii=False,
+                )
+            case "jsonl":
+                content = "".join(f"{json.dumps(asdict(x), ensure_ascii=False)}\n" for x in spans)
+        filepath.write_text(content, encoding="utf-8")
+        print(f"{datetime.now()}: The timeline of the HTTP requests was written to {filepath}")
+        logger.info(f"The timeline of {len(spans)} HTTP requests was written to {filepath}")
+
+
+def make_route_template(url: str) -> str:
+    """
+    Reduce a URL to a route template, so that calls to the same endpoint can be grouped,
+    e.g. "https://api.dasch.swiss/admin/lists/http%3A%2F%2Frdfh.ch%2Flists%2F4123%2Fabc" -> "/admin/lists/{iri}"
+
+    Args:
+        url: the full URL
+
+    Returns:
+        the path of the URL, with the variable segments replaced by placeholders
+    """
+    parts = urlsplit(url)
+    segments = [_template_segment(seg) for seg in parts.path.split("/")]
+    template = "/".join(segments)
+    if parts.query:
+        params = [f"{p.split('=')[0]}={{value}}" for p in parts.query.split("&")]
+        template += "?" + "&".join(params)
+    return template
+
+
+def _template_segment(segment: str) -> str:
+    if regex.search(r"^https?(%3A|:)", segment, flags=regex.IGNORECASE):
+        return "{iri}"
+    if regex.search(r"^[0-9A-F]{4}$", segment, flags=regex.IGNORECASE):
+        return "{shortcode}"
+    if regex.search(r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}", segment):
+        return "{uuid}"
+    if regex.search(r"^\d+$", segment):
+        return "{id}"
+    return segment
+
+
+def _to_chrome_trace_events(spans: list[RequestSpan]) -> list[dict[str, Any]]:
+    thread_ids: dict[str, int] = {}
+    events: list[dict[str, Any]] = []
+    for span in spans:
+        tid = thread_ids.setdefault(span.thread, len(thread_ids) + 1)
+        end = span.end if span.end is not None else span.start
+        events.append(
+            {
+                "name": f"{span.method} {span.route}",
+                "cat": "request",
+                "ph": "X",
+                "ts": _to_microseconds(span.start),
+                "dur": _to_microseconds(end - span.start),
+                "pid": 1,
+                "tid": tid,
+                "args": {
+                    "status_code": span.status_code,
+                    "payload_bytes": span.payload_bytes,
+                    "retry_count": span.retry_count,
+                    "backoff_seconds": span.backoff_seconds,
+                    "in_flight_at_start": span.in_flight_at_start,
+                    "error": span.error,
+                },
+            }
+        )
+        events.extend(_make_child_events("attempt", span.attempts, tid))
+        events.extend(_make_child_events("backoff", span.backoffs, tid))
+    events.extend(
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+        for name, tid in thread_ids.items()
+    )
+    return events
+
+
+def _make_child_events(name: str, intervals: list[tuple[float, float]], tid: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": name,
+            "cat": name,
+            "ph": "X",
+            "ts": _to_microseconds(start),
+            "dur": _to_microseconds(end - start),
+            "pid": 1,
+            "tid": tid,
+        }
+        for start, end in intervals
+    ]
+
+
+def _to_microseconds(seconds: float) -> int:
+    return round(seconds * 1_000_000)
@@ -1,24 +1,32 @@
 from __future__ import annotations
 
 import copy
+import functools
 import glob
 import importlib.resources
 import json
+import math
+import threading
 import unicodedata
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional, TypeGuard, Union
+from typing import TYPE_CHECKING, Any, Optional, TypeGuard, Union
 
-import pandas as pd
 import regex
 from lxml import etree
 
-from dsp_tools.commands.excel2xml.propertyelement import PropertyElement
 from dsp_tools.models.exceptions import BaseError, UserError
 from dsp_tools.utils.create_logger import get_logger
 
+if TYPE_CHECKING:
+    # pandas is imported lazily, because this module is needed by many commands that don't use pandas
+    import pandas as pd
+
 logger = get_logger(__name__)
 
+# an XMLSchema collects the errors of the last validation in its error log, so it can't validate two files at once
+_xmlschema_lock = threading.Lock()
+
 
 def validate_xml_against_schema(input_file: Union[str, Path, etree._ElementTree[Any]]) -> bool:
     """
@@ -33,10 +41,7 @@ def validate_xml_against_schema(input_file: Union[str, Path, etree._ElementTree[
     Returns:
         True if the XML file is valid
     """
-    with importlib.resources.files("dsp_tools").joinpath("resources/schema/data.xsd").open(
-        encoding="utf-8"
-    ) as schema_file:
-        xmlschema = etree.XMLSchema(etree.parse(schema_file))
+    xmlschema = _get_xmlschema()
     if isinstance(input_file, (str, Path)):
         try:
             doc = etree.parse(source=input_file)
@@ -46,10 +51,11 @@ def validate_xml_against_schema(input_file: Union[str, Path, etree._ElementTree[
     else:
         doc = input_file
 
-    if not xmlschema.validate(doc):
-        error_msg = "The XML file cannot be uploaded due to the following validation error(s):"
-        for error in xmlschema.error_log:
-            error_msg = error_msg + f"\n  Line {error.line}: {error.message}"
+    with _xmlschema_lock:
+        is_valid = xmlschema.validate(doc)
+        errors = [f"\n  Line {error.line}: {error.message}" for error in xmlschema.error_log]
+    if not is_valid:
+        error_msg = "The XML file cannot be uploaded due to the following validation error(s):" + "".join(errors)
         error_msg = error_msg.replace("{https://dasch.swiss/schema}", "")
         logger.error(error_msg)
         raise UserError(error_msg)
@@ -62,6 +68,15 @@ def validate_xml_against_schema(input_file: Union[str, Path, etree._ElementTree[
     return True
 
 
+@functools.cache
+def _get_xmlschema() -> etree.XMLSchema:
+    """Compile the DSP XSD schema only once per process, because it is needed for every XML file."""
+    with importlib.resources.files("dsp_tools").joinpath("resources/schema/data.xsd").open(
+        encoding="utf-8"
+    ) as schema_file:
+        return etree.XMLSchema(etree.parse(schema_file))
+
+
 def _validate_xml_tags_in_text_properties(doc: Union[etree._ElementTree[etree._Element], etree._Element]) -> bool:
     """
     Makes sure that there are no XML tags in simple texts.
@@ -135,6 +150,8 @@ def prepare_dataframe(
     Returns:
         prepared DataFrame
     """
+    import pandas as pd
+
     # strip column headers and transform to lowercase, so that the script doesn't break when the headers vary a bit
     new_df = df.rename(columns=lambda x: x.strip().lower())
     required_columns = [x.strip().lower() for x in required_columns]
@@ -208,11 +225,14 @@ def check_notna(value: Optional[Any]) -> TypeGuard[Any]:
         >>> check_notna(" ")    == False
     """
 
+    # imported here, because importing the excel2xml package at module level would be circular
+    from dsp_tools.commands.excel2xml.propertyelement import PropertyElement
+
     if isinstance(value, PropertyElement):
         value = value.value
 
     if isinstance(value, (bool, int)) or (
-        isinstance(value, float) and pd.notna(value)
+        isinstance(value, float) and not math.isnan(value)
     ):  # necessary because isinstance(np.nan, float)
         return True
     elif isinstance(value, str):
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from dsp_tools.utils.create_logger import get_logger
+
+logger = get_logger(__name__)
+
+_key_iterations = 100_000
+
+
+@dataclass
+class TokenCache:
+    """
+    Stores the session tokens of DSP-API on disk, so that consecutive commands don't need to log in again.
+    The tokens are keyed by a hash of server, user and password,
+    so that a token is only reused if the same credentials are provided again,
+    and a token is discarded shortly before the expiry date contained in it.
+    The file is only readable by its owner.
+    It is opt-in, with the environment variable DSP_TOOLS_TOKEN_CACHE="true".
+
+    Attributes:
+        filepath: file in which the tokens are stored
+        expiry_margin: a token is not used anymore if it expires in less than this number of seconds
+        default_lifetime: lifetime of a token whose expiry date can't be read, in seconds
+        clock: source of the time, in seconds since the epoch (can be replaced in tests)
+    """
+
+    filepath: Path = field(default_factory=lambda: Path.home() / ".dsp-tools" / "tokens.json")
+    expiry_margin: float = 300.0
+    default_lifetime: float = 24 * 60 * 60
+    clock: Callable[[], float] = time.time
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    @staticmethod
+    def from_env() -> TokenCache | None:
+        """
+        Create a token cache if it is enabled with the environment variable DSP_TOOLS_TOKEN_CACHE.
+
+        Returns:
+            the token cache, or None if it is not enabled
+        """
+        if os.getenv("DSP_TOOLS_TOKEN_CACHE", "").lower() == "true":
+            return TokenCache()
+        return None
+
+    def get(self, server: str, user: str, password: str) -> str | None:
+        """
+        Get a token that is still valid.
+
+        Args:
+            server: URL of the DSP server
+            user: e-mail of the user
+            password: password of the user
+
+        Returns:
+            the token, or None if there is no valid token for these credentials
+        """
+        entry = self._read().get(_make_key(server, user, password))
+        if not entry or entry.get("expires", 0) - self.expiry_margin < self.clock():
+            return None
+        token: str = entry["token"]
+        return token
+
+    def put(self, server: str, user: str, password: str, token: str) -> None:
+        """
+        Store a token.
+
+        Args:
+            server: URL of the DSP server
+            user: e-mail of the user
+            password: password of the user
+            token: the token that DSP-API returned after the login
+        """
+        key = _make_key(server, user, password)
+        expires = _get_expiry_date(token) or self.clock() + self.default_lifetime
+        with self._lock:
+            entries = self._read()
+            entries[key] = {"token": token, "expires": expires}
+            self._write(entries)
+
+    def remove(self, server: str, user: str, password: str) -> None:
+        """
+        Remove the token of a user, e.g. after a logout, or after the server rejected it.
+
+        Args:
+            server: URL of the DSP server
+            user: e-mail of the user
+            password: password of the user
+        """
+        key = _make_key(server, user, password)
+        with self._lock:
+            entries = self._read()
+            if entries.pop(key, None):
+                self._write(entries)
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            entries: dict[str, Any] = json.loads(self.filepath.read_text(encoding="utf-8"))
+            return entries
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries: dict[str, Any]) -> None:
+        now = self.clock()
+        entries = {k: v for k, v in entries.items() if v.get("expires", 0) > now}
+        try:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            # mkstemp creates the file with the permissions 0600, and os.replace() is atomic
+            fd, tmp_name = tempfile.mkstemp(dir=self.filepath.parent, prefix=".tokens-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_name, self.filepath)
+        except OSError:
+            logger.warning(f"Unable to write the token cache {self.filepath}", exc_info=True)
+
+
+def _make_key(server: str, user: str, password: str) -> str:
+    # neither the e-mail addresses nor the passwords are stored in clear text,
+    # and the key derivation is slow on purpose, so that the passwords can't be guessed from the keys
+    salt = f"{server.rstrip('/')}\n{user}".encode("utf-8")
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, _key_iterations).hex()
+
+
+def _get_expiry_date(token: str) -> float | None:
+    """Read the expiry date from the payload of a JSON Web Token, without verifying its signature."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return None
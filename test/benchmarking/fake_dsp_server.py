@@ -0,0 +1,304 @@
+"""
+A lightweight in-process stand-in for DSP-API and SIPI,
+which implements the routes that DSP-TOOLS calls during the (fast) xmlupload.
+It can be configured with latency, error injection and rate limits,
+so that the throughput and the retry behaviour of the client can be measured without a Docker stack.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import regex
+
+from dsp_tools.utils.request_timeline import make_route_template
+
+
+@dataclass(frozen=True)
+class FakeServerConfig:
+    """
+    Behaviour of the fake server.
+
+    Attributes:
+        latency: seconds to wait before answering a request
+        error_rate: share of the requests (0..1) that are answered with a 500 error
+        rate_limit: maximum number of requests per second, excess requests are answered with 429
+        seed: seed for the random number generator that decides which requests fail
+        shortcode: shortcode of the project that the server knows
+        ontology_name: name of the only ontology of that project
+        classes: resource classes of the ontology
+        properties: properties of the ontology
+    """
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float | None = None
+    seed: int = 0
+    shortcode: str = "4123"
+    ontology_name: str = "testonto"
+    classes: tuple[str, ...] = ("Thing", "ImageThing")
+    properties: tuple[str, ...] = ("hasText", "hasLinkTo", "hasLinkToValue")
+
+
+@dataclass
+class FakeServerStats:
+    """Counters of the fake server, for assertions and benchmark reports."""
+
+    requests: Counter[str] = field(default_factory=Counter)
+    injected_errors: int = 0
+    rate_limited: int = 0
+    bytes_received: int = 0
+    resources: dict[str, dict[str, Any]] = field(default_factory=dict)
+    uploaded_files: list[str] = field(default_factory=list)
+
+    @property
+    def total_requests(self) -> int:
+        """Number of requests received, including the failed ones."""
+        return sum(self.requests.values())
+
+
+class FakeDspServer:
+    """
+    In-process HTTP server that answers like DSP-API and SIPI.
+    Both APIs are served on the same port, so the same URL can be used as server and as SIPI URL.
+
+    Usage:
+        with FakeDspServer(FakeServerConfig(latency=0.01)) as server:
+            xmlupload(..., server=server.url, sipi=server.url)
+    """
+
+    def __init__(self, config: FakeServerConfig = FakeServerConfig()) -> None:
+        self.config = config
+        self.stats = FakeServerStats()
+        self._lock = threading.Lock()
+        self._random = random.Random(config.seed)
+        self._tokens = config.rate_limit or 0.0
+        self._last_refill = time.monotonic()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server, e.g. http://127.0.0.1:54321"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def project_iri(self) -> str:
+        """IRI of the project that the server knows."""
+        return f"http://rdfh.ch/projects/{self.config.shortcode}"
+
+    @property
+    def ontology_iri(self) -> str:
+        """External IRI of the only ontology of the project."""
+        return f"{self.url}/ontology/{self.config.shortcode}/{self.config.ontology_name}/v2"
+
+    def start(self) -> FakeDspServer:
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> FakeDspServer:
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def admit(self, route: str, body_size: int) -> HTTPStatus | None:
+        """
+        Account a request and decide whether it should fail.
+
+        Args:
+            route: route template of the request
+            body_size: size of the request body
+
+        Returns:
+            the error status that should be returned, or None if the request should be served
+        """
+        with self._lock:
+            self.stats.requests[route] += 1
+            self.stats.bytes_received += body_size
+            if self.config.rate_limit:
+                now = time.monotonic()
+                refill = (now - self._last_refill) * self.config.rate_limit
+                self._tokens = min(self.config.rate_limit, self._tokens + refill)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.stats.rate_limited += 1
+                    return HTTPStatus.TOO_MANY_REQUESTS
+                self._tokens -= 1
+            if self._random.random() < self.config.error_rate:
+                self.stats.injected_errors += 1
+                return HTTPStatus.INTERNAL_SERVER_ERROR
+        return None
+
+    def answer(  # noqa: PLR0911 (too-many-return-statements)
+        self,
+        method: str,
+        path: str,
+        query: dict[str, list[str]],
+        body: bytes,
+    ) -> dict[str, Any] | None:
+        """
+        Compute the response for a request.
+
+        Args:
+            method: HTTP method
+            path: path of the URL
+            query: parsed query string
+            body: request body
+
+        Returns:
+            the JSON response, or None if the route is unknown
+        """
+        shortcode = self.config.shortcode
+        onto = self.config.ontology_name
+        match method, path.split("/")[1:]:
+            case "POST", ["v2", "authentication"]:
+                return {"token": "fake-token-0123456789"}
+            case "DELETE", ["v2", "authentication"]:
+                return {"message": "Logout OK"}
+            case "GET", ["admin", "projects"]:
+                return {"projects": [self._project_json()]}
+            case "GET", ["admin", "projects", "shortcode", code] if code == shortcode:
+                return {"project": self._project_json()}
+            case "GET", ["admin", "groups"]:
+                return {"groups": []}
+            case "GET", ["admin", "lists"] if query.get("projectIri"):
+                return {"lists": []}
+            case "GET", ["v2", "ontologies", "metadata", _]:
+                return {
+                    "@id": self.ontology_iri,
+                    "knora-api:lastModificationDate": {"@type": "xsd:dateTimeStamp", "@value": "2024-01-01T00:00:00Z"},
+                }
+            case "GET", ["version"]:
+                return {"name": "version", "webapi": "v0.0.0-fake"}
+            case "GET", ["ontology", "knora-api", "v2"]:
+                return {"@graph": [{"@id": "knora-api:Resource", "knora-api:isResourceClass": True}]}
+            case "GET", ["ontology", code, name, "v2"] if code == shortcode and name == onto:
+                return {"@graph": self._ontology_graph()}
+            case "POST", ["v2", "resources"]:
+                return self._create_resource(json.loads(body))
+            case "GET", ["v2", "resources", iri]:
+                return self.stats.resources.get(unquote(iri))
+            case "POST" | "PUT", ["v2", "values"]:
+                return {"@id": f"http://rdfh.ch/{shortcode}/values/{uuid.uuid4()}"}
+            case "POST", ["upload"]:
+                return self._upload_file(body, processed=True)
+            case "POST", ["upload_without_processing"]:
+                return self._upload_file(body, processed=False)
+            case _:
+                return None
+
+    def _project_json(self) -> dict[str, Any]:
+        return {
+            "id": self.project_iri,
+            "shortcode": self.config.shortcode,
+            "shortname": "fake-project",
+            "longname": "Fake project",
+            "description": [{"value": "Fake project", "language": "en"}],
+            "keywords": [],
+            "ontologies": [f"http://www.knora.org/ontology/{self.config.shortcode}/{self.config.ontology_name}"],
+            "selfjoin": False,
+            "status": True,
+        }
+
+    def _ontology_graph(self) -> list[dict[str, Any]]:
+        onto = self.config.ontology_name
+        classes = [{"@id": f"{onto}:{x}", "knora-api:isResourceClass": True} for x in self.config.classes]
+        props = [{"@id": f"{onto}:{x}"} for x in self.config.properties]
+        return classes + props
+
+    def _create_resource(self, payload: dict[str, Any]) -> dict[str, Any]:
+        iri = payload.get("@id") or f"http://rdfh.ch/{self.config.shortcode}/{uuid.uuid4()}"
+        resource = {"@id": iri, "rdfs:label": payload["rdfs:label"], "@context": payload.get("@context", {})}
+        for key, value in payload.items():
+            values = value if isinstance(value, list) else [value]
+            if all(isinstance(v, dict) and "@type" in v for v in values):
+                resource[key] = [{"@id": f"{iri}/values/{uuid.uuid4()}", **v} for v in values]
+        with self._lock:
+            self.stats.resources[iri] = resource
+        return {"@id": iri, "rdfs:label": payload["rdfs:label"]}
+
+    def _upload_file(self, body: bytes, processed: bool) -> dict[str, Any]:
+        filename = "file"
+        if match := regex.search(rb'filename="([^"]+)"', body[:2048]):
+            filename = match.group(1).decode("utf-8")
+        with self._lock:
+            self.stats.uploaded_files.append(filename)
+        if not processed:
+            return {"message": "OK"}
+        suffix = filename[filename.rfind(".") :] if "." in filename else ""
+        derivative_suffix = ".jp2" if suffix in (".jpg", ".jpeg", ".png", ".tif") else suffix
+        internal_filename = f"{uuid.uuid4()}{derivative_suffix}"
+        return {"uploadedFiles": [{"originalFilename": filename, "internalFilename": internal_filename}]}
+
+
+def _make_handler(server: FakeDspServer) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately, which would otherwise stall on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self._handle("GET")
+
+        def do_POST(self) -> None:
+            self._handle("POST")
+
+        def do_PUT(self) -> None:
+            self._handle("PUT")
+
+        def do_DELETE(self) -> None:
+            self._handle("DELETE")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # keep the test output clean
+            pass
+
+        def _handle(self, method: str) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            parts = urlsplit(self.path)
+            route = f"{method} {make_route_template(self.path)}"
+            if server.config.latency:
+                time.sleep(server.config.latency)
+            if error_status := server.admit(route, len(body)):
+                self._respond(error_status, {"error": error_status.phrase})
+                return
+            response = server.answer(method, parts.path, parse_qs(parts.query), body)
+            if response is None:
+                self._respond(HTTPStatus.NOT_FOUND, {"error": f"Unknown route: {method} {parts.path}"})
+            else:
+                self._respond(HTTPStatus.OK, response)
+
+        def _respond(self, status: HTTPStatus, content: dict[str, Any]) -> None:
+            payload = json.dumps(content).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return _Handler
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+import regex
+from termcolor import cprint
+
+# libraries that only some commands need, and that must not be loaded when the CLI starts
+HEAVY_MODULES = ["pandas", "openpyxl", "docker", "networkx", "rustworkx", "jsonschema", "requests", "lxml"]
+
+
+def _measure_import_time(module: str) -> tuple[int, set[str]]:
+    """Import a module in a fresh interpreter, and return the cumulative import time in µs and the loaded modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        if match := regex.search(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$", line):
+            imported[match.group(3)] = int(match.group(1))
+    return imported[module], {name.split(".")[0] for name in imported}
+
+
+def test_cli_import_time() -> None:
+    cli_time, cli_modules = _measure_import_time("dsp_tools.cli.entry_point")
+    command_time, _ = _measure_import_time("dsp_tools.commands.xmlupload.xmlupload")
+    print_str = (
+        f"\n\n---------------------\n"
+        f"Import time of the CLI entry point: {cli_time / 1000:.0f} ms\n"
+        f"Import time of the xmlupload command (for comparison): {command_time / 1000:.0f} ms"
+        f"\n---------------------\n"
+    )
+    cprint(text=print_str, color="yellow", attrs=["bold"])
+    assert not cli_modules.intersection(HEAVY_MODULES)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,102 @@
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from requests import Response
+from termcolor import cprint
+
+from dsp_tools.utils import connection_live
+from dsp_tools.utils.connection_live import ConnectionLive, RequestParameters
+from dsp_tools.utils.set_encoder import SetEncoder
+
+NUM_REQUESTS = 2000
+NUM_VALUES = 100
+
+
+def _make_resource_payload() -> dict[str, Any]:
+    values = [
+        {
+            "@type": "knora-api:TextValue",
+            "knora-api:textValueAsXml": f"<?xml version='1.0' encoding='UTF-8'?><text>Value {i} äöü</text>",
+            "knora-api:hasPermissions": "CR knora-admin:ProjectAdmin|V knora-admin:UnknownUser",
+        }
+        for i in range(NUM_VALUES)
+    ]
+    return {
+        "@type": "testonto:Thing",
+        "rdfs:label": "res_1",
+        "knora-api:attachedToProject": {"@id": "http://rdfh.ch/projects/4123"},
+        "testonto:hasText": values,
+        "@context": {"knora-api": "http://api.knora.org/ontology/knora-api/v2#"},
+    }
+
+
+def _log_by_decoding(con: ConnectionLive, params: RequestParameters, response: Response) -> None:
+    """The former way of logging the payloads: the request is serialized again, the response is decoded and encoded."""
+    dumpobj: dict[str, Any] = {
+        "method": params.method,
+        "url": params.url,
+        "headers": con._anonymize(dict(con.session.headers) | (params.headers or {})),
+        "timeout": params.timeout,
+        "data": con._anonymize(params.data),
+    }
+    connection_live.logger.debug(f"REQUEST: {json.dumps(dumpobj, cls=SetEncoder)}")
+    dumpobj = {
+        "status_code": response.status_code,
+        "headers": con._anonymize(dict(response.headers)),
+        "content": con._anonymize(response.json()),
+    }
+    connection_live.logger.debug(f"RESPONSE: {json.dumps(dumpobj)}")
+
+
+def _log_from_wire(con: ConnectionLive, params: RequestParameters, response: Response) -> None:
+    con._log_request(params, log_payload=True)
+    con._log_response(response, log_payload=True)
+
+
+def _measure_cpu_per_request(
+    log: Callable[[ConnectionLive, RequestParameters, Response], None],
+    con: ConnectionLive,
+    params: RequestParameters,
+    response: Response,
+) -> float:
+    start = time.process_time()
+    for _ in range(NUM_REQUESTS):
+        log(con, params, response)
+    return (time.process_time() - start) / NUM_REQUESTS * 1_000_000
+
+
+def test_payload_logging_cpu_cost_per_request() -> None:
+    payload = _make_resource_payload()
+    con = ConnectionLive("http://0.0.0.0:3333", token="token-0123456789")
+    params = RequestParameters("POST", "http://0.0.0.0:3333/v2/resources", 30, payload)
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps({**payload, "@id": "http://rdfh.ch/4123/abc"}).encode("utf-8")
+    response.headers["Content-Type"] = "application/ld+json; charset=UTF-8"
+
+    # only the cost of building the log messages is measured, not the cost of writing them
+    with (
+        patch.object(connection_live.logger, "isEnabledFor", return_value=True),
+        patch.object(connection_live.logger, "debug"),
+    ):
+        by_decoding = _measure_cpu_per_request(_log_by_decoding, con, params, response)
+        with patch.object(Response, "json", side_effect=AssertionError("the response body was decoded")):
+            from_wire = _measure_cpu_per_request(_log_from_wire, con, params, response)
+
+    print_str = (
+        f"\n\n---------------------\n"
+        f"Requests: {NUM_REQUESTS}, request body: {len(params.data_serialized or b'')} bytes, "
+        f"response body: {len(response.content)} bytes\n"
+        f"CPU time per request for logging the decoded payloads: {by_decoding:.0f} µs\n"
+        f"CPU time per request for logging the payloads from the wire: {from_wire:.0f} µs"
+        f"\n---------------------\n"
+    )
+    cprint(text=print_str, color="yellow", attrs=["bold"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
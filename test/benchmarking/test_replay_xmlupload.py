@@ -0,0 +1,49 @@
+import time
+from pathlib import Path
+from test.benchmarking.fake_dsp_server import FakeDspServer, FakeServerConfig
+from test.benchmarking.test_upload_throughput import _make_xml
+from unittest.mock import patch
+
+import pytest
+from termcolor import cprint
+
+from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig, UploadConfig
+from dsp_tools.commands.xmlupload.xmlupload import xmlupload
+from dsp_tools.utils.connection_recording import ConnectionReplay
+
+NUM_RESOURCES = 200
+
+
+def test_replay_xmlupload_without_server(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Record an xmlupload against the fake server, then replay it offline to measure the client-side CPU cost."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("DSP_TOOLS_TESTING", raising=False)
+    xml_file = tmp_path / "data.xml"
+    config = UploadConfig(diagnostics=DiagnosticsConfig(record_connection=True))
+    with FakeDspServer(FakeServerConfig(latency=0.002)) as server:
+        xml_file.write_text(_make_xml(server.config.shortcode, NUM_RESOURCES, []), encoding="utf-8")
+        start = time.perf_counter()
+        assert xmlupload(xml_file, server.url, "root@example.com", "test", ".", server.url, config)
+        recorded_duration = time.perf_counter() - start
+    [recording] = list(tmp_path.glob(".dsp-tools/xmluploads/**/*_connection_recording_*.json"))
+
+    replay = ConnectionReplay.from_file(recording, time_scale=0)
+    with patch("dsp_tools.commands.xmlupload.xmlupload.ConnectionLive", return_value=replay):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        assert xmlupload(xml_file, "http://replay", "root@example.com", "test", ".", "http://replay")
+        replay_wall, replay_cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+    print_str = (
+        f"\n\n---------------------\n"
+        f"Resources: {NUM_RESOURCES}\n"
+        f"Recorded session against fake server: {recorded_duration:.2f} s\n"
+        f"Replayed session: {replay_wall:.2f} s wall time, {replay_cpu:.2f} s CPU time"
+        f"\n---------------------\n"
+    )
+    cprint(text=print_str, color="yellow", attrs=["bold"])
+    assert replay.remaining == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
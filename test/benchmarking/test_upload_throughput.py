@@ -0,0 +1,161 @@
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from test.benchmarking.fake_dsp_server import FakeDspServer, FakeServerConfig
+from unittest.mock import Mock, patch
+
+import pytest
+from termcolor import cprint
+
+from dsp_tools.commands.fast_xmlupload.processing_journal import ProcessingJournal
+from dsp_tools.commands.fast_xmlupload.upload_files import upload_files
+from dsp_tools.commands.fast_xmlupload.upload_xml import fast_xmlupload
+from dsp_tools.commands.xmlupload.xmlupload import xmlupload
+
+NUM_RESOURCES = 200
+NUM_IMAGES = 20
+LATENCY = 0.002
+
+
+@pytest.fixture()
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """The xmlupload writes into the cwd and into ~/.dsp-tools, so both are redirected into a temporary folder."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("DSP_TOOLS_TESTING", raising=False)
+    return tmp_path
+
+
+@pytest.fixture()
+def server() -> Iterator[FakeDspServer]:
+    with FakeDspServer(FakeServerConfig(latency=LATENCY)) as fake_server:
+        yield fake_server
+
+
+def _make_xml(shortcode: str, num_resources: int, bitstreams: list[str]) -> str:
+    resources = []
+    for i in range(num_resources):
+        # every pair of resources references each other, so that the stash is exercised as well
+        partner = i + 1 if i % 2 == 0 else i - 1
+        resources.append(
+            f'<resource label="res_{i}" restype=":Thing" id="res_{i}" permissions="res-default">'
+            f'<text-prop name=":hasText"><text encoding="utf8" permissions="prop-default">Text {i}</text></text-prop>'
+            f'<resptr-prop name=":hasLinkTo"><resptr permissions="prop-default">res_{partner}</resptr></resptr-prop>'
+            "</resource>"
+        )
+    for i, path in enumerate(bitstreams):
+        resources.append(
+            f'<resource label="img_{i}" restype=":ImageThing" id="img_{i}" permissions="res-default">'
+            f'<bitstream permissions="prop-default">{path}</bitstream>'
+            "</resource>"
+        )
+    return (
+        "<?xml version='1.0' encoding='utf-8'?>"
+        f'<knora xmlns="https://dasch.swiss/schema" shortcode="{shortcode}" default-ontology="testonto">'
+        '<permissions id="res-default"><allow group="UnknownUser">V</allow><allow group="ProjectAdmin">CR</allow>'
+        "</permissions>"
+        '<permissions id="prop-default"><allow group="ProjectAdmin">CR</allow></permissions>'
+        f"{''.join(resources)}"
+        "</knora>"
+    )
+
+
+def _make_images(folder: Path, num_images: int) -> list[str]:
+    folder.mkdir()
+    paths = []
+    for i in range(num_images):
+        path = folder / f"image_{i}.jpg"
+        path.write_bytes(b"\xff\xd8\xff" + bytes(10_000))
+        paths.append(str(path.relative_to(folder.parent)))
+    return paths
+
+
+def _make_processed_files(workdir: Path, bitstreams: list[str]) -> Path:
+    """Imitate the output of the processing step, which needs a SIPI container and can't be run against the fake."""
+    processed_dir = workdir / "processed"
+    journal = ProcessingJournal.create()
+    for bitstream in bitstreams:
+        internal_filename = str(uuid.uuid4())
+        subfolder = processed_dir / internal_filename[:2] / internal_filename[2:4]
+        subfolder.mkdir(parents=True, exist_ok=True)
+        derivative = subfolder / f"{internal_filename}.jp2"
+        derivative.write_bytes(bytes(10_000))
+        (subfolder / f"{internal_filename}.jpg.orig").write_bytes(bytes(10_000))
+        (subfolder / f"{internal_filename}.info").write_text("{}", encoding="utf-8")
+        journal.append(
+            Path(bitstream), derivative, [derivative.name, f"{internal_filename}.jpg.orig", f"{internal_filename}.info"]
+        )
+    journal.close()
+    return processed_dir
+
+
+def _print_report(title: str, server: FakeDspServer, num_items: int, duration: float) -> None:
+    routes = "\n".join(f"  {route}: {count}" for route, count in sorted(server.stats.requests.items()))
+    print_str = (
+        f"\n\n---------------------\n"
+        f"{title}\n"
+        f"Items: {num_items} in {duration:.2f} s ({num_items / duration:.1f} items/s)\n"
+        f"Requests: {server.stats.total_requests} (latency {server.config.latency * 1000:.0f} ms per request)\n"
+        f"Injected errors: {server.stats.injected_errors}, rate limited: {server.stats.rate_limited}\n"
+        f"{routes}"
+        f"\n---------------------\n"
+    )
+    cprint(text=print_str, color="yellow", attrs=["bold"])
+
+
+def test_xmlupload_throughput(workdir: Path, server: FakeDspServer) -> None:
+    bitstreams = _make_images(workdir / "images", NUM_IMAGES)
+    xml_file = workdir / "data.xml"
+    xml_file.write_text(_make_xml(server.config.shortcode, NUM_RESOURCES, bitstreams), encoding="utf-8")
+    start = time.perf_counter()
+    success = xmlupload(xml_file, server.url, "root@example.com", "test", str(workdir), server.url)
+    duration = time.perf_counter() - start
+    _print_report("xmlupload", server, NUM_RESOURCES + NUM_IMAGES, duration)
+    assert success
+    assert len(server.stats.resources) == NUM_RESOURCES + NUM_IMAGES
+    assert len(server.stats.uploaded_files) == NUM_IMAGES
+    # only one link per pair of resources has to be stashed to break the circle
+    assert server.stats.requests["POST /v2/values"] == NUM_RESOURCES // 2
+
+
+def test_upload_files_and_fast_xmlupload_throughput(workdir: Path, server: FakeDspServer) -> None:
+    bitstreams = [f"images/image_{i}.jpg" for i in range(NUM_IMAGES)]
+    processed_dir = _make_processed_files(workdir, bitstreams)
+    xml_file = workdir / "data.xml"
+    xml_file.write_text(_make_xml(server.config.shortcode, 0, bitstreams), encoding="utf-8")
+
+    start = time.perf_counter()
+    success = upload_files(str(processed_dir), 4, "root@example.com", "test", server.url, server.url)
+    duration = time.perf_counter() - start
+    _print_report("upload-files", server, NUM_IMAGES, duration)
+    assert success
+    assert len(server.stats.uploaded_files) == 3 * NUM_IMAGES
+
+    start = time.perf_counter()
+    success = fast_xmlupload(str(xml_file), "root@example.com", "test", server.url, server.url)
+    duration = time.perf_counter() - start
+    _print_report("fast-xmlupload", server, NUM_IMAGES, duration)
+    assert success
+    assert len(server.stats.resources) == NUM_IMAGES
+
+
+@patch("dsp_tools.utils.connection_live.time.sleep")
+def test_xmlupload_retries_on_server_errors(sleep: Mock, workdir: Path) -> None:
+    num_resources = 50
+    config = FakeServerConfig(error_rate=0.1, seed=42)
+    with FakeDspServer(config) as server:
+        xml_file = workdir / "data.xml"
+        xml_file.write_text(_make_xml(config.shortcode, num_resources, []), encoding="utf-8")
+        start = time.perf_counter()
+        success = xmlupload(xml_file, server.url, "root@example.com", "test", str(workdir), server.url)
+        duration = time.perf_counter() - start
+        _print_report("xmlupload with 10% server errors", server, num_resources, duration)
+    assert success
+    assert server.stats.injected_errors > 0
+    assert sleep.call_count >= server.stats.injected_errors
+    assert len(server.stats.resources) == num_resources
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
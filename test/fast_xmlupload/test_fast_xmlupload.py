@@ -56,11 +56,12 @@ class TestFastXmlUpload(unittest.TestCase):
 
     def tearDown(self) -> None:
         """
-        Delete all pickle files, all id2iri files and all "(un)processed_files.txt" files.
+        Delete all processing results, the upload ledger, all id2iri files and all "(un)processed_files.txt" files.
         For each test method, a new TestCase instance is created, so tearDown() is executed after each test method.
         """
-        for pickle_file in list(Path().glob("*.pkl")):
-            pickle_file.unlink()
+        for result_file in list(Path().glob("processing_result_*")):
+            result_file.unlink()
+        Path("upload_ledger.jsonl").unlink(missing_ok=True)
 
         for id2iri_file in list(Path().glob("*id2iri_mapping*.json")):
             id2iri_file.unlink()
@@ -82,8 +83,8 @@ class TestFastXmlUpload(unittest.TestCase):
         )
         self.assertTrue(success_process)
 
-        pickle_files = list(Path().glob("*.pkl"))
-        self.assertEqual(len(pickle_files), 1)
+        result_files = list(Path().glob("processing_result_*.jsonl"))
+        self.assertEqual(len(result_files), 1)
 
         print("test_fast_xmlupload: call upload_files()")
         success_upload = upload_files(
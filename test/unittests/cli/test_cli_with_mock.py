@@ -14,7 +14,7 @@ def test_invalid_arguments() -> None:
     assert ex.value.code == 2
 
 
-@patch("dsp_tools.cli.call_action.validate_lists_section_with_schema")
+@patch("dsp_tools.commands.excel2json.lists.validate_lists_section_with_schema")
 def test_lists_validate(validate_lists: Mock) -> None:
     """Test the 'dsp-tools create --lists-only --validate-only' command"""
     file = "filename.json"
@@ -23,7 +23,7 @@ def test_lists_validate(validate_lists: Mock) -> None:
     validate_lists.assert_called_once_with(file)
 
 
-@patch("dsp_tools.cli.call_action.create_lists")
+@patch("dsp_tools.commands.project.create.project_create_lists.create_lists")
 def test_lists_create(create_lists: Mock) -> None:
     """Test the 'dsp-tools create --lists-only' command"""
     create_lists.return_value = ({}, True)
@@ -38,7 +38,7 @@ def test_lists_create(create_lists: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.validate_project")
+@patch("dsp_tools.commands.project.create.project_validate.validate_project")
 def test_project_validate(validate_project: Mock) -> None:
     """Test the 'dsp-tools create --validate-only' command"""
     file = "filename.json"
@@ -47,7 +47,7 @@ def test_project_validate(validate_project: Mock) -> None:
     validate_project.assert_called_once_with(file)
 
 
-@patch("dsp_tools.cli.call_action.create_project")
+@patch("dsp_tools.commands.project.create.project_create.create_project")
 def test_project_create(create_project: Mock) -> None:
     """Test the 'dsp-tools create' command"""
     file = "filename.json"
@@ -62,7 +62,7 @@ def test_project_create(create_project: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.get_project")
+@patch("dsp_tools.commands.project.get.get_project")
 def test_project_get(get_project: Mock) -> None:
     """Test the 'dsp-tools get --project' command"""
     file = "filename.json"
@@ -79,7 +79,7 @@ def test_project_get(get_project: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.validate_xml_against_schema")
+@patch("dsp_tools.utils.shared.validate_xml_against_schema")
 def test_xmlupload_validate(validate_xml: Mock) -> None:
     """Test the 'dsp-tools xmlupload --validate-only' command"""
     file = "filename.xml"
@@ -88,7 +88,7 @@ def test_xmlupload_validate(validate_xml: Mock) -> None:
     validate_xml.assert_called_once_with(file)
 
 
-@patch("dsp_tools.cli.call_action.xmlupload")
+@patch("dsp_tools.commands.xmlupload.xmlupload.xmlupload")
 def test_xmlupload(xmlupload: Mock) -> None:
     """Test the 'dsp-tools xmlupload' command"""
     file = "filename.xml"
@@ -105,29 +105,34 @@ def test_xmlupload(xmlupload: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.process_files")
+@patch("dsp_tools.commands.fast_xmlupload.process_files.process_files")
 def test_process_files(process_files: Mock) -> None:
     """Test the 'dsp-tools process-files' command"""
     input_dir = "input"
     output_dir = "output"
     nthreads = 12
+    sipi_containers = 3
     file = "filename.xml"
     args = f"process-files --input-dir {input_dir} --output-dir {output_dir} --nthreads {nthreads} {file}".split()
+    args.extend(["--sipi-containers", str(sipi_containers)])
     entry_point.run(args)
     process_files.assert_called_once_with(
         input_dir=input_dir,
         output_dir=output_dir,
         xml_file=file,
         nthreads=nthreads,
+        sipi_containers=sipi_containers,
+        max_threads=None,
     )
 
 
-@patch("dsp_tools.cli.call_action.upload_files")
+@patch("dsp_tools.commands.fast_xmlupload.upload_files.upload_files")
 def test_upload_files(upload_files: Mock) -> None:
     """Test the 'dsp-tools upload-files' command"""
     processed_dir = "processed"
     nthreads = 12
-    args = f"upload-files --processed-dir {processed_dir} --nthreads {nthreads}".split()
+    max_threads = 32
+    args = f"upload-files --processed-dir {processed_dir} --nthreads {nthreads} --max-threads {max_threads}".split()
     entry_point.run(args)
     upload_files.assert_called_once_with(
         dir_with_processed_files=processed_dir,
@@ -136,10 +141,11 @@ def test_upload_files(upload_files: Mock) -> None:
         password="test",
         dsp_url="http://0.0.0.0:3333",
         sipi_url="http://0.0.0.0:1024",
+        max_threads=max_threads,
     )
 
 
-@patch("dsp_tools.cli.call_action.fast_xmlupload")
+@patch("dsp_tools.commands.fast_xmlupload.upload_xml.fast_xmlupload")
 def test_fast_xmlupload(fast_xmlupload: Mock) -> None:
     """Test the 'dsp-tools fast-xmlupload' command"""
     file = "filename.xml"
@@ -154,7 +160,31 @@ def test_fast_xmlupload(fast_xmlupload: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.excel2json")
+@patch("dsp_tools.commands.fast_xmlupload.pipeline.fast_xmlupload_pipeline")
+def test_fast_xmlupload_pipeline(fast_xmlupload_pipeline: Mock) -> None:
+    """Test the 'dsp-tools fast-xmlupload-pipeline' command"""
+    input_dir = "input"
+    output_dir = "output"
+    xml_file = "file.xml"
+    args = f"fast-xmlupload-pipeline --input-dir {input_dir} --output-dir {output_dir} --window 50 {xml_file}".split()
+    entry_point.run(args)
+    fast_xmlupload_pipeline.assert_called_once_with(
+        xml_file=xml_file,
+        input_dir=input_dir,
+        output_dir=output_dir,
+        user="root@example.com",
+        password="test",
+        dsp_url="http://0.0.0.0:3333",
+        sipi_url="http://0.0.0.0:1024",
+        nthreads=None,
+        upload_threads=4,
+        max_threads=None,
+        sipi_containers=None,
+        window=50,
+    )
+
+
+@patch("dsp_tools.commands.excel2json.project.excel2json")
 def test_excel2json(excel2json: Mock) -> None:
     """Test the 'dsp-tools excel2json' command"""
     folder = "folder"
@@ -167,7 +197,7 @@ def test_excel2json(excel2json: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.excel2lists")
+@patch("dsp_tools.commands.excel2json.lists.excel2lists")
 def test_excel2lists(excel2lists: Mock) -> None:
     """Test the 'dsp-tools excel2lists' command"""
     excel2lists.return_value = ([], True)
@@ -182,7 +212,7 @@ def test_excel2lists(excel2lists: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.excel2resources")
+@patch("dsp_tools.commands.excel2json.resources.excel2resources")
 def test_excel2resources(excel2resources: Mock) -> None:
     """Test the 'dsp-tools excel2resources' command"""
     excel2resources.return_value = ([], True)
@@ -196,7 +226,7 @@ def test_excel2resources(excel2resources: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.excel2properties")
+@patch("dsp_tools.commands.excel2json.properties.excel2properties")
 def test_excel2properties(excel2properties: Mock) -> None:
     """Test the 'dsp-tools excel2properties' command"""
     excel2properties.return_value = ([], True)
@@ -210,7 +240,7 @@ def test_excel2properties(excel2properties: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.id2iri")
+@patch("dsp_tools.commands.id2iri.id2iri")
 def test_id2iri(id2iri: Mock) -> None:
     """Test the 'dsp-tools id2iri' command"""
     xml_file = "filename.xml"
@@ -224,7 +254,7 @@ def test_id2iri(id2iri: Mock) -> None:
     )
 
 
-@patch("dsp_tools.cli.call_action.excel2xml", return_value=("foo", "bar"))
+@patch("dsp_tools.commands.excel2xml.excel2xml_cli.excel2xml", return_value=("foo", "bar"))
 def test_excel2xml(excel2xml: Mock) -> None:
     """Test the 'dsp-tools excel2xml' command"""
     excel_file = "filename.xlsx"
@@ -255,7 +285,7 @@ def test_stop_stack(stop_stack: Mock) -> None:
     stop_stack.assert_called_once_with()
 
 
-@patch("dsp_tools.cli.call_action.generate_template_repo")
+@patch("dsp_tools.commands.template.generate_template_repo")
 def test_template(generate_template_repo: Mock) -> None:
     """Test the 'dsp-tools template' command"""
     args = "template".split()
@@ -263,7 +293,7 @@ def test_template(generate_template_repo: Mock) -> None:
     generate_template_repo.assert_called_once_with()
 
 
-@patch("dsp_tools.cli.call_action.upload_rosetta")
+@patch("dsp_tools.commands.rosetta.upload_rosetta")
 def test_rosetta(upload_rosetta: Mock) -> None:
     """Test the 'dsp-tools rosetta' command"""
     args = "rosetta".split()
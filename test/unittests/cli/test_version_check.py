@@ -0,0 +1,58 @@
+import json
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dsp_tools.cli import entry_point
+
+
+@pytest.fixture()
+def cache_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    cache_file = tmp_path / "latest_version.json"
+    monkeypatch.setattr(entry_point, "_version_cache_file", cache_file)
+    monkeypatch.delenv("DSP_TOOLS_SKIP_VERSION_CHECK", raising=False)
+    return cache_file
+
+
+@pytest.mark.usefixtures("cache_file")
+@patch("requests.get")
+def test_skipped_by_env_variable(get: Mock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DSP_TOOLS_SKIP_VERSION_CHECK", "true")
+    assert entry_point._check_version() is None
+    get.assert_not_called()
+
+
+@patch("requests.get")
+def test_fresh_cache_is_used(get: Mock, cache_file: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    cache_file.write_text(json.dumps({"latest": "999.0.0", "checked_at": time.time()}), encoding="utf-8")
+    assert entry_point._check_version() is None
+    get.assert_not_called()
+    assert "version 999.0.0 is available" in capsys.readouterr().out
+
+
+@patch("requests.get")
+def test_outdated_cache_is_renewed_in_background(
+    get: Mock, cache_file: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    cache_file.write_text(json.dumps({"latest": "0.0.1", "checked_at": 0}), encoding="utf-8")
+    get.return_value.ok = True
+    get.return_value.json.return_value = {"info": {"version": "999.0.0"}}
+    thread = entry_point._check_version()
+    assert thread
+    thread.join()
+    entry_point._print_version_check_result(thread)
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["latest"] == "999.0.0"
+    assert "version 999.0.0 is available" in capsys.readouterr().out
+
+
+def test_unfinished_check_is_not_awaited(capsys: pytest.CaptureFixture[str]) -> None:
+    thread = Mock()
+    thread.is_alive.return_value = True
+    entry_point._print_version_check_result(thread)
+    assert not capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
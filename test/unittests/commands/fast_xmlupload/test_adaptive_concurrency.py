@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _run(concurrency: AdaptiveConcurrency, clock: _Clock, latency: float, congested: bool = False) -> None:
+    with concurrency.slot() as slot:
+        clock.now += latency
+        slot.congested = congested
+
+
+def test_limit_increases_while_healthy() -> None:
+    clock = _Clock()
+    concurrency = AdaptiveConcurrency("test", max_limit=4, limit=1, clock=clock)
+    for _ in range(1 + 2 + 3 + 4 + 4):
+        _run(concurrency, clock, latency=1.0)
+    assert concurrency.limit == 4
+    assert [limit for _, limit in concurrency.history] == [2, 3, 4]
+
+
+def test_limit_is_halved_on_congestion() -> None:
+    clock = _Clock()
+    concurrency = AdaptiveConcurrency("test", max_limit=16, limit=8, clock=clock)
+    _run(concurrency, clock, latency=1.0, congested=True)
+    for _ in range(7):
+        _run(concurrency, clock, latency=1.0)
+    assert concurrency.limit == 4
+
+
+def test_limit_is_halved_on_rising_latency() -> None:
+    clock = _Clock()
+    concurrency = AdaptiveConcurrency("test", max_limit=16, limit=4, clock=clock)
+    for _ in range(4):
+        _run(concurrency, clock, latency=1.0)
+    assert concurrency.limit == 5
+    for _ in range(5):
+        _run(concurrency, clock, latency=10.0)
+    assert concurrency.limit == 2
+
+
+def test_latency_is_relative_to_the_weight() -> None:
+    clock = _Clock()
+    concurrency = AdaptiveConcurrency("test", max_limit=16, limit=2, clock=clock)
+    for weight in (1.0, 1.0, 10.0, 10.0, 10.0):
+        with concurrency.slot(weight):
+            clock.now += weight
+    assert concurrency.limit == 4
+
+
+def test_exception_is_congestion() -> None:
+    concurrency = AdaptiveConcurrency("test", max_limit=4, limit=2)
+    for _ in range(2):
+        with pytest.raises(ValueError, match="failed"), concurrency.slot():
+            raise ValueError("failed")
+    assert concurrency.limit == 1
+
+
+def test_fixed_limit() -> None:
+    concurrency = AdaptiveConcurrency.create("test", nthreads=3, max_threads=None)
+    with concurrency.slot() as slot:
+        slot.congested = True
+    assert (concurrency.limit, concurrency.max_limit, concurrency.adaptive) == (3, 3, False)
+
+
+def test_in_flight_work_is_limited() -> None:
+    concurrency = AdaptiveConcurrency("test", max_limit=2, limit=2, adaptive=False)
+    in_flight: list[int] = []
+    counter = [0]
+    lock = threading.Lock()
+
+    def work() -> None:
+        with concurrency.slot():
+            with lock:
+                counter[0] += 1
+                in_flight.append(counter[0])
+            threading.Event().wait(0.01)
+            with lock:
+                counter[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(in_flight) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
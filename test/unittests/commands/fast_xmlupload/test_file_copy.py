@@ -0,0 +1,84 @@
+import hashlib
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload import file_copy, process_files
+from dsp_tools.commands.fast_xmlupload.file_copy import compute_sha256, copy_with_checksum, link_or_copy
+from dsp_tools.commands.fast_xmlupload.process_files import _process_file
+
+
+@pytest.fixture()
+def big_file(tmp_path: Path) -> Path:
+    # spans several chunks, and the last one is incomplete
+    file = tmp_path / "big.bin"
+    file.write_bytes(bytes(range(256)) * 10_000)
+    return file
+
+
+def test_copy_with_checksum(big_file: Path, tmp_path: Path) -> None:
+    copy = tmp_path / "copy.bin"
+    checksum = copy_with_checksum(big_file, copy)
+    assert checksum == hashlib.sha256(big_file.read_bytes()).hexdigest()
+    assert copy.read_bytes() == big_file.read_bytes()
+
+
+def test_copy_with_checksum_without_clone(big_file: Path, tmp_path: Path) -> None:
+    copy = tmp_path / "copy.bin"
+    with patch.object(file_copy, "_clone", return_value=False):
+        checksum = copy_with_checksum(big_file, copy)
+    assert checksum == hashlib.sha256(big_file.read_bytes()).hexdigest()
+    assert copy.read_bytes() == big_file.read_bytes()
+
+
+def test_copy_with_checksum_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        copy_with_checksum(tmp_path / "nonexisting.bin", tmp_path / "copy.bin")
+    assert not (tmp_path / "copy.bin").exists()
+
+
+def test_link_or_copy(big_file: Path, tmp_path: Path) -> None:
+    link = tmp_path / "link.bin"
+    link_or_copy(big_file, link)
+    assert link.read_bytes() == big_file.read_bytes()
+
+
+def test_link_or_copy_without_hard_link(big_file: Path, tmp_path: Path) -> None:
+    copy = tmp_path / "copy.bin"
+    with patch("os.link", side_effect=OSError), patch.object(file_copy, "_clone", return_value=False):
+        link_or_copy(big_file, copy)
+    assert copy.read_bytes() == big_file.read_bytes()
+    assert not copy.samefile(big_file)
+
+
+def test_compute_sha256_empty_file(tmp_path: Path) -> None:
+    file = tmp_path / "empty.txt"
+    file.touch()
+    assert compute_sha256(file) == hashlib.sha256(b"").hexdigest()
+
+
+def test_process_other_file_reads_the_input_once(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    in_file = input_dir / "data.csv"
+    in_file.write_text("a,b\n1,2\n", encoding="utf-8")
+    reading_again = AssertionError("The checksum was computed from a second read")
+    with (
+        patch.object(file_copy, "_clone", return_value=False),
+        patch.object(process_files, "compute_sha256", side_effect=reading_again),
+    ):
+        orig_file, derivative = _process_file(in_file, input_dir, output_dir)
+    assert orig_file == in_file
+    assert derivative
+    assert derivative.read_bytes() == in_file.read_bytes()
+    sidecar = json.loads(derivative.with_suffix(".info").read_text(encoding="utf-8"))
+    expected_checksum = hashlib.sha256(in_file.read_bytes()).hexdigest()
+    assert sidecar["checksumOriginal"] == sidecar["checksumDerivative"] == expected_checksum
+    assert sidecar["originalInternalFilename"] == f"{derivative.stem}.csv.orig"
+    assert (derivative.parent / f"{derivative.stem}.csv.orig").read_bytes() == in_file.read_bytes()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
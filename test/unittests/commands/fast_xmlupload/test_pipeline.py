@@ -0,0 +1,134 @@
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload import pipeline
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.pipeline import FilePipeline
+
+
+def _process(_: AdaptiveConcurrency, in_file: Path, *__: object) -> tuple[Path, Optional[Path]]:
+    if in_file.stem == "broken":
+        return in_file, None
+    return in_file, Path("tmp") / f"{in_file.stem}-uuid.jp2"
+
+
+@pytest.fixture()
+def process() -> Iterator[Mock]:
+    with patch.object(pipeline, "process_file_with_limit", side_effect=_process) as process:
+        yield process
+
+
+@pytest.fixture()
+def upload() -> Iterator[Mock]:
+    with (
+        patch.object(pipeline, "get_processed_file_names", side_effect=lambda _, p: [p.name]),
+        patch.object(pipeline, "upload_file", side_effect=lambda p, *_: (p, True)) as upload,
+    ):
+        yield upload
+
+
+def _create_pipeline(
+    files: list[Path], window: int = 10, processed_earlier: Optional[dict[Path, Path]] = None
+) -> FilePipeline:
+    limits = {
+        category: AdaptiveConcurrency(category, max_limit=2, limit=2, adaptive=False)
+        for category in ("IMAGE", "VIDEO", "OTHER")
+    }
+    return FilePipeline(
+        files=files,
+        input_dir=Path("input"),
+        output_dir=Path("tmp"),
+        processing_limits=limits,
+        upload_concurrency=AdaptiveConcurrency("upload", max_limit=2, limit=2, adaptive=False),
+        sipi_url="http://sipi",
+        con=Mock(),
+        cache=Mock(),
+        journal=Mock(),
+        ledger=Mock(),
+        processed_earlier=processed_earlier,
+        window=window,
+    )
+
+
+@pytest.mark.usefixtures("process")
+def test_files_are_processed_and_uploaded(upload: Mock) -> None:
+    files = [Path("input/a.tif"), Path("input/broken.tif"), Path("input/c.pdf"), Path("input/d.mp4")]
+    file_pipeline = _create_pipeline(files, processed_earlier={Path("input/d.mp4"): Path("tmp/d-earlier.mp4")})
+    file_pipeline.start()
+    try:
+        assert [file_pipeline.wait_for(str(f)) for f in files] == ["a-uuid.jp2", None, "c-uuid.jp2", "d-earlier.mp4"]
+        # a file that is referenced by several resources
+        assert file_pipeline.wait_for("input/a.tif") == "a-uuid.jp2"
+        assert file_pipeline.wait_for("input/unknown.tif") is None
+    finally:
+        file_pipeline.stop()
+    assert file_pipeline.num_processed == 3
+    assert file_pipeline.num_uploaded == 3
+    assert file_pipeline.failed == [Path("input/broken.tif")]
+    assert upload.call_count == 3
+
+
+@pytest.mark.usefixtures("process", "upload")
+def test_journal_error_does_not_fail_the_file() -> None:
+    file_pipeline = _create_pipeline([Path("input/a.tif")])
+    file_pipeline.journal.append.side_effect = OSError("No space left on device")  # type: ignore[attr-defined]
+    file_pipeline.start()
+    try:
+        assert file_pipeline.wait_for("input/a.tif") == "a-uuid.jp2"
+    finally:
+        file_pipeline.stop()
+    assert not file_pipeline.failed
+
+
+@pytest.mark.usefixtures("process")
+def test_upload_error_does_not_block_the_resource_creation() -> None:
+    def upload_file(processed_file: Path, *_: object) -> tuple[Path, bool]:
+        if processed_file.stem.startswith("a"):
+            raise OSError("Connection reset by peer")
+        return processed_file, True
+
+    def get_processed_file_names(_: Path, processed_file: Path) -> list[str]:
+        if processed_file.stem.startswith("b"):
+            raise PermissionError(f"Permission denied: {processed_file.parent}")
+        return [processed_file.name]
+
+    files = [Path("input/a.tif"), Path("input/b.mp4"), Path("input/c.tif")]
+    file_pipeline = _create_pipeline(files, processed_earlier={Path("input/b.mp4"): Path("tmp/b-earlier.mp4")})
+    with (
+        patch.object(pipeline, "get_processed_file_names", side_effect=get_processed_file_names),
+        patch.object(pipeline, "upload_file", side_effect=upload_file),
+    ):
+        file_pipeline.start()
+        try:
+            assert [file_pipeline.wait_for(str(f)) for f in files] == [None, None, "c-uuid.jp2"]
+        finally:
+            file_pipeline.stop()
+    assert sorted(file_pipeline.failed) == [Path("input/a.tif"), Path("input/b.mp4")]
+
+
+@pytest.mark.usefixtures("upload")
+def test_window_limits_the_files_ahead_of_the_resource_creation(process: Mock) -> None:
+    files = [Path(f"input/{i}.tif") for i in range(10)]
+    file_pipeline = _create_pipeline(files, window=3)
+    file_pipeline.start()
+    try:
+        deadline = time.monotonic() + 5
+        while process.call_count < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        assert process.call_count == 3
+        assert file_pipeline.wait_for("input/0.tif") == "0-uuid.jp2"
+        # a file that is not admitted yet doesn't wait for the window
+        assert file_pipeline.wait_for("input/9.tif") == "9-uuid.jp2"
+    finally:
+        file_pipeline.stop()
+    assert process.call_count <= 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,118 @@
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from dsp_tools.commands.fast_xmlupload import process_files
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.process_files import (
+    _get_category_queues,
+    _iterate_processed_files,
+    get_category_limits,
+    get_export_moving_image_frames_script,
+)
+from dsp_tools.models.exceptions import UserError
+
+
+def _create_file(path: Path, size: int) -> Path:
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_files_are_distributed_to_the_queues(tmp_path: Path) -> None:
+    small_image = _create_file(tmp_path / "small.tif", 10)
+    large_image = _create_file(tmp_path / "large.JPG", 1000)
+    video = _create_file(tmp_path / "video.mp4", 100)
+    text = _create_file(tmp_path / "text.txt", 10)
+    unknown = _create_file(tmp_path / "unknown.xyz", 10)
+    limits = get_category_limits(AdaptiveConcurrency.create("test", nthreads=4, max_threads=None))
+
+    queues = _get_category_queues([small_image, text, video, large_image, unknown], limits)
+    assert {q.category: list(q.files) for q in queues} == {
+        "IMAGE": [large_image, small_image],
+        "VIDEO": [video],
+        "OTHER": [text, unknown],
+    }
+    assert queues[0].concurrency.max_limit == 4
+    for queue in queues:
+        queue.executor.shutdown()
+
+
+def test_no_queue_for_empty_category(tmp_path: Path) -> None:
+    limits = get_category_limits(AdaptiveConcurrency.create("test", nthreads=4, max_threads=None))
+    queues = _get_category_queues([_create_file(tmp_path / "a.tif", 10)], limits)
+    assert [q.category for q in queues] == ["IMAGE"]
+    queues[0].executor.shutdown()
+
+
+def test_slow_video_does_not_block_the_other_files(tmp_path: Path) -> None:
+    video = _create_file(tmp_path / "video.mp4", 10)
+    others = [_create_file(tmp_path / f"{i}.{ext}", 10) for i in range(20) for ext in ("tif", "pdf")]
+    others_finished = threading.Event()
+
+    def process(_: AdaptiveConcurrency, in_file: Path, *__: object) -> tuple[Path, Optional[Path]]:
+        if in_file == video:
+            # a single thread pool would never finish the other files while the video is running
+            assert others_finished.wait(timeout=10)
+        return in_file, in_file.with_suffix(".jp2")
+
+    limits = {
+        category: AdaptiveConcurrency(category, max_limit=1, limit=1, adaptive=False)
+        for category in ("IMAGE", "VIDEO", "OTHER")
+    }
+    queues = _get_category_queues([video, *others], limits)
+    finished = []
+    with patch.object(process_files, "process_file_with_limit", side_effect=process):
+        for orig_file, _ in _iterate_processed_files(queues, tmp_path, tmp_path):
+            finished.append(orig_file)
+            if len(finished) == len(others):
+                others_finished.set()
+    assert sorted(finished[:-1]) == sorted(others)
+    assert finished[-1] == video
+
+
+@pytest.fixture()
+def home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def _script_path(home: Path) -> Path:
+    return home / ".dsp-tools/fast-xmlupload/export-moving-image-frames.sh"
+
+
+@patch.object(requests, "get")
+def test_script_is_downloaded_once(get: Mock, home: Path) -> None:
+    get.return_value = Mock(text="#!/bin/bash")
+    get_export_moving_image_frames_script()
+    get_export_moving_image_frames_script()
+    assert get.call_count == 1
+    assert _script_path(home).read_text() == "#!/bin/bash"
+    assert process_files.export_moving_image_frames_script == _script_path(home)
+
+
+@patch.object(requests, "get", side_effect=requests.ConnectionError())
+def test_outdated_script_is_used_if_the_download_fails(get: Mock, home: Path) -> None:
+    script = _script_path(home)
+    script.parent.mkdir(parents=True)
+    script.write_text("#!/bin/bash")
+    with patch.object(process_files, "_export_moving_image_frames_script_max_age", timedelta(0)):
+        get_export_moving_image_frames_script()
+    get.assert_called_once()
+    assert script.read_text() == "#!/bin/bash"
+
+
+@pytest.mark.usefixtures("home")
+@patch.object(requests, "get", side_effect=requests.ConnectionError())
+def test_missing_script_that_cannot_be_downloaded(get: Mock) -> None:
+    with pytest.raises(UserError, match="Could not download"):
+        get_export_moving_image_frames_script()
+    get.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
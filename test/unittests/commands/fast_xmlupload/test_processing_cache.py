@@ -0,0 +1,134 @@
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import call, patch
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload import process_files
+from dsp_tools.commands.fast_xmlupload.file_copy import compute_sha256
+from dsp_tools.commands.fast_xmlupload.process_files import _process_file, _reuse_processed_file
+from dsp_tools.commands.fast_xmlupload.processing_cache import ProcessingCache
+
+
+@pytest.fixture()
+def input_dir(tmp_path: Path) -> Path:
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "data.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    return input_dir
+
+
+@pytest.fixture()
+def output_dir(tmp_path: Path) -> Path:
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    return output_dir
+
+
+def _read_sidecar(derivative: Path) -> dict[str, Any]:
+    sidecar: dict[str, Any] = json.loads(derivative.with_suffix(".info").read_text(encoding="utf-8"))
+    return sidecar
+
+
+def test_unchanged_file_is_reused(input_dir: Path, output_dir: Path) -> None:
+    in_file = input_dir / "data.csv"
+    cache = ProcessingCache.load(output_dir)
+    _, first_derivative = _process_file(in_file, input_dir, output_dir, cache)
+    cache.save()
+
+    cache = ProcessingCache.load(output_dir)
+    with (
+        patch.object(process_files, "copy_with_checksum", side_effect=AssertionError("unchanged file was read")),
+        patch.object(process_files, "copy_file", side_effect=AssertionError("unchanged file was read")),
+    ):
+        _, second_derivative = _process_file(in_file, input_dir, output_dir, cache)
+    assert cache.reused == 1
+    assert first_derivative
+    assert second_derivative
+    assert second_derivative.stem != first_derivative.stem
+    assert second_derivative.read_bytes() == in_file.read_bytes()
+    sidecar = _read_sidecar(second_derivative)
+    assert sidecar["internalFilename"] == second_derivative.name
+    assert sidecar["originalInternalFilename"] == f"{second_derivative.stem}.csv.orig"
+    assert sidecar["checksumOriginal"] == _read_sidecar(first_derivative)["checksumOriginal"]
+    assert (second_derivative.parent / f"{second_derivative.stem}.csv.orig").is_file()
+
+
+def test_file_with_same_content_is_reused(input_dir: Path, output_dir: Path) -> None:
+    cache = ProcessingCache(output_dir / "processing_cache.json")
+    _process_file(input_dir / "data.csv", input_dir, output_dir, cache)
+    (input_dir / "copy.csv").write_bytes((input_dir / "data.csv").read_bytes())
+    with patch.object(process_files, "_process_other_file", side_effect=AssertionError("file was processed")):
+        _, derivative = _process_file(input_dir / "copy.csv", input_dir, output_dir, cache)
+    assert cache.reused == 1
+    assert derivative
+    sidecar = _read_sidecar(derivative)
+    assert sidecar["originalFilename"] == "copy.csv"
+    assert sidecar["originalInternalFilename"] == f"{derivative.stem}.csv.orig"
+    assert (derivative.parent / f"{derivative.stem}.csv.orig").read_bytes() == b"a,b\n1,2\n"
+
+
+def test_new_file_is_read_once(input_dir: Path, output_dir: Path) -> None:
+    in_file = input_dir / "data.csv"
+    cache = ProcessingCache(output_dir / "processing_cache.json")
+    with (
+        patch.object(process_files, "compute_sha256", wraps=compute_sha256) as hash_mock,
+        patch.object(process_files, "copy_file", side_effect=AssertionError("checksum wasn't computed while copying")),
+    ):
+        _process_file(in_file, input_dir, output_dir, cache)
+    assert call(in_file) not in hash_mock.call_args_list
+    assert cache.get_checksum(in_file) == compute_sha256(in_file)
+
+
+def test_modified_file_is_processed_again(input_dir: Path, output_dir: Path) -> None:
+    in_file = input_dir / "data.csv"
+    cache = ProcessingCache(output_dir / "processing_cache.json")
+    _process_file(in_file, input_dir, output_dir, cache)
+    in_file.write_text("a,b\n3,4\n", encoding="utf-8")
+    _, derivative = _process_file(in_file, input_dir, output_dir, cache)
+    assert cache.reused == 0
+    assert derivative
+    assert derivative.read_text(encoding="utf-8") == "a,b\n3,4\n"
+
+
+def test_deleted_files_are_processed_again(input_dir: Path, output_dir: Path) -> None:
+    in_file = input_dir / "data.csv"
+    cache = ProcessingCache(output_dir / "processing_cache.json")
+    _, first_derivative = _process_file(in_file, input_dir, output_dir, cache)
+    assert first_derivative
+    first_derivative.unlink()
+    _, second_derivative = _process_file(in_file, input_dir, output_dir, cache)
+    assert cache.reused == 0
+    assert second_derivative
+    assert second_derivative.is_file()
+
+
+def test_reuse_video_with_preview(output_dir: Path) -> None:
+    old_name = "0b22570d-515f-4c3d-a6af-e42b458e7b2b"
+    old_dir = output_dir / "0b" / "22"
+    (old_dir / old_name).mkdir(parents=True)
+    (old_dir / f"{old_name}.mp4").write_bytes(b"video")
+    (old_dir / f"{old_name}.mp4.orig").write_bytes(b"video")
+    (old_dir / f"{old_name}.info").write_text(json.dumps({"checksumOriginal": "abc", "fps": 25}), encoding="utf-8")
+    (old_dir / old_name / f"{old_name}_m_0.jpg").write_bytes(b"preview")
+
+    derivative = _reuse_processed_file(
+        Path("multimedia/bird.mp4"), old_dir / f"{old_name}.mp4", old_dir / f"{old_name}.mp4.orig", output_dir
+    )
+    assert derivative
+    new_name = derivative.stem
+    assert (derivative.parent / new_name / f"{new_name}_m_0.jpg").read_bytes() == b"preview"
+    sidecar = _read_sidecar(derivative)
+    assert sidecar["fps"] == 25
+    assert sidecar["originalFilename"] == "bird.mp4"
+
+
+def test_load_corrupt_cache(output_dir: Path) -> None:
+    (output_dir / "processing_cache.json").write_text("{", encoding="utf-8")
+    cache = ProcessingCache.load(output_dir)
+    assert not cache.entries
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
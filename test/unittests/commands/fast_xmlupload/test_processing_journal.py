@@ -0,0 +1,101 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload.process_files import get_files_processed_earlier, get_processed_file_names
+from dsp_tools.commands.fast_xmlupload.processing_journal import (
+    ProcessingJournal,
+    get_processing_results,
+    get_result_files,
+    get_upload_manifest,
+    read_result_files,
+)
+from dsp_tools.models.exceptions import UserError
+
+
+@pytest.fixture()
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_files_are_readable_before_the_journal_is_closed(workdir: Path) -> None:
+    journal = ProcessingJournal.create()
+    journal.append(Path("images/a.tif"), Path("tmp/ab/cd/a.jp2"))
+    journal.append(Path("images/b.tif"), None)
+    # e.g. if the process crashes now
+    entries = list(read_result_files(get_result_files()))
+    journal.close()
+    assert entries == [(Path("images/a.tif"), Path("tmp/ab/cd/a.jp2")), (Path("images/b.tif"), None)]
+    assert journal.filepath.parent == Path()
+    assert (workdir / journal.filepath).is_file()
+
+
+def test_truncated_line_is_skipped(workdir: Path) -> None:
+    journal_file = workdir / "processing_result_2024-01-01_00.00.00.000000.jsonl"
+    journal_file.write_text('{"original": "a.tif", "processed": "tmp/a.jp2"}\n{"original": "b.t')
+    assert list(read_result_files([journal_file])) == [(Path("a.tif"), Path("tmp/a.jp2"))]
+
+
+def test_later_results_override_earlier_ones(workdir: Path) -> None:
+    older = workdir / "processing_result_2024-01-01_00.00.00.000000.pkl"
+    older.write_bytes(pickle.dumps([(Path("a.tif"), None), (Path("b.tif"), Path("tmp/b.jp2"))]))
+    newer = workdir / "processing_result_2024-01-02_00.00.00.000000.jsonl"
+    newer.write_text('{"original": "a.tif", "processed": "tmp/a.jp2"}\n')
+    result_files = get_result_files()
+    assert result_files == [Path(older.name), Path(newer.name)]
+    assert get_processing_results(result_files) == {Path("a.tif"): Path("tmp/a.jp2"), Path("b.tif"): Path("tmp/b.jp2")}
+
+
+@pytest.mark.usefixtures("workdir")
+def test_no_result_files() -> None:
+    assert get_result_files(required=False) == []
+    with pytest.raises(UserError, match="No processing result found"):
+        get_result_files()
+
+
+def test_resumed_run_skips_processed_files(workdir: Path) -> None:
+    (workdir / "a.jp2").touch()
+    journal = ProcessingJournal.create()
+    journal.append(Path("a.tif"), Path("a.jp2"))
+    journal.append(Path("b.tif"), None)
+    journal.append(Path("c.tif"), Path("deleted.jp2"))
+    journal.close()
+    all_files = [Path("a.tif"), Path("b.tif"), Path("c.tif"), Path("d.tif")]
+    assert get_files_processed_earlier(all_files, workdir) == [(Path("a.tif"), Path("a.jp2"))]
+
+
+def test_files_processed_into_another_output_dir_are_not_skipped(workdir: Path) -> None:
+    (workdir / "old_output").mkdir()
+    (workdir / "old_output" / "a.jp2").touch()
+    (workdir / "new_output").mkdir()
+    (workdir / "new_output" / "b.jp2").touch()
+    journal = ProcessingJournal.create()
+    journal.append(Path("a.tif"), Path("old_output/a.jp2"))
+    journal.append(Path("b.tif"), Path("new_output/b.jp2"))
+    journal.close()
+    all_files = [Path("a.tif"), Path("b.tif")]
+    result = get_files_processed_earlier(all_files, workdir / "new_output")
+    assert result == [(Path("b.tif"), Path("new_output/b.jp2"))]
+
+
+def test_upload_manifest(workdir: Path) -> None:
+    derivative = workdir / "tmp" / "0b" / "22" / "0b22.mp4"
+    (preview_dir := derivative.parent / "0b22").mkdir(parents=True)
+    (preview_dir / "0b22_m_0.jpg").touch()
+    files = get_processed_file_names(Path("videos/a.mp4"), derivative)
+    assert files == ["0b22.mp4", "0b22.mp4.orig", "0b22.info", "0b22/0b22_m_0.jpg"]
+    legacy = workdir / "processing_result_2024-01-01_00.00.00.000000.pkl"
+    legacy.write_bytes(pickle.dumps([(Path("images/b.tif"), Path("tmp/b.jp2"))]))
+    journal = ProcessingJournal.create()
+    journal.append(Path("videos/a.mp4"), derivative, files)
+    journal.append(Path("images/c.tif"), None)
+    journal.close()
+    assert get_upload_manifest(get_result_files()) == {
+        derivative: [derivative.parent / x for x in files],
+    }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,104 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import docker
+import pytest
+
+from dsp_tools.commands.fast_xmlupload.sipi_workers import SipiWorkerPool
+from dsp_tools.models.exceptions import UserError
+
+
+def _make_container(name: str) -> Mock:
+    return Mock(name=name, status="running", exec_run=Mock(return_value=Mock(exit_code=0)))
+
+
+@pytest.fixture()
+def docker_client() -> Mock:
+    client = Mock()
+    client.containers.run.side_effect = lambda **kwargs: _make_container(kwargs["name"])
+    client.containers.get.side_effect = docker.errors.NotFound("not found")
+    return client
+
+
+def _start_pool(docker_client: Mock, num_containers: int = 2, nthreads: int = 2) -> SipiWorkerPool:
+    pool = SipiWorkerPool(Path("in"), Path("out"), num_containers, nthreads, docker_client, health_check_interval=60)
+    pool.start()
+    return pool
+
+
+def test_conversions_are_distributed_over_the_containers(docker_client: Mock) -> None:
+    pool = _start_pool(docker_client)
+    assert pool.convert(Path("processing-input/a.tif"), Path("processing-output/a.jp2"))
+    assert pool.convert(Path("processing-input/b.tif"), Path("processing-output/b.jp2"))
+    first, second = [worker.container for worker in pool.workers]
+    assert first
+    assert second
+    first.exec_run.assert_called_once_with("/sipi/sipi 'processing-input/a.tif' processing-output/a.jp2")
+    second.exec_run.assert_called_once_with("/sipi/sipi 'processing-input/b.tif' processing-output/b.jp2")
+
+
+def test_failing_conversion(docker_client: Mock) -> None:
+    pool = _start_pool(docker_client, num_containers=1)
+    container = pool.workers[0].container
+    assert container
+    container.exec_run.return_value = Mock(exit_code=1)
+    assert not pool.convert(Path("processing-input/a.tif"), Path("processing-output/a.jp2"))
+    # a failing conversion is not a reason to replace the container
+    assert docker_client.containers.run.call_count == 1
+
+
+def test_only_the_broken_container_is_replaced(docker_client: Mock) -> None:
+    pool = _start_pool(docker_client)
+    broken, healthy = [worker.container for worker in pool.workers]
+    assert broken
+    assert healthy
+    broken.exec_run.side_effect = docker.errors.APIError("connection lost")
+    assert pool.convert(Path("processing-input/a.tif"), Path("processing-output/a.jp2"))
+    healthy.exec_run.assert_called_once()
+    assert docker_client.containers.run.call_count == 3
+    assert pool.workers[0].container is not broken
+    assert pool.workers[0].generation == 2
+    assert pool.workers[1].container is healthy
+
+
+def test_stopped_container_is_replaced_at_the_health_check(docker_client: Mock) -> None:
+    now = [0.0]
+    pool = SipiWorkerPool(Path("in"), Path("out"), 1, 1, docker_client, health_check_interval=60, clock=lambda: now[0])
+    pool.start()
+    stopped = pool.workers[0].container
+    assert stopped
+    stopped.status = "exited"
+    assert pool.convert(Path("processing-input/a.tif"), Path("processing-output/a.jp2"))
+    # the container is only checked again after the interval
+    stopped.exec_run.assert_called_once()
+    now[0] = 61.0
+    assert pool.convert(Path("processing-input/b.tif"), Path("processing-output/b.jp2"))
+    replacement = pool.workers[0].container
+    assert replacement is not stopped
+    assert replacement
+    replacement.exec_run.assert_called_once()
+
+
+def test_conversion_fails_if_the_docker_api_keeps_failing(docker_client: Mock) -> None:
+    broken = _make_container("sipi")
+    broken.exec_run.side_effect = docker.errors.APIError("connection lost")
+    docker_client.containers.run.side_effect = lambda **_: broken
+    pool = _start_pool(docker_client)
+    with pytest.raises(UserError, match="not able to convert"):
+        pool.convert(Path("processing-input/a.tif"), Path("processing-output/a.jp2"))
+    assert broken.exec_run.call_count == 3
+
+
+def test_stop_removes_the_containers(docker_client: Mock) -> None:
+    pool = _start_pool(docker_client)
+    docker_client.containers.get.side_effect = None
+    pool.stop()
+    assert [c.args for c in docker_client.containers.get.call_args_list[-2:]] == [
+        ("sipi-processing-0",),
+        ("sipi-processing-1",),
+    ]
+    assert all(worker.container is None for worker in pool.workers)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
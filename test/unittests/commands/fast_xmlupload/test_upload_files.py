@@ -0,0 +1,114 @@
+import io
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+
+from dsp_tools.commands.fast_xmlupload import upload_files
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.processing_journal import ProcessingJournal
+from dsp_tools.commands.fast_xmlupload.upload_files import (
+    SessionPool,
+    _get_backoff,
+    _get_upload_candidates,
+    _MultipartBody,
+    _upload_without_processing,
+)
+
+
+def _create_processed_files(processed_dir: Path, internal_filename: str, extension: str) -> list[Path]:
+    subfolder = processed_dir / internal_filename[:2] / internal_filename[2:4]
+    subfolder.mkdir(parents=True, exist_ok=True)
+    files = [
+        subfolder / f"{internal_filename}{extension}",
+        subfolder / f"{internal_filename}.tif.orig",
+        subfolder / f"{internal_filename}.info",
+    ]
+    for file in files:
+        file.touch()
+    return files
+
+
+def test_upload_candidates_from_manifest_and_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    processed_dir = Path("tmp")
+    in_manifest = _create_processed_files(processed_dir, "1ffbbb30-77e8", ".jp2")
+    not_in_manifest = _create_processed_files(processed_dir, "0b22570d-515f", ".mp4")
+    preview = not_in_manifest[0].parent / "0b22570d-515f" / "0b22570d-515f_m_0.jpg"
+    preview.parent.mkdir()
+    preview.touch()
+    journal = ProcessingJournal.create()
+    journal.append(Path("images/a.tif"), in_manifest[0], [x.name for x in in_manifest])
+    journal.append(Path("videos/b.mp4"), not_in_manifest[0])
+    journal.close()
+
+    candidates = _get_upload_candidates(processed_dir, [journal.filepath], [in_manifest[0], not_in_manifest[0]])
+    assert candidates[in_manifest[0]] == in_manifest
+    assert sorted(candidates[not_in_manifest[0]]) == sorted([*not_in_manifest, preview])
+
+
+def test_multipart_body_is_read_in_chunks() -> None:
+    content = bytes(range(256)) * 100
+    body = _MultipartBody(io.BytesIO(content), "1ffbbb30.jp2", len(content))
+    boundary = body.content_type.split("boundary=")[1]
+    chunks = [body.read(1000) for _ in range(len(body) // 1000 + 2)]
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    data = b"".join(chunks)
+    assert len(data) == len(body)
+    assert data.startswith(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="1ffbbb30.jp2"'.encode()
+    )
+    assert data.endswith(content + f"\r\n--{boundary}--\r\n".encode())
+
+
+def test_backoff_is_capped() -> None:
+    assert 0.5 <= _get_backoff(0) <= 1
+    assert 4 <= _get_backoff(3) <= 8
+    assert 30 <= _get_backoff(20) <= 60
+
+
+_fixed_concurrency = AdaptiveConcurrency.create("test", nthreads=1, max_threads=None)
+
+
+def _response(status_code: int) -> Mock:
+    return Mock(status_code=status_code, text="", json=Mock(return_value={}))
+
+
+@pytest.fixture()
+def sleep() -> Iterator[Mock]:
+    with patch.object(upload_files, "sleep") as sleep:
+        yield sleep
+
+
+@pytest.fixture()
+def send_file() -> Iterator[Mock]:
+    with patch.object(upload_files, "_send_file") as send_file:
+        yield send_file
+
+
+def test_upload_is_retried(send_file: Mock, sleep: Mock) -> None:
+    send_file.side_effect = [RequestsConnectionError(), _response(503), _response(200)]
+    assert _upload_without_processing(Path("a.jp2"), "http://sipi/", Mock(), SessionPool(1), _fixed_concurrency)
+    assert send_file.call_count == 3
+    assert send_file.call_args.args[1] == "http://sipi/upload_without_processing"
+    assert sleep.call_count == 2
+
+
+@pytest.mark.usefixtures("sleep")
+def test_rejected_upload_is_not_retried(send_file: Mock) -> None:
+    send_file.return_value = _response(400)
+    assert not _upload_without_processing(Path("a.jp2"), "http://sipi", Mock(), SessionPool(1), _fixed_concurrency)
+    assert send_file.call_count == 1
+
+
+@pytest.mark.usefixtures("sleep")
+def test_upload_fails_after_the_last_attempt(send_file: Mock) -> None:
+    send_file.return_value = _response(500)
+    assert not _upload_without_processing(Path("a.jp2"), "http://sipi", Mock(), SessionPool(1), _fixed_concurrency)
+    assert send_file.call_count == upload_files._max_attempts
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dsp_tools.commands.fast_xmlupload import upload_files
+from dsp_tools.commands.fast_xmlupload.adaptive_concurrency import AdaptiveConcurrency
+from dsp_tools.commands.fast_xmlupload.upload_files import (
+    SessionPool,
+    _check_if_all_files_were_uploaded,
+    upload_file,
+)
+from dsp_tools.commands.fast_xmlupload.upload_ledger import UploadLedger
+
+SIPI_URL = "http://0.0.0.0:1024"
+USER = "root@example.com"
+
+
+@pytest.fixture()
+def files(tmp_path: Path) -> list[Path]:
+    files = [tmp_path / "1ffbbb30.jp2", tmp_path / "1ffbbb30.tif.orig", tmp_path / "1ffbbb30.info"]
+    for file in files:
+        file.write_bytes(b"content")
+    return files
+
+
+def test_ledger_is_reloaded(tmp_path: Path, files: list[Path]) -> None:
+    ledger = UploadLedger.load(SIPI_URL, USER, tmp_path / "upload_ledger.jsonl")
+    ledger.record(files[0], uploaded=True)
+    ledger.record(files[1], uploaded=False)
+    ledger.close()
+    with open(ledger.filepath, "a", encoding="utf-8") as f:
+        f.write('{"file": "truncated')
+
+    reloaded = UploadLedger.load(SIPI_URL, USER, ledger.filepath)
+    assert reloaded.is_uploaded(files[0])
+    assert not reloaded.is_uploaded(files[1])
+    assert not reloaded.is_uploaded(files[2])
+
+
+def test_ledger_of_another_server_skips_nothing(tmp_path: Path, files: list[Path]) -> None:
+    ledger = UploadLedger.load("https://iiif.test.dasch.swiss", USER, tmp_path / "upload_ledger.jsonl")
+    for file in files:
+        ledger.record(file, uploaded=True)
+    ledger.close()
+    other_server = UploadLedger.load(SIPI_URL, USER, ledger.filepath)
+    assert not any(other_server.is_uploaded(file) for file in files)
+    other_user = UploadLedger.load("https://iiif.test.dasch.swiss", "other@example.com", ledger.filepath)
+    assert not any(other_user.is_uploaded(file) for file in files)
+
+
+def test_changed_file_is_not_uploaded(tmp_path: Path, files: list[Path]) -> None:
+    ledger = UploadLedger(tmp_path / "upload_ledger.jsonl", SIPI_URL, USER)
+    ledger.record(files[0], uploaded=True)
+    ledger.record(files[1], uploaded=True)
+    ledger.close()
+    files[0].write_bytes(b"other content")
+    stat = files[1].stat()
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not ledger.is_uploaded(files[0])
+    assert not ledger.is_uploaded(files[1])
+
+
+@patch.object(upload_files, "_upload_without_processing", return_value=True)
+def test_uploaded_files_are_skipped(upload: Mock, tmp_path: Path, files: list[Path]) -> None:
+    ledger = UploadLedger(tmp_path / "upload_ledger.jsonl", SIPI_URL, USER)
+    ledger.record(files[1], uploaded=True)
+    concurrency = AdaptiveConcurrency.create("test", nthreads=1, max_threads=None)
+    candidates = {files[0]: files}
+    result = upload_file(files[0], files, SIPI_URL, Mock(), SessionPool(1), concurrency, ledger)
+    ledger.close()
+    assert result == (files[0], True)
+    assert [c.kwargs["file"] for c in upload.call_args_list] == [files[0], files[2]]
+    assert ledger.skipped == 1
+    assert _check_if_all_files_were_uploaded([files[0]], candidates, UploadLedger.load(SIPI_URL, USER, ledger.filepath))
+
+
+def test_check_reads_the_ledger(tmp_path: Path, files: list[Path]) -> None:
+    ledger = UploadLedger(tmp_path / "upload_ledger.jsonl", SIPI_URL, USER)
+    ledger.record(files[0], uploaded=True)
+    ledger.record(files[1], uploaded=True)
+    ledger.record(files[2], uploaded=False)
+    ledger.close()
+    missing = tmp_path / "0b22570d.jp2"
+    candidates = {files[0]: files, missing: []}
+    assert not _check_if_all_files_were_uploaded([files[0], missing], candidates, ledger)
+    ledger.record(files[2], uploaded=True)
+    ledger.close()
+    assert _check_if_all_files_were_uploaded([files[0]], candidates, ledger)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
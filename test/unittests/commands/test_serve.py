@@ -0,0 +1,136 @@
+import argparse
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from dsp_tools.commands.serve import JobServer, _remove_stale_socket, submit
+from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig
+from dsp_tools.commands.xmlupload.write_diagnostic_info import write_id2iri_mapping
+from dsp_tools.models.exceptions import UserError
+
+
+def _parse(args: list[str]) -> argparse.Namespace:
+    if args[0] == "id2iri":
+        return argparse.Namespace(action="id2iri", xmlfile=args[1], mapping=args[2])
+    return argparse.Namespace(action=args[0], xmlfile=args[1], imgdir=".")
+
+
+@pytest.fixture()
+def socket_path(tmp_path: Path) -> Path:
+    return tmp_path / "dsp-tools.sock"
+
+
+def _start_server(socket_path: Path, execute: Callable[[argparse.Namespace], bool], max_jobs: int = 4) -> JobServer:
+    server = JobServer(socket_path, max_jobs, _parse, execute)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture()
+def executed_jobs(socket_path: Path) -> Iterator[list[argparse.Namespace]]:
+    jobs: list[argparse.Namespace] = []
+
+    def execute(args: argparse.Namespace) -> bool:
+        print(f"Executing {args.action}")
+        jobs.append(args)
+        return True
+
+    server = _start_server(socket_path, execute)
+    yield jobs
+    server.shutdown()
+    server.server_close()
+
+
+def test_submit_job(
+    socket_path: Path, executed_jobs: list[argparse.Namespace], capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert submit(["xmlupload", "data.xml"], socket_path)
+    assert capsys.readouterr().out == "Executing xmlupload\n"
+    [job] = executed_jobs
+    assert job.xmlfile == str(Path.cwd() / "data.xml")
+    assert job.imgdir == str(Path.cwd())
+
+
+def test_submit_job_with_absolute_paths(socket_path: Path, executed_jobs: list[argparse.Namespace]) -> None:
+    assert submit(["id2iri", "/data/data.xml", "/data/mapping.json"], socket_path)
+    [job] = executed_jobs
+    assert (job.xmlfile, job.mapping) == ("/data/data.xml", "/data/mapping.json")
+
+
+def test_submit_unsupported_action(
+    socket_path: Path, executed_jobs: list[argparse.Namespace], capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert not submit(["create", "project.json"], socket_path)
+    assert "The action 'create' can't be submitted as a job" in capsys.readouterr().out
+    assert not executed_jobs
+
+
+def test_failing_job(socket_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    def execute(_: argparse.Namespace) -> bool:
+        raise UserError("The XML file is invalid")
+
+    server = _start_server(socket_path, execute)
+    assert not submit(["xmlupload", "data.xml"], socket_path)
+    assert "The XML file is invalid" in capsys.readouterr().out
+    # the worker is still available after a failing job
+    assert not submit(["xmlupload", "data.xml"], socket_path)
+    server.shutdown()
+    server.server_close()
+
+
+def test_jobs_in_a_row_write_separate_diagnostics(
+    socket_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    def execute(args: argparse.Namespace) -> bool:
+        write_id2iri_mapping({}, args.xmlfile, DiagnosticsConfig(save_location=tmp_path))
+        return True
+
+    server = _start_server(socket_path, execute)
+    assert submit(["xmlupload", "data.xml"], socket_path)
+    assert submit(["xmlupload", "data.xml"], socket_path)
+    server.shutdown()
+    server.server_close()
+    assert len(list(tmp_path.glob("data_id2iri_mapping_*.json"))) == 2
+
+
+def test_jobs_run_concurrently(socket_path: Path) -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    def execute(_: argparse.Namespace) -> bool:
+        barrier.wait()
+        return True
+
+    server = _start_server(socket_path, execute, max_jobs=2)
+    results: list[bool] = []
+    clients = [threading.Thread(target=lambda: results.append(submit(["xmlupload", "a.xml"], socket_path)))]
+    clients.append(threading.Thread(target=lambda: results.append(submit(["xmlupload", "b.xml"], socket_path))))
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    server.shutdown()
+    server.server_close()
+    assert results == [True, True]
+
+
+def test_submit_without_worker(socket_path: Path) -> None:
+    with pytest.raises(UserError, match="No worker is listening"):
+        submit(["xmlupload", "data.xml"], socket_path)
+
+
+def test_remove_stale_socket(socket_path: Path) -> None:
+    server = JobServer(socket_path, 1, _parse, lambda _: True)
+    with pytest.raises(UserError, match="Another worker is already listening"):
+        _remove_stale_socket(socket_path)
+    server.server_close()
+    _remove_stale_socket(socket_path)
+    assert not socket_path.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -24,39 +24,46 @@ class ConnectionMockRaising(ConnectionMockBase):
 
 @dataclass
 class ConnectionMockWithResponses(ConnectionMockBase):
-    get_responses: tuple[dict[str, Any], ...] = (
-        {
-            "project": {
-                "ontologies": ["/testonto"],
-            }
-        },
-        {
-            "@graph": [
-                {
-                    "@id": "testonto:ValidResourceClass",
-                    "knora-api:isResourceClass": True,
+    get_responses: tuple[tuple[str, dict[str, Any]], ...] = (
+        (
+            "/admin/projects/shortcode/4124",
+            {
+                "project": {
+                    "ontologies": ["/testonto"],
                 }
-            ]
-        },
-        {
-            "@graph": [
-                {
-                    "@id": "knora-api:ValidResourceClass",
-                    "knora-api:isResourceClass": True,
-                }
-            ]
-        },
+            },
+        ),
+        ("/version", {"webapi": "v30.0.0"}),
+        (
+            "/ontology/4124/testonto/v2",
+            {
+                "@graph": [
+                    {
+                        "@id": "testonto:ValidResourceClass",
+                        "knora-api:isResourceClass": True,
+                    }
+                ]
+            },
+        ),
+        (
+            "/ontology/knora-api/v2#",
+            {
+                "@graph": [
+                    {
+                        "@id": "knora-api:ValidResourceClass",
+                        "knora-api:isResourceClass": True,
+                    }
+                ]
+            },
+        ),
     )
-    counter = 0
 
     def get(
         self,
-        route: str,  # noqa: ARG002 (unused-method-argument)
+        route: str,
         headers: dict[str, str] | None = None,  # noqa: ARG002 (unused-method-argument)
     ) -> dict[str, Any]:
-        response = self.get_responses[self.counter]
-        self.counter += 1
-        return response
+        return dict(self.get_responses)[route]
 
 
 def test_error_on_nonexistent_shortcode() -> None:
@@ -72,7 +79,7 @@ def test_error_on_nonexistent_shortcode() -> None:
         do_xml_consistency_check(ontology_client, root)
 
 
-def test_error_on_nonexistent_onto_name() -> None:
+def test_error_on_nonexistent_onto_name(tmp_path: Path) -> None:
     root = etree.fromstring(
         '<knora shortcode="4124" default-ontology="notexistingfantasyonto">'
         '<resource label="The only resource" restype=":minimalResource" id="the_only_resource"/>'
@@ -83,7 +90,7 @@ def test_error_on_nonexistent_onto_name() -> None:
         con=con,
         shortcode="4124",
         default_ontology="notexistingfantasyonto",
-        save_location=Path("bar"),
+        save_location=tmp_path,
     )
     expected = re.escape(
         "\nSome property and/or class type(s) used in the XML are unknown.\n"
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
+from pathlib import Path
 from test.unittests.commands.xmlupload.connection_mock import ConnectionMockBase
-from typing import Any
+from typing import Any, ClassVar
 
 from dsp_tools.commands.xmlupload.list_client import (
     List,
@@ -118,6 +119,46 @@ class TestGetListNodeLookup:
         assert lookup == expected
 
 
+class TestListSnapshot:
+    list_iris: ClassVar[dict[str, Any]] = {"lists": [{"id": "http://www.example.org/lists#a", "name": "list-a"}]}
+    list_a: ClassVar[dict[str, Any]] = {
+        "list": {
+            "listinfo": {"id": "http://www.example.org/lists#a", "name": "list-a"},
+            "children": [{"id": "http://www.example.org/lists#a1", "name": "node-a1"}],
+        }
+    }
+    expected: ClassVar[dict[str, str]] = {
+        "list-a:list-a": "http://www.example.org/lists#a",
+        "list-a:node-a1": "http://www.example.org/lists#a1",
+    }
+
+    def test_lookup_is_built_once(self) -> None:
+        con = ConnectionMock([self.list_iris, self.list_a])
+        list_client = ListClientLive(con, "")
+        assert list_client.get_list_node_id_to_iri_lookup() is list_client.get_list_node_id_to_iri_lookup()
+
+    def test_snapshot_is_reused(self, tmp_path: Path) -> None:
+        snapshot_file = tmp_path / "list_snapshot.json"
+        ListClientLive(
+            ConnectionMock([self.list_iris, self.list_a]), "", snapshot_file
+        ).get_list_node_id_to_iri_lookup()
+        con = ConnectionMock([self.list_iris])
+        lookup = ListClientLive(con, "", snapshot_file).get_list_node_id_to_iri_lookup()
+        assert lookup == self.expected
+        assert not con.get_responses
+
+    def test_snapshot_is_discarded_if_lists_changed(self, tmp_path: Path) -> None:
+        snapshot_file = tmp_path / "list_snapshot.json"
+        ListClientLive(
+            ConnectionMock([self.list_iris, self.list_a]), "", snapshot_file
+        ).get_list_node_id_to_iri_lookup()
+        renamed_list_iris = {"lists": [{"id": "http://www.example.org/lists#a", "name": "list-renamed"}]}
+        con = ConnectionMock([renamed_list_iris, self.list_a])
+        lookup = ListClientLive(con, "", snapshot_file).get_list_node_id_to_iri_lookup()
+        assert lookup == self.expected
+        assert not con.get_responses
+
+
 class TestGetListFromServer:
     def test_no_name_no_children(self) -> None:
         list_response = {
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+import rustworkx as rx
+from lxml import etree
+
+from dsp_tools.commands.xmlupload.memory_diagnostics import MemoryProfiler, _deep_getsizeof, _measure_structure
+from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig
+
+
+def test_deep_getsizeof_counts_nested_objects() -> None:
+    flat = ["a"]
+    nested = ["a", {"key": "x" * 10_000}]
+    assert _deep_getsizeof(nested) > _deep_getsizeof(flat) + 10_000
+
+
+def test_deep_getsizeof_counts_shared_objects_once() -> None:
+    shared = "x" * 10_000
+    assert _deep_getsizeof([shared, shared]) < 2 * 10_000
+
+
+def test_measure_structure_graph() -> None:
+    graph: rx.PyDiGraph[str, None] = rx.PyDiGraph()
+    graph.add_nodes_from(["a", "b", "c"])
+    graph.add_edge(0, 1, None)
+    assert _measure_structure(graph) == {"nodes": 3, "edges": 1}
+
+
+def test_measure_structure_xml_tree() -> None:
+    root = etree.fromstring("<knora><resource/><resource/></knora>")
+    assert _measure_structure(root) == {"elements": 3}
+
+
+def test_measure_structure_dict() -> None:
+    result = _measure_structure({"id_1": "iri_1", "id_2": "iri_2"})
+    assert result["length"] == 2
+    assert result["deep_size_mib"] >= 0
+
+
+def test_disabled_profiler_does_nothing() -> None:
+    profiler = MemoryProfiler(enabled=False)
+    profiler.start()
+    profiler.snapshot("phase", lookup={})
+    assert not profiler.snapshots
+    assert profiler.write_report(DiagnosticsConfig()) is None
+
+
+def test_write_report(tmp_path: Path) -> None:
+    profiler = MemoryProfiler(enabled=True, top_n=3)
+    profiler.start()
+    profiler.snapshot("first", lookup={"id": "iri"})
+    _data = ["x" * 100 for _ in range(1000)]
+    profiler.snapshot("second", data=_data)
+    diagnostics = DiagnosticsConfig(server_as_foldername="localhost", save_location=tmp_path, timestamp_str="now")
+    report_file = profiler.write_report(diagnostics)
+    assert report_file == tmp_path / "now_memory_diagnostics_localhost.json"
+    report = json.loads(report_file.read_text(encoding="utf-8"))
+    assert [x["phase"] for x in report] == ["first", "second"]
+    assert report[0]["structure_sizes"]["lookup"]["length"] == 1
+    assert report[1]["structure_sizes"]["data"]["length"] == 1000
+    assert len(report[1]["top_allocations"]) <= 3
+    assert not report[0]["top_allocations_since_previous_phase"]
+    assert report[1]["top_allocations_since_previous_phase"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from test.unittests.commands.xmlupload.connection_mock import ConnectionMockBase
 from typing import Any
@@ -22,6 +22,35 @@ class ConnectionMock(ConnectionMockBase):
         return self.get_response
 
 
+@dataclass
+class ConnectionMockWithRoutes(ConnectionMockBase):
+    last_modification_date: str = "2024-01-01T00:00:00Z"
+    requested_routes: list[str] = field(default_factory=list)
+
+    def get(self, route: str, headers: dict[str, str] | None = None) -> dict[Any, Any]:  # noqa: ARG002 (unused-method-argument)
+        self.requested_routes.append(route)
+        match route:
+            case "/admin/projects/shortcode/4123":
+                return {
+                    "project": {
+                        "id": "http://rdfh.ch/projects/4123",
+                        "ontologies": ["http://www.knora.org/ontology/4123/testonto"],
+                    }
+                }
+            case "/v2/ontologies/metadata/http%3A%2F%2Frdfh.ch%2Fprojects%2F4123":
+                return {
+                    "@id": "http://0.0.0.0:3333/ontology/4123/testonto/v2",
+                    "knora-api:lastModificationDate": {"@value": self.last_modification_date},
+                }
+            case "/version":
+                return {"webapi": "v30.0.0"}
+            case "/ontology/4123/testonto/v2":
+                return {"@graph": [{"@id": "testonto:Thing", "knora-api:isResourceClass": True}]}
+            case "/ontology/knora-api/v2#":
+                return {"@graph": [{"@id": "knora-api:hasLinkTo"}]}
+        raise AssertionError(f"Unexpected route {route}")
+
+
 class TestGetAllClassesFromGraph:
     @staticmethod
     def test_single_class() -> None:
@@ -231,6 +260,33 @@ def test_get_knora_api_from_server() -> None:
     assert unordered(res_graph) == [{"resource_class": ["Information"]}, {"property": ["Information"]}]
 
 
+def test_get_all_ontologies_from_server(tmp_path: Path) -> None:
+    con = ConnectionMockWithRoutes()
+    ontos = OntologyClientLive(con, "4123", "testonto", tmp_path).get_all_ontologies_from_server()
+    assert ontos["testonto"].classes == ["Thing"]
+    assert ontos["knora-api"].properties == ["hasLinkTo"]
+    assert "/ontology/4123/testonto/v2" in con.requested_routes
+    assert (tmp_path / "ontology_cache.json").is_file()
+
+
+def test_get_all_ontologies_from_cache(tmp_path: Path) -> None:
+    OntologyClientLive(ConnectionMockWithRoutes(), "4123", "testonto", tmp_path).get_all_ontologies_from_server()
+    con = ConnectionMockWithRoutes()
+    ontos = OntologyClientLive(con, "4123", "testonto", tmp_path).get_all_ontologies_from_server()
+    assert ontos["testonto"].classes == ["Thing"]
+    assert ontos["knora-api"].properties == ["hasLinkTo"]
+    assert "/ontology/4123/testonto/v2" not in con.requested_routes
+    assert "/ontology/knora-api/v2#" not in con.requested_routes
+
+
+def test_get_all_ontologies_modified_ontology_is_downloaded_again(tmp_path: Path) -> None:
+    OntologyClientLive(ConnectionMockWithRoutes(), "4123", "testonto", tmp_path).get_all_ontologies_from_server()
+    con = ConnectionMockWithRoutes(last_modification_date="2024-02-01T00:00:00Z")
+    OntologyClientLive(con, "4123", "testonto", tmp_path).get_all_ontologies_from_server()
+    assert "/ontology/4123/testonto/v2" in con.requested_routes
+    assert "/ontology/knora-api/v2#" not in con.requested_routes
+
+
 def test_remove_prefixes_knora_classes() -> None:
     test_elements = ["knora-api:Annotation", "knora-api:ArchiveFileValue", "knora-api:ArchiveRepresentation"]
     res = _remove_prefixes(test_elements)
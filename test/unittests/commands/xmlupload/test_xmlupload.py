@@ -1,10 +1,14 @@
 import unittest
+from pathlib import Path
 
 import pytest
 import regex
 from lxml import etree
 
 from dsp_tools.commands.xmlupload.ark2iri import convert_ark_v0_to_resource_iri
+from dsp_tools.commands.xmlupload.iri_resolver import IriResolver
+from dsp_tools.commands.xmlupload.upload_config import DiagnosticsConfig
+from dsp_tools.commands.xmlupload.xmlupload import _handle_upload_error
 from dsp_tools.models.exceptions import BaseError
 from dsp_tools.utils.xml_utils import parse_and_clean_xml_file
 
@@ -71,5 +75,18 @@ class TestXMLUpload(unittest.TestCase):
             convert_ark_v0_to_resource_iri("ark:/72163/080c-779b99+90a0c3f-6e")
 
 
+def test_handle_upload_error_names_the_logfile(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        _handle_upload_error(
+            err=BaseError("Connection lost"),
+            iri_resolver=IriResolver(),
+            failed_uploads=[],
+            stash=None,
+            diagnostics=DiagnosticsConfig(save_location=tmp_path),
+        )
+    expected = Path.home() / ".dsp-tools" / "logging.log"
+    assert f"For more information, see the log file: {expected}\n" in capsys.readouterr().out
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from test.unittests.commands.xmlupload.connection_mock import ConnectionMockBase
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import Response
+
+from dsp_tools.models.exceptions import PermanentConnectionError, ResourceNotFoundError, UserError
+from dsp_tools.models.projectContext import ProjectContext
+from dsp_tools.utils.connection_live import ConnectionLive
+
+
+def _project(shortname: str) -> dict[str, Any]:
+    return {
+        "id": f"http://rdfh.ch/projects/{shortname}",
+        "shortcode": "4123",
+        "shortname": shortname,
+        "longname": shortname,
+        "description": [],
+        "keywords": [],
+        "ontologies": [],
+        "selfjoin": False,
+        "status": True,
+    }
+
+
+def _group(name: str, shortname: str) -> dict[str, Any]:
+    return {
+        "id": f"http://rdfh.ch/groups/{shortname}/{name}",
+        "name": name,
+        "descriptions": [],
+        "project": {"id": f"http://rdfh.ch/projects/{shortname}"},
+        "selfjoin": False,
+        "status": True,
+    }
+
+
+@dataclass
+class ConnectionMock(ConnectionMockBase):
+    requested_routes: list[str] = field(default_factory=list)
+
+    def get(self, route: str, headers: dict[str, str] | None = None) -> dict[str, Any]:  # noqa: ARG002 (unused-method-argument)
+        self.requested_routes.append(route)
+        match route:
+            case "/admin/projects/shortname/testproj":
+                return {"project": _project("testproj")}
+            case "/admin/projects/shortname/otherproj":
+                return {"project": _project("otherproj")}
+            case "/admin/projects/shortcode/4123":
+                return {"project": _project("testproj")}
+            case "/admin/groups":
+                return {"groups": [_group("editors", "testproj"), _group("editors", "otherproj")]}
+        raise ResourceNotFoundError(f"Unknown route {route}")
+
+
+@dataclass
+class FailingConnectionMock(ConnectionMockBase):
+    def get(self, route: str, headers: dict[str, str] | None = None) -> dict[str, Any]:  # noqa: ARG002 (unused-method-argument)
+        raise PermanentConnectionError(f"Server error on route {route}")
+
+
+def test_get_group_iri() -> None:
+    con = ConnectionMock()
+    context = ProjectContext(con)
+    assert context.get_group_iri("testproj:editors") == "http://rdfh.ch/groups/testproj/editors"
+    assert context.get_group_iri("otherproj:editors") == "http://rdfh.ch/groups/otherproj/editors"
+    assert context.get_group_iri("testproj:editors") == "http://rdfh.ch/groups/testproj/editors"
+    assert con.requested_routes.count("/admin/groups") == 1
+    assert "/admin/projects" not in con.requested_routes
+
+
+def test_get_group_iri_unknown_group() -> None:
+    context = ProjectContext(ConnectionMock())
+    assert context.get_group_iri("testproj:nonexisting") is None
+
+
+def test_get_group_iri_unknown_project() -> None:
+    con = ConnectionMock()
+    context = ProjectContext(con)
+    assert context.get_group_iri("nonexisting:editors") is None
+    assert "/admin/groups" not in con.requested_routes
+
+
+@patch("dsp_tools.utils.connection_live.time.sleep")
+def test_get_group_iri_unknown_project_is_not_retried(sleep: Mock) -> None:
+    not_found = Response()
+    not_found.status_code = 404
+    con = ConnectionLive("http://0.0.0.0:3333")
+    con.session = Mock()
+    con.session.request.return_value = not_found
+    context = ProjectContext(con)
+    assert context.get_group_iri("nonexisting:editors") is None
+    con.session.request.assert_called_once()
+    sleep.assert_not_called()
+
+
+def test_get_group_iri_server_error() -> None:
+    context = ProjectContext(FailingConnectionMock())
+    with pytest.raises(UserError, match="Unable to retrieve project context from DSP server"):
+        context.get_group_iri("testproj:editors")
+
+
+def test_prefetch_groups_server_error() -> None:
+    context = ProjectContext(FailingConnectionMock())
+    with pytest.raises(UserError, match="Unable to retrieve project context from DSP server"):
+        context.prefetch_groups(["testproj:editors"])
+
+
+def test_prefetch_groups() -> None:
+    con = ConnectionMock()
+    context = ProjectContext(con)
+    context.prefetch_groups(["testproj:editors", "otherproj:editors", "knora-admin:ProjectAdmin", "UnknownUser"])
+    assert sorted(con.requested_routes) == [
+        "/admin/projects/shortname/otherproj",
+        "/admin/projects/shortname/testproj",
+    ]
+    assert context.get_group_iri("otherproj:editors") == "http://rdfh.ch/groups/otherproj/editors"
+    assert con.requested_routes.count("/admin/projects/shortname/otherproj") == 1
+
+
+def test_project_name() -> None:
+    con = ConnectionMock()
+    context = ProjectContext(con, shortcode="4123")
+    assert not con.requested_routes
+    assert context.project_name == "testproj"
+    assert context.project_name == "testproj"
+    assert con.requested_routes == ["/admin/projects/shortcode/4123"]
+
+
+def test_project_name_unknown_project() -> None:
+    context = ProjectContext(ConnectionMock(), shortcode="9999")
+    assert context.project_name is None
+
+
+def test_project_name_server_error() -> None:
+    context = ProjectContext(FailingConnectionMock(), shortcode="4123")
+    with pytest.raises(UserError, match="Unable to retrieve project context from DSP server"):
+        _ = context.project_name
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,4 +1,35 @@
-from dsp_tools.utils.connection_live import ConnectionLive
+import json
+import logging
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import Response
+
+from dsp_tools.models.exceptions import PermanentConnectionError
+from dsp_tools.utils.connection_live import ConnectionLive, RequestParameters
+from dsp_tools.utils.get_cache import GetCache
+from dsp_tools.utils.token_cache import TokenCache
+
+
+class FakeSession:
+    """Answers with the given status codes one after another, and records the requests."""
+
+    def __init__(self, *status_codes: int) -> None:
+        self.headers: dict[str, str] = {}
+        self.status_codes = list(status_codes)
+        self.requests: list[dict[str, Any]] = []
+
+    def request(self, **kwargs: Any) -> Response:
+        self.requests.append(kwargs)
+        response = Response()
+        response.status_code = self.status_codes.pop(0)
+        if response.status_code == 200:
+            is_login = kwargs["url"].endswith("/v2/authentication")
+            response._content = b'{"token": "new-token"}' if is_login else b'{"project": {"shortcode": "4123"}}'
+        response.headers["ETag"] = '"etag-1"'
+        return response
 
 
 def test_anonymize_different_keys() -> None:
@@ -22,3 +53,144 @@ def test_anonymize_different_lengths() -> None:
     assert con._anonymize({"token": "uk7m20-8gqn8ir7e30"}) == {"token": "uk7m2[+13]"}
     assert con._anonymize({"token": "uk7m2"}) == {"token": "*****"}
     assert con._anonymize({"token": "u"}) == {"token": "*"}
+
+
+def test_log_request_without_payload(caplog: pytest.LogCaptureFixture) -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    params = RequestParameters("POST", "http://0.0.0.0:3333/v2/resources", 30, data={"secret": "data"})
+    with caplog.at_level(logging.DEBUG):
+        con._log_request(params, log_payload=False)
+    assert caplog.messages == ["REQUEST: POST http://0.0.0.0:3333/v2/resources"]
+
+
+def test_log_request_with_payload(caplog: pytest.LogCaptureFixture) -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    params = RequestParameters("POST", "http://0.0.0.0:3333/v2/authentication", 30, data={"password": "test"})
+    with caplog.at_level(logging.DEBUG):
+        con._log_request(params, log_payload=True)
+    [message] = caplog.messages
+    assert '"data": {"password": "****"}' in message
+
+
+def test_redact_nested_payload() -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    payload = b'{"user": {"password": "secret", "email": "a@b.ch"}, "token":"uk7m20-8gqn8"}'
+    expected = '{"user": {"password": "******", "email": "a@b.ch"}, "token": "uk7m2[+7]"}'
+    assert con._redact(payload) == expected
+
+
+def test_log_response_with_json_content(caplog: pytest.LogCaptureFixture) -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    response = Response()
+    response.status_code = 200
+    response._content = b'{"token": "uk7m20-8gqn8"}'
+    response.headers["Content-Type"] = "application/ld+json; charset=UTF-8"
+    with caplog.at_level(logging.DEBUG):
+        con._log_response(response, log_payload=True)
+    [message] = caplog.messages
+    assert json.loads(message.removeprefix("RESPONSE: "))["content"] == {"token": "uk7m2[+7]"}
+
+
+def test_log_response_with_non_json_content(caplog: pytest.LogCaptureFixture) -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    response = Response()
+    response.status_code = 500
+    response._content = b"<html>Internal Server Error</html>"
+    response.headers["Content-Type"] = "text/html"
+    with caplog.at_level(logging.DEBUG):
+        con._log_response(response, log_payload=True)
+    [message] = caplog.messages
+    content = json.loads(message.removeprefix("RESPONSE: "))["content"]
+    assert content == {"content": "<html>Internal Server Error</html>"}
+
+
+@patch("dsp_tools.utils.connection_live.time.sleep")
+def test_get_not_found_is_not_retried(sleep: Mock) -> None:
+    con = ConnectionLive("http://0.0.0.0:3333")
+    con.session = FakeSession(404)  # type: ignore[assignment]
+    with pytest.raises(PermanentConnectionError):
+        con.get("/admin/projects/shortname/nonexisting")
+    assert len(con.session.requests) == 1  # type: ignore[attr-defined]
+    sleep.assert_not_called()
+
+
+def test_cached_get_is_sent_once() -> None:
+    con = ConnectionLive("http://0.0.0.0:3333", get_cache=GetCache())
+    con.session = FakeSession(200)  # type: ignore[assignment]
+    assert con.get("/admin/projects/shortcode/4123") == {"project": {"shortcode": "4123"}}
+    assert con.get("/admin/projects/shortcode/4123") == {"project": {"shortcode": "4123"}}
+    assert len(con.session.requests) == 1  # type: ignore[attr-defined]
+
+
+def test_cached_get_is_revalidated_with_etag() -> None:
+    con = ConnectionLive("http://0.0.0.0:3333", get_cache=GetCache(ttl=0))
+    con.session = FakeSession(200, 304)  # type: ignore[assignment]
+    con.get("/admin/projects/shortcode/4123")
+    assert con.get("/admin/projects/shortcode/4123") == {"project": {"shortcode": "4123"}}
+    revalidation = con.session.requests[1]  # type: ignore[attr-defined]
+    assert revalidation["headers"] == {"If-None-Match": '"etag-1"'}
+    assert con.get_cache
+    assert con.get_cache.revalidations == 1
+
+
+def test_cached_get_is_invalidated_by_mutation() -> None:
+    con = ConnectionLive("http://0.0.0.0:3333", get_cache=GetCache())
+    con.session = FakeSession(200, 200, 200)  # type: ignore[assignment]
+    con.get("/admin/projects/shortcode/4123")
+    con.put("/admin/projects/iri/http%3A%2F%2Frdfh.ch%2Fprojects%2F4123", data={"status": True})
+    con.get("/admin/projects/shortcode/4123")
+    assert [r["method"] for r in con.session.requests] == ["GET", "PUT", "GET"]  # type: ignore[attr-defined]
+
+
+def test_login_reuses_cached_token(tmp_path: Path) -> None:
+    token_cache = TokenCache(filepath=tmp_path / "tokens.json")
+    token_cache.put("http://0.0.0.0:3333", "root@example.com", "test", "cached-token")
+    con = ConnectionLive("http://0.0.0.0:3333", token_cache=token_cache)
+    con.session = FakeSession()  # type: ignore[assignment]
+    con.login("root@example.com", "test")
+    assert con.token == "cached-token"
+    assert not con.session.requests  # type: ignore[attr-defined]
+
+
+def test_login_with_other_password_does_not_reuse_cached_token(tmp_path: Path) -> None:
+    token_cache = TokenCache(filepath=tmp_path / "tokens.json")
+    token_cache.put("http://0.0.0.0:3333", "root@example.com", "test", "cached-token")
+    con = ConnectionLive("http://0.0.0.0:3333", token_cache=token_cache)
+    con.session = FakeSession(200)  # type: ignore[assignment]
+    con.login("root@example.com", "wrong-password")
+    assert con.token == "new-token"
+    assert [r["method"] for r in con.session.requests] == ["POST"]  # type: ignore[attr-defined]
+
+
+def test_login_stores_token(tmp_path: Path) -> None:
+    token_cache = TokenCache(filepath=tmp_path / "tokens.json")
+    con = ConnectionLive("http://0.0.0.0:3333", token_cache=token_cache)
+    con.session = FakeSession(200)  # type: ignore[assignment]
+    con.login("root@example.com", "test")
+    assert token_cache.get("http://0.0.0.0:3333", "root@example.com", "test") == "new-token"
+
+
+def test_rejected_cached_token_triggers_login(tmp_path: Path) -> None:
+    token_cache = TokenCache(filepath=tmp_path / "tokens.json")
+    token_cache.put("http://0.0.0.0:3333", "root@example.com", "test", "expired-token")
+    con = ConnectionLive("http://0.0.0.0:3333", token_cache=token_cache)
+    con.session = FakeSession(401, 200, 200)  # type: ignore[assignment]
+    con.login("root@example.com", "test")
+    assert con.get("/admin/projects/shortcode/4123") == {"project": {"shortcode": "4123"}}
+    requests = con.session.requests  # type: ignore[attr-defined]
+    assert [r["method"] for r in requests] == ["GET", "POST", "GET"]
+    assert requests[0]["headers"]["Authorization"] == "Bearer expired-token"
+    assert requests[2]["headers"]["Authorization"] == "Bearer new-token"
+    assert con.token == "new-token"
+    assert token_cache.get("http://0.0.0.0:3333", "root@example.com", "test") == "new-token"
+
+
+def test_token_is_not_shared_between_connections() -> None:
+    session = FakeSession(200, 200)
+    con_1 = ConnectionLive("http://0.0.0.0:3333", token="token-1", token_cache=None)
+    con_2 = ConnectionLive("http://0.0.0.0:3333", token="token-2", token_cache=None)
+    con_1.session = con_2.session = session  # type: ignore[assignment]
+    con_1.get("/admin/projects/shortcode/4123")
+    con_2.get("/admin/projects/shortcode/4123")
+    assert [r["headers"]["Authorization"] for r in session.requests] == ["Bearer token-1", "Bearer token-2"]
+    assert "Authorization" not in session.headers
@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dsp_tools.models.exceptions import BaseError, PermanentConnectionError
+from dsp_tools.utils.connection_recording import ConnectionRecorder, ConnectionReplay, RecordedExchange
+
+
+@pytest.fixture()
+def recorder() -> ConnectionRecorder:
+    con = Mock()
+    con.get.return_value = {"project": {"id": "http://rdfh.ch/projects/1234"}}
+    con.post.return_value = {"@id": "http://rdfh.ch/4123/abc"}
+    con.put.side_effect = PermanentConnectionError("Permanently unable to execute the network action.")
+    return ConnectionRecorder(con)
+
+
+def _record_session(recorder: ConnectionRecorder) -> None:
+    recorder.get("/admin/projects/shortcode/4123")
+    recorder.post("/v2/resources", data={"rdfs:label": "res_1"})
+    recorder.post("/upload", files={"file": ("image.jpg", Mock())})
+    with pytest.raises(PermanentConnectionError):
+        recorder.put("/v2/values", data={"@id": "http://rdfh.ch/4123/abc"})
+
+
+def test_recorder_records_exchanges(recorder: ConnectionRecorder) -> None:
+    _record_session(recorder)
+    assert [(x.method, x.route) for x in recorder.exchanges] == [
+        ("GET", "/admin/projects/shortcode/4123"),
+        ("POST", "/v2/resources"),
+        ("POST", "/upload"),
+        ("PUT", "/v2/values"),
+    ]
+    assert recorder.exchanges[1].data == {"rdfs:label": "res_1"}
+    assert recorder.exchanges[2].files == ["image.jpg"]
+    assert recorder.exchanges[3].error_type == "PermanentConnectionError"
+    assert all(x.duration >= 0 for x in recorder.exchanges)
+
+
+def test_recorder_does_not_record_login(recorder: ConnectionRecorder) -> None:
+    recorder.login("root@example.com", "test")
+    recorder.con.login.assert_called_once_with("root@example.com", "test")  # type: ignore[attr-defined]
+    assert not recorder.exchanges
+
+
+def test_save_and_replay(recorder: ConnectionRecorder, tmp_path: Path) -> None:
+    _record_session(recorder)
+    recording = tmp_path / "recording.json"
+    recorder.save(recording)
+    replay = ConnectionReplay.from_file(recording, time_scale=0)
+    assert replay.get("/admin/projects/shortcode/4123") == {"project": {"id": "http://rdfh.ch/projects/1234"}}
+    assert replay.post("/v2/resources", data={"rdfs:label": "res_1"}) == {"@id": "http://rdfh.ch/4123/abc"}
+    with pytest.raises(PermanentConnectionError):
+        replay.put("/v2/values", data={})
+    assert replay.remaining == 1
+
+
+def test_save_payload_with_set(recorder: ConnectionRecorder, tmp_path: Path) -> None:
+    recorder.post("/v2/resources", data={"knora-api:hasPermissions": {"CR knora-admin:Creator"}})
+    recording = tmp_path / "recording.json"
+    recorder.save(recording)
+    replay = ConnectionReplay.from_file(recording, time_scale=0)
+    assert replay.post("/v2/resources", data={}) == {"@id": "http://rdfh.ch/4123/abc"}
+
+
+def test_replay_matches_route_templates() -> None:
+    exchanges = [
+        RecordedExchange("GET", "/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fa", 0.0, response={"@id": "a"}),
+        RecordedExchange("GET", "/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fb", 0.0, response={"@id": "b"}),
+    ]
+    replay = ConnectionReplay(exchanges, time_scale=0)
+    assert replay.get("/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fx")["@id"] == "a"
+    assert replay.get("/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fy")["@id"] == "b"
+    with pytest.raises(BaseError):
+        replay.get("/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fz")
+
+
+@patch("dsp_tools.utils.connection_recording.time.sleep")
+def test_replay_scales_timings(sleep: Mock) -> None:
+    response: dict[str, Any] = {}
+    replay = ConnectionReplay([RecordedExchange("GET", "/admin/groups", 0.5, response=response)], time_scale=2)
+    replay.get("/admin/groups")
+    sleep.assert_called_once_with(1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
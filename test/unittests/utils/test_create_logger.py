@@ -0,0 +1,77 @@
+import logging
+import logging.handlers
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from dsp_tools.utils.create_logger import (
+    LoggingConfig,
+    get_logfile_path,
+    get_logger,
+    get_logging_config,
+    set_logging_config,
+    should_log_payload,
+    truncate_payload,
+)
+
+
+@pytest.fixture()
+def _restore_logging_config() -> Iterator[None]:
+    previous = get_logging_config()
+    yield
+    set_logging_config(previous)
+
+
+def test_config_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DSP_TOOLS_LOG_LEVEL", "info")
+    monkeypatch.setenv("DSP_TOOLS_LOG_PAYLOADS", "true")
+    monkeypatch.setenv("DSP_TOOLS_LOG_PAYLOAD_SAMPLE_RATE", "0.1")
+    monkeypatch.setenv("DSP_TOOLS_LOG_PAYLOAD_MAX_CHARS", "500")
+    config = LoggingConfig.from_env()
+    assert config == LoggingConfig(
+        level=logging.INFO, log_payloads=True, payload_sample_rate=0.1, max_payload_chars=500
+    )
+
+
+def test_config_from_env_ignores_invalid_values(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DSP_TOOLS_LOG_LEVEL", "verbose")
+    monkeypatch.setenv("DSP_TOOLS_LOG_PAYLOAD_MAX_CHARS", "a lot")
+    assert LoggingConfig.from_env() == LoggingConfig()
+
+
+@pytest.mark.usefixtures("_restore_logging_config")
+def test_should_log_payload() -> None:
+    set_logging_config(LoggingConfig(log_payloads=False))
+    assert not should_log_payload()
+    set_logging_config(LoggingConfig(log_payloads=True))
+    assert should_log_payload()
+    set_logging_config(LoggingConfig(log_payloads=True, level=logging.INFO))
+    assert not should_log_payload()
+    set_logging_config(LoggingConfig(log_payloads=True, payload_sample_rate=0))
+    assert not should_log_payload()
+
+
+@pytest.mark.usefixtures("_restore_logging_config")
+def test_truncate_payload() -> None:
+    set_logging_config(LoggingConfig(max_payload_chars=5))
+    assert truncate_payload("12345") == "12345"
+    assert truncate_payload("1234567") == "12345[+2 characters]"
+
+
+@pytest.mark.usefixtures("_restore_logging_config")
+def test_set_logging_config_changes_level() -> None:
+    logger = get_logger("dsp_tools.test_create_logger")
+    set_logging_config(LoggingConfig(level=logging.WARNING))
+    assert logger.level == logging.WARNING
+
+
+def test_logger_writes_through_queue() -> None:
+    logger = get_logger("dsp_tools.test_create_logger")
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers)
+    assert not any(isinstance(h, logging.FileHandler) for h in logger.handlers)
+    assert get_logfile_path() == Path.home() / ".dsp-tools" / "logging.log"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+import pytest
+
+from dsp_tools.utils.get_cache import GetCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fresh_entry_is_served() -> None:
+    cache = GetCache()
+    cache.store("/admin/groups", b'{"groups": []}', None)
+    assert cache.get_fresh("/admin/groups") == b'{"groups": []}'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_entry_is_not_served() -> None:
+    clock = FakeClock()
+    cache = GetCache(ttl=10, clock=clock)
+    cache.store("/admin/groups", b"{}", '"etag-1"')
+    clock.now = 11
+    assert cache.get_fresh("/admin/groups") is None
+    assert cache.get_etag("/admin/groups") == '"etag-1"'
+    assert cache.revalidate("/admin/groups") == b"{}"
+    assert cache.get_fresh("/admin/groups") == b"{}"
+    assert (cache.hits, cache.revalidations, cache.misses) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = GetCache(max_entries=2)
+    cache.store("/a", b"{}", None)
+    cache.store("/b", b"{}", None)
+    cache.get_fresh("/a")
+    cache.store("/c", b"{}", None)
+    assert cache.get_fresh("/a") is not None
+    assert cache.get_fresh("/b") is None
+    assert cache.get_fresh("/c") is not None
+
+
+def test_invalidate_route_family() -> None:
+    cache = GetCache()
+    cache.store("/admin/groups", b"{}", None)
+    cache.store("/admin/projects/shortcode/4123", b"{}", None)
+    cache.invalidate("/admin/groups/http%3A%2F%2Frdfh.ch%2Fgroups%2F4123")
+    assert cache.get_fresh("/admin/groups") is None
+    assert cache.get_fresh("/admin/projects/shortcode/4123") is not None
+
+
+def test_invalidate_resources_on_value_write() -> None:
+    cache = GetCache()
+    cache.store("/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fabc", b"{}", None)
+    cache.store("/v2/ontologies/allentities/http%3A%2F%2F0.0.0.0%3A3333%2Fontology%2F4123%2Ftestonto%2Fv2", b"{}", None)
+    cache.invalidate("/v2/values")
+    assert cache.get_fresh("/v2/resources/http%3A%2F%2Frdfh.ch%2F4123%2Fabc") is None
+    assert cache.get_fresh("/v2/ontologies/allentities/http%3A%2F%2F0.0.0.0%3A3333%2Fontology%2F4123%2Ftestonto%2Fv2")
+
+
+def test_headers_are_part_of_the_key() -> None:
+    assert GetCache.make_key("/v2/resources/x", None) == "/v2/resources/x"
+    assert GetCache.make_key("/v2/resources/x", {"X-Knora-Accept-Schema": "simple"}) != "/v2/resources/x"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
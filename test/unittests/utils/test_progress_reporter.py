@@ -0,0 +1,51 @@
+import pytest
+
+from dsp_tools.utils.progress_reporter import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_reports_only_at_interval(capsys: pytest.CaptureFixture[str]) -> None:
+    clock = FakeClock()
+    progress = ProgressReporter(total=100, description="Resources", interval=5, clock=clock)
+    for _ in range(10):
+        clock.now += 1
+        progress.success("Created resource")
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("Resources: 5/100 (5.0%), 1.0/s, ETA 0:01:35")
+    assert lines[1].endswith("Resources: 10/100 (10.0%), 1.0/s, ETA 0:01:30")
+
+
+def test_reports_failures(capsys: pytest.CaptureFixture[str]) -> None:
+    clock = FakeClock()
+    progress = ProgressReporter(total=4, description="Resources", clock=clock)
+    progress.success("Created resource")
+    progress.failure("Failed to create resource")
+    progress.success("Created resource")
+    progress.success("Created resource")
+    clock.now = 2
+    progress.finish()
+    [line] = capsys.readouterr().out.splitlines()
+    assert line.endswith("Resources: 4/4 (100.0%), 2.0/s, 1 failed")
+    assert progress.succeeded == 3
+    assert progress.failed == 1
+
+
+def test_quiet(capsys: pytest.CaptureFixture[str]) -> None:
+    clock = FakeClock()
+    progress = ProgressReporter(total=2, description="Resources", interval=0, quiet=True, clock=clock)
+    clock.now = 1
+    progress.success("Created resource")
+    progress.finish()
+    assert not capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dsp_tools.utils.connection_live import ConnectionLive
+from dsp_tools.utils.request_timeline import RequestTimeline, make_route_template
+
+
+class TestMakeRouteTemplate:
+    def test_plain_route(self) -> None:
+        assert make_route_template("http://0.0.0.0:3333/v2/resources") == "/v2/resources"
+
+    def test_shortcode(self) -> None:
+        url = "https://api.dasch.swiss/admin/projects/shortcode/4123"
+        assert make_route_template(url) == "/admin/projects/shortcode/{shortcode}"
+
+    def test_encoded_iri(self) -> None:
+        url = "https://api.dasch.swiss/admin/lists/http%3A%2F%2Frdfh.ch%2Flists%2F4123%2Fabc"
+        assert make_route_template(url) == "/admin/lists/{iri}"
+
+    def test_query(self) -> None:
+        url = "https://api.dasch.swiss/admin/lists?projectIri=http%3A%2F%2Frdfh.ch%2Fprojects%2Fabc"
+        assert make_route_template(url) == "/admin/lists?projectIri={value}"
+
+    def test_ontology(self) -> None:
+        url = "https://api.dasch.swiss/ontology/4123/testonto/v2"
+        assert make_route_template(url) == "/ontology/{shortcode}/testonto/v2"
+
+
+def test_spans_record_concurrency() -> None:
+    timeline = RequestTimeline()
+    first = timeline.start_span("GET", "http://localhost/v2/a", 0)
+    second = timeline.start_span("POST", "http://localhost/v2/b", 10)
+    timeline.end_span(second)
+    timeline.end_span(first)
+    assert first.in_flight_at_start == 1
+    assert second.in_flight_at_start == 2
+    assert [x.route for x in timeline.spans] == ["/v2/b", "/v2/a"]
+    assert all(x.end is not None and x.end >= x.start for x in timeline.spans)
+
+
+def test_export_jsonl(tmp_path: Path) -> None:
+    timeline = RequestTimeline()
+    span = timeline.start_span("POST", "http://localhost/v2/resources", 42)
+    span.status_code = 200
+    timeline.end_span(span)
+    outfile = tmp_path / "timeline.jsonl"
+    timeline.export(outfile, "jsonl")
+    lines = outfile.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["method"] == "POST"
+    assert record["route"] == "/v2/resources"
+    assert record["payload_bytes"] == 42
+    assert record["status_code"] == 200
+
+
+def test_export_chrome_trace(tmp_path: Path) -> None:
+    timeline = RequestTimeline()
+    span = timeline.start_span("GET", "http://localhost/v2/resources", 0)
+    span.attempts.append((span.start, span.start + 0.5))
+    span.backoffs.append((span.start + 0.5, span.start + 1.5))
+    timeline.end_span(span)
+    outfile = tmp_path / "timeline.json"
+    timeline.export(outfile, "chrome")
+    events = json.loads(outfile.read_text(encoding="utf-8"))["traceEvents"]
+    assert [x["name"] for x in events] == ["GET /v2/resources", "attempt", "backoff", "thread_name"]
+    assert events[2]["dur"] == 1_000_000
+
+
+@patch("dsp_tools.utils.connection_live.time.sleep")
+def test_connection_records_retries(sleep: Mock) -> None:
+    timeline = RequestTimeline()
+    con = ConnectionLive("http://localhost:3333", timeline=timeline)
+    bad_response = Mock(status_code=500, headers={}, text="error")
+    bad_response.json.return_value = {}
+    good_response = Mock(status_code=200, headers={}, text="{}")
+    good_response.json.return_value = {"result": "ok"}
+    con.session = Mock(headers={})
+    con.session.request.side_effect = [bad_response, good_response]
+    with patch.object(ConnectionLive, "_in_testing_environment", return_value=False):
+        assert con.get("/v2/resources") == {"result": "ok"}
+    sleep.assert_called_once_with(1)
+    [span] = timeline.spans
+    assert span.method == "GET"
+    assert span.route == "/v2/resources"
+    assert span.status_code == 200
+    assert span.retry_count == 1
+    assert len(span.attempts) == 2
+    assert len(span.backoffs) == 1
+    assert span.error is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
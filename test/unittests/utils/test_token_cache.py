@@ -0,0 +1,62 @@
+import base64
+import json
+import stat
+from pathlib import Path
+
+import pytest
+
+from dsp_tools.utils.token_cache import TokenCache, _get_expiry_date
+
+
+def _make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": "user", "exp": exp}).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload}.signature"
+
+
+@pytest.fixture()
+def cache(tmp_path: Path) -> TokenCache:
+    return TokenCache(filepath=tmp_path / "tokens.json", clock=lambda: 1000.0)
+
+
+def test_get_expiry_date() -> None:
+    assert _get_expiry_date(_make_jwt(5000)) == 5000
+    assert _get_expiry_date("not-a-jwt") is None
+
+
+def test_put_and_get(cache: TokenCache) -> None:
+    token = _make_jwt(5000)
+    cache.put("http://0.0.0.0:3333", "root@example.com", "test", token)
+    assert cache.get("http://0.0.0.0:3333", "root@example.com", "test") == token
+    assert cache.get("http://0.0.0.0:3333", "other@example.com", "test") is None
+    assert cache.get("https://api.dasch.swiss", "root@example.com", "test") is None
+    assert cache.get("http://0.0.0.0:3333", "root@example.com", "wrong-password") is None
+
+
+def test_file_is_private_and_contains_no_credentials(cache: TokenCache) -> None:
+    cache.put("http://0.0.0.0:3333", "root@example.com", "secret-password", _make_jwt(5000))
+    assert stat.S_IMODE(cache.filepath.stat().st_mode) == 0o600
+    content = cache.filepath.read_text(encoding="utf-8")
+    assert "root@example.com" not in content
+    assert "secret-password" not in content
+
+
+def test_expired_token_is_not_returned(cache: TokenCache) -> None:
+    cache.put("http://0.0.0.0:3333", "root@example.com", "test", _make_jwt(1000 + cache.expiry_margin - 1))
+    assert cache.get("http://0.0.0.0:3333", "root@example.com", "test") is None
+
+
+def test_remove(cache: TokenCache) -> None:
+    cache.put("http://0.0.0.0:3333", "root@example.com", "test", _make_jwt(5000))
+    cache.remove("http://0.0.0.0:3333", "root@example.com", "test")
+    assert cache.get("http://0.0.0.0:3333", "root@example.com", "test") is None
+
+
+def test_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DSP_TOOLS_TOKEN_CACHE", raising=False)
+    assert TokenCache.from_env() is None
+    monkeypatch.setenv("DSP_TOOLS_TOKEN_CACHE", "true")
+    assert TokenCache.from_env()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])